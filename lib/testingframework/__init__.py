@@ -1,2 +1,2 @@
-__all__ = ['connector', 'exceptions', 'manager', 'misc', 'sumo',
+__all__ = ['connector', 'exceptions', 'load', 'manager', 'misc', 'sumo',
            'collector_package', 'collector_platform', 'util']
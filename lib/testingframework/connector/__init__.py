@@ -6,8 +6,11 @@ Module for handling generic connections with a Sumo deployment.
 @since: 2016-04-23
 '''
 
-__all__ = ['rest', 'service']
+__all__ = ['rest', 'service', 'asyncrest', 'cache', 'cassette',
+           'metrics', 'paginate', 'pool', 'ratelimit', 'retry', 'session', 'trace',
+           'transport']
 
 from .rest import RESTConnector
 from .service import ServiceConnector
+from .asyncrest import AsyncRESTConnector
 
@@ -0,0 +1,98 @@
+'''
+@author: Weimin Ma
+'''
+
+import threading
+
+from .rest import RESTConnector
+from testingframework.util.concurrency import WorkerPool, gather
+
+
+class AsyncRESTConnector(RESTConnector):
+    """
+    A REST connector whose requests can run in the background.
+
+    L{make_request} is inherited and blocks like on any REST connector, so
+    this connector can be handed to code written for L{RESTConnector}.
+    L{submit_request} takes the same arguments but returns right away with a
+    L{Future<testingframework.util.concurrency.Future>}; call C{result()} on
+    it to wait for the C{(response, content)} pair.
+
+    The requests run on a pool of worker threads, one per pooled connection,
+    so many independent calls can be in flight at once:
+
+    >>> futures = [conn.submit_request('POST', uri, body) for body in bodies]
+    >>> for response, content in conn.gather(futures): ...
+
+    @ivar _workers: The worker threads that run the requests.
+    @cvar DEFAULT_POOL_SIZE: The number of connections and worker threads if
+    pool_size is not specified
+    """
+    DEFAULT_POOL_SIZE = 8
+
+    def __init__(self, sumo, username=None, password=None, app=None,
+                 pool_size=None):
+        """
+        Creates a new asynchronous REST connector.
+
+        See L{RESTConnector.__init__} for the arguments.
+        """
+        super(AsyncRESTConnector, self).__init__(sumo, username, password,
+                                                 app, pool_size)
+        self._workers = WorkerPool(self._pool.size,
+                                   name=self.__class__.__name__)
+
+    def submit_request(self, method, uri, body=None, urlparam=None,
+                       use_sessionkey=False, headers=None):
+        """
+        Starts a HTTP request to an endpoint in the background.
+
+        See L{RESTConnector.make_request} for the arguments.
+
+        @return: The future C{(response, content)} pair.
+        @rtype: L{Future<testingframework.util.concurrency.Future>}
+        """
+        return self._workers.submit(self.make_request, method, uri, body,
+                                    urlparam, use_sessionkey, headers)
+
+    def gather(self, requests, max_in_flight=None, return_exceptions=False):
+        """
+        Runs many requests and waits for all of them.
+
+        Each request is either a future returned by L{submit_request} or a
+        tuple of arguments for it, e.g. C{('GET', uri)} or
+        C{('POST', uri, body, urlparam)}. Requests given as tuples are
+        started here with at most C{max_in_flight} of them running at once.
+
+        @param requests: The requests to run.
+        @type requests: list
+        @param max_in_flight: The maximum number of requests given as tuples
+                              running at once. None means as many as there
+                              are pooled connections.
+        @type max_in_flight: int
+        @param return_exceptions: If True a failed request gives its
+                                  exception in place of the pair, otherwise
+                                  the first failure is raised.
+        @type return_exceptions: bool
+        @return: The C{(response, content)} pairs in the order of C{requests}
+        @rtype: list
+        """
+        slots = threading.BoundedSemaphore(max_in_flight or self._pool.size)
+        request = self.make_request
+
+        def bounded_request(*args):
+            with slots:
+                return request(*args)
+
+        futures = []
+        for each in requests:
+            if isinstance(each, tuple):
+                each = self._workers.submit(bounded_request, *each)
+            futures.append(each)
+        return gather(futures, return_exceptions=return_exceptions)
+
+    def close(self):
+        """
+        Stops the worker threads once the started requests are done.
+        """
+        self._workers.shutdown()
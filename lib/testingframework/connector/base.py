@@ -30,7 +30,7 @@ class Connector(Logging):
     DEFAULT_PASSWORD = ''
 
     # types of connectors
-    (REST, SERVICEREST, SDK) = range(0, 3)
+    (REST, SERVICEREST, SDK, ASYNCREST) = range(0, 4)
 
     def __init__(self, sumo, username=None, password=None):
         '''
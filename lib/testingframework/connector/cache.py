@@ -0,0 +1,178 @@
+'''
+Module for caching GET responses in the REST connectors.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-20
+'''
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    '''
+    A cache of GET responses that are revalidated with the server.
+
+    A cached response is not returned blindly; its C{ETag} and
+    C{Last-Modified} are sent back as C{If-None-Match} and
+    C{If-Modified-Since} and the cached content is only used when the server
+    answers C{304 Not Modified}. That saves the payload transfer but never
+    returns stale data.
+
+    Entries expire C{ttl} seconds after they were stored and every write to a
+    resource drops the cached entries for that resource, its parents and its
+    children, e.g. a POST to C{collectors/1/sources} drops
+    C{collectors}, C{collectors/1/sources} and C{collectors/1/sources/2}.
+
+    @ivar _ttl: The number of seconds an entry is kept.
+    @ivar _max_entries: The maximum number of entries, the oldest entry is
+                        dropped when full.
+    @ivar _entries: The cached entries by url and accept header.
+    '''
+
+    VALIDATORS = {'etag': 'If-None-Match',
+                  'last-modified': 'If-Modified-Since'}
+
+    def __init__(self, ttl, max_entries=1000):
+        '''
+        Creates a new cache.
+
+        @param ttl: The number of seconds an entry is kept.
+        @type ttl: int
+        @param max_entries: The maximum number of entries.
+        @type max_entries: int
+        '''
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        '''
+        The number of seconds an entry is kept.
+
+        @rtype: int
+        '''
+        return self._ttl
+
+    def lookup(self, url, headers):
+        '''
+        Returns the entry for a GET of url, or None if there is no usable one.
+
+        The entry is passed to L{validators} and L{resolve} so that both use
+        the same entry even if it expires while the request is on the wire.
+
+        @param url: The requested url.
+        @type url: str
+        @param headers: The headers of the request.
+        @type headers: dict
+        @rtype: tuple
+        '''
+        return self._get(url, headers)
+
+    def validators(self, entry):
+        '''
+        Returns the conditional headers to send for an entry, or an empty
+        dict if there is none.
+
+        @param entry: The entry from L{lookup}.
+        @type entry: tuple
+        @rtype: dict
+        '''
+        if entry is None:
+            return {}
+        response = entry[1]
+        return dict((header, response[field])
+                    for field, header in self.VALIDATORS.items()
+                    if field in response)
+
+    def resolve(self, url, headers, response, content, entry):
+        '''
+        Returns the response to hand to the caller for a GET of url.
+
+        A C{304} is answered from the entry the validators were taken from
+        and keeps that entry for another C{ttl} seconds, a C{200} with
+        validators is stored, anything else is passed through.
+
+        @param url: The requested url.
+        @type url: str
+        @param headers: The headers of the request.
+        @type headers: dict
+        @param response: The response from the server.
+        @param content: The content from the server.
+        @param entry: The entry from L{lookup}.
+        @type entry: tuple
+        @rtype: tuple
+        @return: The (response, content) pair.
+        '''
+        if response.status == 304:
+            if entry is not None:
+                self._store(url, headers, entry[1], entry[2])
+                cached = copy.copy(entry[1])
+                cached.fromcache = True
+                return cached, entry[2]
+        elif response.status == 200 and \
+                any(field in response for field in self.VALIDATORS):
+            self._store(url, headers, response, content)
+        return response, content
+
+    def invalidate(self, url):
+        '''
+        Drops the entries for the resource at url, its parents and children.
+
+        @param url: The url that was written to.
+        @type url: str
+        '''
+        written = _resource(url)
+        with self._lock:
+            for key in list(self._entries):
+                cached = _resource(key[0])
+                if written.startswith(cached) or cached.startswith(written):
+                    del self._entries[key]
+
+    def clear(self):
+        '''
+        Drops all entries.
+        '''
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, url, headers):
+        key = _key(url, headers)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self._ttl:
+                del self._entries[key]
+                return None
+            return entry
+
+    def _store(self, url, headers, response, content):
+        key = _key(url, headers)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time(), copy.copy(response), content)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+def _key(url, headers):
+    '''
+    The cache key of a request, responses to different accept headers are
+    kept apart.
+    '''
+    accept = [value for header, value in headers.items()
+              if header.lower() == 'accept']
+    return url, tuple(accept)
+
+
+def _resource(url):
+    '''
+    The path of url without its query, used to find related entries.
+    '''
+    return url.split('?', 1)[0].rstrip('/') + '/'
@@ -0,0 +1,260 @@
+'''
+Module for recording REST exchanges to disk and replaying them later.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-22
+'''
+
+import base64
+import glob
+import json
+import os
+import threading
+from collections import defaultdict
+
+import httplib2
+
+_DEFAULT_CASSETTE = None
+
+
+def default_cassette():
+    '''
+    The cassette new REST connectors use, None if there is none.
+
+    @rtype: L{Cassette}
+    '''
+    return _DEFAULT_CASSETTE
+
+
+def set_default_cassette(cassette):
+    '''
+    Sets the cassette new REST connectors use, e.g. from the pytest options.
+
+    @param cassette: The cassette, or None to talk to the network again.
+    @type cassette: L{Cassette}
+    '''
+    global _DEFAULT_CASSETTE
+    _DEFAULT_CASSETTE = cassette
+
+
+class Cassette(object):
+    '''
+    A file of recorded HTTP exchanges.
+
+    In L{RECORD} mode every exchange is appended to the file as one line of
+    compact JSON holding the method, url, normalized body, status, headers
+    and content. In L{REPLAY} mode the file is read and requests are answered
+    from it without touching the network.
+
+    On replay a request is matched on method and url. Among the exchanges
+    recorded for those the first one with the same normalized body is used,
+    otherwise the next one in recorded order, since bodies often hold
+    timestamps that differ between runs. When all exchanges for a request
+    have been used the last one keeps being returned, which is what polling
+    loops want.
+
+    Processes recording at the same time, e.g. xdist workers, each pass their
+    C{worker} id and record to a file of their own next to C{path}, see
+    L{worker_path}. Replay reads C{path} and all those worker files, so a
+    replayed run may be split across workers differently.
+
+    @ivar _path: The path of the cassette file.
+    @ivar _mode: L{RECORD} or L{REPLAY}.
+    @ivar _exchanges: On replay, the unused exchanges by (method, url).
+    '''
+
+    RECORD = 'record'
+    REPLAY = 'replay'
+    MODES = [RECORD, REPLAY]
+
+    def __init__(self, path, mode, worker=None):
+        '''
+        Creates a new cassette. Recording truncates the file, and without a
+        worker id removes the worker files of an earlier recording as well.
+
+        @param path: The path of the cassette file.
+        @type path: str
+        @param mode: L{RECORD} or L{REPLAY}.
+        @type mode: str
+        @param worker: The id of the process recording alongside others, e.g.
+                       the xdist worker id, None if it is the only one.
+        @type worker: str
+        @raise ValueError: If the mode is unknown.
+        '''
+        if mode not in self.MODES:
+            raise ValueError('Unknown cassette mode {m}'.format(m=mode))
+        self._path = path
+        self._mode = mode
+        self._lock = threading.Lock()
+        self._exchanges = defaultdict(list)
+        self._last = {}
+        if mode == self.RECORD:
+            if worker is None:
+                for stale in _worker_paths(path):
+                    os.remove(stale)
+            else:
+                self._path = worker_path(path, worker)
+            self._file = open(self._path, 'w')
+        else:
+            self._file = None
+            self._load()
+
+    @property
+    def path(self):
+        '''
+        The path of the cassette file.
+
+        @rtype: str
+        '''
+        return self._path
+
+    @property
+    def replaying(self):
+        '''
+        True if requests are answered from the cassette.
+
+        @rtype: bool
+        '''
+        return self._mode == self.REPLAY
+
+    def record(self, method, url, body, response, content):
+        '''
+        Appends an exchange to the cassette.
+
+        @param method: The HTTP method.
+        @param url: The requested url.
+        @param body: The request body.
+        @param response: The httplib2 response.
+        @param content: The response content.
+        '''
+        exchange = {
+            'method': method,
+            'url': url,
+            'body': _normalize(body),
+            'status': response.status,
+            'headers': dict(response),
+        }
+        try:
+            exchange['content'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            exchange['content_b64'] = base64.b64encode(content)
+        line = json.dumps(exchange, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def play(self, method, url, body):
+        '''
+        Answers a request from the cassette.
+
+        @param method: The HTTP method.
+        @param url: The requested url.
+        @param body: The request body.
+        @return: The recorded (response, content) pair.
+        @raise CassetteMiss: If nothing was recorded for the request.
+        '''
+        key = (method, url)
+        body = _normalize(body)
+        with self._lock:
+            pending = self._exchanges.get(key)
+            if pending:
+                matches = [each for each in pending if each['body'] == body]
+                exchange = matches[0] if matches else pending[0]
+                pending.remove(exchange)
+                self._last[key] = exchange
+            elif key in self._last:
+                exchange = self._last[key]
+            else:
+                raise CassetteMiss(method, url, self._path)
+        return _response(exchange)
+
+    def close(self):
+        '''
+        Closes the cassette file.
+        '''
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _load(self):
+        paths = [self._path] if os.path.exists(self._path) else []
+        paths.extend(_worker_paths(self._path))
+        if not paths:
+            raise IOError('No cassette found at {p}'.format(p=self._path))
+        for path in paths:
+            with open(path) as cassette_file:
+                for line in cassette_file:
+                    if not line.strip():
+                        continue
+                    exchange = json.loads(line)
+                    key = (str(exchange['method']), str(exchange['url']))
+                    self._exchanges[key].append(exchange)
+
+
+def worker_path(path, worker):
+    '''
+    The file a worker records to, e.g. C{cassette.gw0.jsonl} for
+    C{cassette.jsonl}.
+
+    @param path: The path of the cassette file.
+    @type path: str
+    @param worker: The worker id.
+    @type worker: str
+    @rtype: str
+    '''
+    root, extension = os.path.splitext(path)
+    return '{r}.{w}{e}'.format(r=root, w=worker, e=extension)
+
+
+def _worker_paths(path):
+    '''
+    The worker files recorded next to path, in worker order.
+    '''
+    return sorted(glob.glob(worker_path(path, '*')))
+
+
+def _normalize(body):
+    '''
+    Normalizes a request body so equal JSON bodies compare equal regardless
+    of whitespace and key order.
+    '''
+    if not body:
+        return ''
+    try:
+        return json.dumps(json.loads(body), sort_keys=True,
+                          separators=(',', ':'))
+    except ValueError:
+        return body
+
+
+def _response(exchange):
+    '''
+    Rebuilds the (response, content) pair of a recorded exchange.
+    '''
+    headers = dict((str(key), str(value))
+                   for key, value in exchange['headers'].items())
+    headers['status'] = str(exchange['status'])
+    response = httplib2.Response(headers)
+    if 'content_b64' in exchange:
+        content = base64.b64decode(exchange['content_b64'])
+    else:
+        content = exchange['content'].encode('utf-8')
+    return response, content
+
+
+class CassetteMiss(RuntimeError):
+    '''
+    Raised on replay when the cassette holds no exchange for a request.
+    '''
+    def __init__(self, method, url, path):
+        self.method = method
+        self.url = url
+        self.path = path
+        super(CassetteMiss, self).__init__(self._error_message)
+
+    @property
+    def _error_message(self):
+        message = 'Cassette {path} has no recorded {method} {url}'
+        return message.format(path=self.path, method=self.method,
+                              url=self.url)
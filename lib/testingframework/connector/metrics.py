@@ -0,0 +1,218 @@
+'''
+Module for collecting per-endpoint request metrics in the REST connectors.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-29
+'''
+
+import json
+import re
+import threading
+import urlparse
+
+# Upper bounds of the latency histogram buckets in seconds.
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, float('inf')]
+
+_API_PREFIX = re.compile(r'^/api/v\d+')
+_HEX_ID = re.compile(r'^(?=.*\d)[0-9A-Fa-f]{8,}$')
+
+
+def normalize_uri(url):
+    '''
+    Returns the endpoint template of a url, with the host, API version,
+    query and ids left out, e.g. C{collectors/{id}/sources}.
+
+    Numeric ids and the hexadecimal ids of search jobs are collapsed.
+
+    @param url: The requested url.
+    @type url: str
+    @rtype: str
+    '''
+    if '://' not in url:
+        url = 'https://' + url
+    path = _API_PREFIX.sub('', urlparse.urlparse(url).path)
+    return '/'.join('{id}' if segment.isdigit() or _HEX_ID.match(segment)
+                    else segment for segment in path.split('/') if segment)
+
+
+class EndpointStats(object):
+    '''
+    The counters and latency histogram of one endpoint.
+
+    @ivar count: The number of requests.
+    @ivar errors: The number of requests that raised or got a status >= 400
+    @ivar statuses: The number of requests per status.
+    @ivar seconds: The total wall time of the requests.
+    @ivar request_bytes: The total size of the request bodies.
+    @ivar request_wire_bytes: The total size of the request bodies as sent,
+                              i.e. after compression.
+    @ivar response_bytes: The total size of the response contents.
+    @ivar compressed_responses: The number of responses that came in
+                                compressed.
+    @ivar buckets: The number of requests per L{LATENCY_BUCKETS} bucket.
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.statuses = {}
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.request_bytes = 0
+        self.request_wire_bytes = 0
+        self.response_bytes = 0
+        self.compressed_responses = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def add(self, seconds, status, request_bytes, response_bytes,
+            request_wire_bytes, compressed):
+        self.count += 1
+        if status is None or status >= 400:
+            self.errors += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.request_bytes += request_bytes
+        self.request_wire_bytes += request_wire_bytes
+        self.response_bytes += response_bytes
+        if compressed:
+            self.compressed_responses += 1
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, percent):
+        '''
+        Estimates a latency percentile as the upper bound of the bucket it
+        falls in, capped at the slowest request seen.
+
+        @param percent: The percentile, between 0 and 100.
+        @type percent: float
+        @rtype: float
+        '''
+        if not self.count:
+            return None
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'statuses': dict((str(status), count) for status, count
+                             in self.statuses.items()),
+            'total_seconds': self.seconds,
+            'mean_seconds': self.seconds / self.count if self.count else None,
+            'p50_seconds': self.percentile(50),
+            'p90_seconds': self.percentile(90),
+            'p99_seconds': self.percentile(99),
+            'max_seconds': self.max_seconds,
+            'request_bytes': self.request_bytes,
+            'request_wire_bytes': self.request_wire_bytes,
+            'response_bytes': self.response_bytes,
+            'compressed_responses': self.compressed_responses,
+            'histogram': dict((str(bound), count) for bound, count
+                              in zip(LATENCY_BUCKETS, self.buckets)),
+        }
+
+
+class RequestMetrics(object):
+    '''
+    Per-endpoint request metrics, keyed by method and endpoint template.
+
+    All REST connectors record into L{REQUEST_METRICS} unless given another
+    instance, so a test run ends up with one summary of all API calls.
+    '''
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, url, seconds, status, request_bytes,
+               response_bytes, request_wire_bytes=None, compressed=False):
+        '''
+        Records one request.
+
+        @param method: The HTTP method.
+        @param url: The requested url.
+        @param seconds: The wall time of the request.
+        @param status: The response status, None if the request raised.
+        @param request_bytes: The size of the request body.
+        @param response_bytes: The size of the response content.
+        @param request_wire_bytes: The size of the request body as sent, if
+                                   it differs from request_bytes.
+        @param compressed: Whether the response came in compressed.
+        '''
+        if request_wire_bytes is None:
+            request_wire_bytes = request_bytes
+        key = '{m} {e}'.format(m=method, e=normalize_uri(url))
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats()
+            stats.add(seconds, status, request_bytes, response_bytes,
+                      request_wire_bytes, compressed)
+
+    def summary(self):
+        '''
+        Returns the metrics of every endpoint, keyed by method and endpoint.
+
+        @rtype: dict
+        '''
+        with self._lock:
+            return dict((key, stats.as_dict())
+                        for key, stats in self._endpoints.items())
+
+    def format_summary(self):
+        '''
+        Formats the metrics as a table, endpoints by total time descending.
+
+        @rtype: str
+        '''
+        summary = self.summary()
+        keys = sorted(summary, key=lambda key:
+                      -summary[key]['total_seconds'])
+        width = max([len(key) for key in keys] + [8])
+        columns = ['count', 'errors', 'total_seconds', 'mean_seconds',
+                   'p90_seconds', 'max_seconds', 'request_bytes',
+                   'request_wire_bytes', 'response_bytes']
+        lines = ['{0:<{w}}'.format('endpoint', w=width) +
+                 ''.join('{0:>19}'.format(column) for column in columns)]
+        for key in keys:
+            cells = []
+            for column in columns:
+                value = summary[key][column]
+                if isinstance(value, float):
+                    cells.append('{0:>19.3f}'.format(value))
+                else:
+                    cells.append('{0:>19}'.format(value))
+            lines.append('{0:<{w}}'.format(key, w=width) + ''.join(cells))
+        return '\n'.join(lines)
+
+    def write(self, path):
+        '''
+        Writes the metrics of every endpoint to a JSON file.
+
+        @param path: The path of the file.
+        @type path: str
+        '''
+        with open(path, 'w') as metrics_file:
+            json.dump(self.summary(), metrics_file, indent=4, sort_keys=True)
+
+    def reset(self):
+        '''
+        Drops all metrics.
+        '''
+        with self._lock:
+            self._endpoints.clear()
+
+
+REQUEST_METRICS = RequestMetrics()
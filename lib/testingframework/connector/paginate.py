@@ -0,0 +1,175 @@
+'''
+Module for iterating over the pages of offset/limit endpoints.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-12
+'''
+
+import json
+import urlparse
+
+from testingframework.util.concurrency import WorkerPool
+
+
+def paginate(connector, uri, page_size=100, key=None, method='GET',
+             body=None, urlparam=None, limit=None, prefetch=True,
+             headers=None):
+    '''
+    Yields the items of an endpoint that pages with C{offset} and C{limit},
+    e.g. C{collectors}, C{search/jobs/{id}/messages} or
+    C{metrics/meta/catalog/query}.
+
+    While the items of a page are consumed the next page is already being
+    fetched, so the network and the caller overlap. Fetching stops with the
+    first page that is not full, when C{total} items have been seen if the
+    endpoint reports a total, or at C{limit} items.
+
+    GET endpoints get the offset and limit as url parameters. For POST
+    endpoints, such as the metrics catalog query, they are set in the JSON
+    body.
+
+    >>> for message in paginate(conn, messages_uri, 1000):
+    ...     process(message['map'])
+
+    @param connector: The connector to make the requests with.
+    @type connector: L{RESTConnector<testingframework.connector.rest.RESTConnector>}
+    @param uri: The uri of the endpoint, as for C{make_request}.
+    @type uri: str
+    @param page_size: The number of items per request.
+    @type page_size: int
+    @param key: The key of the items in a page, by default the last segment
+                of the uri if a page has it, otherwise C{results}.
+    @type key: str
+    @param method: C{GET} or C{POST}.
+    @type method: str
+    @param body: For POST, the other fields of the JSON body.
+    @type body: dict or str
+    @param urlparam: Other url parameters.
+    @type urlparam: dict
+    @param limit: The most items to yield, None for all.
+    @type limit: int
+    @param prefetch: Whether the next page is fetched in the background.
+    @type prefetch: bool
+    @param headers: Headers for the page requests only, see C{make_request}.
+    @type headers: dict
+    @raise PageRequestFailed: If a page does not get a 200.
+    '''
+    if isinstance(body, basestring):
+        body = json.loads(body)
+    pager = _Pager(connector, uri, page_size, key, method, body or {},
+                   dict(urlparam or {}), limit, headers)
+    if not prefetch:
+        return pager.items(pager.fetch)
+    return _prefetched(pager)
+
+
+def _prefetched(pager):
+    workers = WorkerPool(1, name='paginate')
+    try:
+        for item in pager.items(lambda offset:
+                                workers.submit(pager.fetch, offset)):
+            yield item
+    finally:
+        workers.shutdown()
+
+
+class _Pager(object):
+    '''
+    The requests of one pagination.
+    '''
+
+    def __init__(self, connector, uri, page_size, key, method, body,
+                 urlparam, limit, headers):
+        self._connector = connector
+        self._uri = uri
+        self._page_size = page_size
+        self._key = key
+        self._method = method
+        self._body = body
+        self._urlparam = urlparam
+        self._limit = limit
+        self._headers = headers
+
+    def items(self, start):
+        '''
+        Yields the items, calling start(offset) to request a page; what it
+        returns is resolved with L{_resolve}, either a page or a future.
+        '''
+        offset = 0
+        pending = start(offset)
+        while pending is not None:
+            page = _resolve(pending)
+            items, total = self._items(page)
+            offset += len(items)
+            more = len(items) >= self._page_size and \
+                (total is None or offset < total) and \
+                (self._limit is None or offset < self._limit)
+            pending = start(offset) if more else None
+            for item in items:
+                yield item
+
+    def fetch(self, offset):
+        '''
+        Requests the page starting at offset.
+
+        @rtype: dict
+        '''
+        size = self._page_size
+        if self._limit is not None:
+            size = min(size, self._limit - offset)
+        if self._method == 'GET':
+            urlparam = dict(self._urlparam, offset=offset, limit=size)
+            response, content = self._connector.make_request(
+                'GET', self._uri, urlparam=urlparam, headers=self._headers)
+        else:
+            body = json.dumps(dict(self._body, offset=offset, limit=size))
+            response, content = self._connector.make_request(
+                self._method, self._uri, body, urlparam=self._urlparam,
+                headers=self._headers)
+        if response.status != 200:
+            raise PageRequestFailed(self._uri, offset, response.status,
+                                    content)
+        return self._connector.parse_content_json(content)
+
+    def _items(self, page):
+        key = self._key
+        if key is None:
+            key = _last_segment(self._uri)
+            if key not in page:
+                key = 'results'
+            self._key = key
+        items = page.get(key, [])
+        total = page.get('total')
+        return items, total if isinstance(total, int) else None
+
+
+def _resolve(pending):
+    return pending.result() if hasattr(pending, 'result') else pending
+
+
+def _last_segment(uri):
+    if '://' not in uri:
+        uri = 'https://' + uri
+    segments = [segment for segment in
+                urlparse.urlparse(uri).path.split('/') if segment]
+    return segments[-1] if segments else None
+
+
+class PageRequestFailed(RuntimeError):
+    '''
+    Raised when a page is not returned.
+    '''
+
+    def __init__(self, uri, offset, status, content):
+        self.uri = uri
+        self.offset = offset
+        self.status = status
+        self.content = content
+        super(PageRequestFailed, self).__init__(self._error_message)
+
+    @property
+    def _error_message(self):
+        return 'Page at offset {o} of {u} failed with status {s}: {c}' \
+            .format(o=self.offset, u=self.uri, s=self.status,
+                    c=self.content[:1024])
@@ -0,0 +1,258 @@
+'''
+Module for sharing a few connectors of one credential between threads.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-19
+'''
+
+import threading
+import time
+from contextlib import contextmanager
+
+from testingframework.connector.transport import PoolTimeout
+
+
+class ConnectorPool(object):
+    '''
+    A pool of connectors of the same type and credential.
+
+    A connector is borrowed by one thread for the duration of a C{with}
+    block, so state a caller puts on it, e.g. with C{update_headers}, is not
+    seen by other threads until it is returned. Connectors are created
+    lazily, at most C{size} of them, and reused, so their sessions and
+    keep-alive connections outlive a single test. When all of them are in
+    use L{borrow} blocks until one is returned.
+
+    Connectors that were idle for C{idle_timeout} seconds are evicted. A
+    connector that was idle for C{check_after} seconds is only handed out
+    again if C{health_check} passes, otherwise it is dropped and another one
+    is used.
+
+    Besides the borrowed ones a pool may hold a L{registered} connector, the
+    long-lived one a caller keeps for itself, e.g. a session fixture. It is
+    never lent out and not counted in C{size}, but it is dropped with the
+    pool by L{close}.
+
+    >>> with sumo.borrow_connector(username=user, password=password) as conn:
+    ...     response, content = conn.make_request('GET', 'collectors')
+
+    @ivar _factory: Function that creates a new connector.
+    @ivar _size: The maximum number of connectors.
+    @ivar _idle: The (connector, returned at) pairs not in use, the most
+                 recently returned last.
+    @ivar _in_use: The number of connectors borrowed.
+    @ivar _closed: Set by L{close}, connectors returned afterwards are closed.
+    @ivar _registered: The connector set with L{register}, None if none was.
+    '''
+
+    def __init__(self, factory, size=4, idle_timeout=300, health_check=None,
+                 check_after=30, close=None):
+        '''
+        Creates a new pool.
+
+        @param factory: Function with no arguments that returns a new
+                        connector.
+        @type factory: function
+        @param size: The maximum number of connectors.
+        @type size: int
+        @param idle_timeout: Seconds after which an idle connector is
+                             evicted, None to keep them.
+        @type idle_timeout: float
+        @param health_check: Function that takes a connector and returns
+                             whether it is still usable, None to not check.
+        @type health_check: function
+        @param check_after: Seconds a connector must have been idle before it
+                            is checked again.
+        @type check_after: float
+        @param close: Function that releases a connector that is dropped.
+        @type close: function
+        '''
+        if size < 1:
+            raise ValueError('Pool size must be at least 1')
+        self._factory = factory
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._health_check = health_check
+        self._check_after = check_after
+        self._close = close
+        self._idle = []
+        self._in_use = 0
+        self._closed = False
+        self._registered = None
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        '''
+        The maximum number of connectors in this pool.
+
+        @rtype: int
+        '''
+        return self._size
+
+    @property
+    def idle(self):
+        '''
+        The number of connectors not in use.
+
+        @rtype: int
+        '''
+        with self._condition:
+            return len(self._idle)
+
+    @property
+    def in_use(self):
+        '''
+        The number of connectors borrowed.
+
+        @rtype: int
+        '''
+        with self._condition:
+            return self._in_use
+
+    @property
+    def registered(self):
+        '''
+        The connector set with L{register}, None if none was.
+
+        @rtype: L{Connector<testingframework.connector.base.Connector>}
+        '''
+        return self._registered
+
+    def register(self, connector):
+        '''
+        Sets the registered connector, replacing the one set before. The
+        replaced connector is left to whoever holds it.
+
+        @param connector: The connector.
+        @type connector: L{Connector<testingframework.connector.base.Connector>}
+        '''
+        self._registered = connector
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        '''
+        Borrows a connector for the duration of the block.
+
+        @param timeout: Seconds to wait for a free connector, None means
+                        forever.
+        @type timeout: float
+        @raise PoolTimeout: If no connector became free in time.
+        '''
+        connector = self._acquire(timeout)
+        try:
+            yield connector
+        finally:
+            self._release(connector)
+
+    def evict_idle(self):
+        '''
+        Drops the connectors that were idle for longer than the idle timeout.
+
+        @return: The number of connectors dropped.
+        @rtype: int
+        '''
+        with self._condition:
+            evicted = self._take_expired(time.time())
+        for connector in evicted:
+            self._drop(connector)
+        return len(evicted)
+
+    def close(self):
+        '''
+        Drops all idle connectors and the registered one; borrowed ones are
+        dropped when returned.
+        '''
+        with self._condition:
+            self._closed = True
+            idle = [connector for connector, _ in self._idle]
+            self._idle = []
+            registered, self._registered = self._registered, None
+            self._condition.notify_all()
+        if registered is not None:
+            idle.append(registered)
+        for connector in idle:
+            self._drop(connector)
+
+    def _acquire(self, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._condition:
+                now = time.time()
+                evicted = self._take_expired(now)
+                connector = returned = None
+                while connector is None:
+                    if self._idle:
+                        connector, returned = self._idle.pop()
+                        self._in_use += 1
+                    elif self._in_use < self._size:
+                        self._in_use += 1
+                        break
+                    elif deadline is not None and now >= deadline:
+                        raise PoolTimeout(timeout)
+                    else:
+                        self._condition.wait(
+                            None if deadline is None else deadline - now)
+                        now = time.time()
+            for each in evicted:
+                self._drop(each)
+            if connector is None:
+                return self._create()
+            if self._healthy(connector, returned):
+                return connector
+            self._forget()
+            self._drop(connector)
+
+    def _create(self):
+        try:
+            return self._factory()
+        except Exception:
+            self._forget()
+            raise
+
+    def _healthy(self, connector, returned):
+        if self._health_check is None or \
+                time.time() - returned < self._check_after:
+            return True
+        try:
+            return self._health_check(connector)
+        except Exception:
+            return False
+
+    def _release(self, connector):
+        with self._condition:
+            self._in_use -= 1
+            if not self._closed:
+                self._idle.append((connector, time.time()))
+                self._condition.notify()
+                return
+            self._condition.notify()
+        self._drop(connector)
+
+    def _forget(self):
+        '''
+        Frees the place of a borrowed connector that is not returned.
+        '''
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    def _take_expired(self, now):
+        '''
+        Removes and returns the expired idle connectors, called with the
+        condition held. The least recently returned are at the front.
+        '''
+        if self._idle_timeout is None:
+            return []
+        expired = 0
+        while expired < len(self._idle) and \
+                now - self._idle[expired][1] >= self._idle_timeout:
+            expired += 1
+        evicted = [connector for connector, _ in self._idle[:expired]]
+        del self._idle[:expired]
+        return evicted
+
+    def _drop(self, connector):
+        if self._close is not None:
+            self._close(connector)
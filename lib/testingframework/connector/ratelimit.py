@@ -0,0 +1,160 @@
+'''
+Module for keeping REST connectors under an API request quota.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-08
+'''
+
+import json
+import os
+import threading
+import time
+
+from testingframework.util.filelock import FileLock
+
+_DEFAULT_RATE_LIMITER = None
+
+
+def default_rate_limiter():
+    '''
+    The rate limiter new REST connectors use, None if there is none.
+
+    @rtype: L{RateLimiter}
+    '''
+    return _DEFAULT_RATE_LIMITER
+
+
+def set_default_rate_limiter(limiter):
+    '''
+    Sets the rate limiter new REST connectors use, e.g. from the pytest
+    options.
+
+    @param limiter: The rate limiter, or None to not limit requests.
+    @type limiter: L{RateLimiter}
+    '''
+    global _DEFAULT_RATE_LIMITER
+    _DEFAULT_RATE_LIMITER = limiter
+
+
+class RateLimiter(object):
+    '''
+    A token bucket per deployment and credential.
+
+    Every bucket refills at C{rate} tokens per second up to C{burst} tokens
+    and every request takes one. A request that finds the bucket empty
+    still takes its token, leaving the bucket in debt, and sleeps until the
+    token would have been there, so waiting requests are spaced out evenly
+    instead of all retrying at once. A 429 from the server empties the
+    bucket with L{penalize}, which holds back every request for that
+    credential rather than just the one that got it.
+
+    Without a path the buckets are shared by the connectors of this
+    process. With a path they are kept in a JSON file guarded by a
+    L{FileLock<testingframework.util.filelock.FileLock>}, so all pytest-xdist
+    workers of a run draw from the same budget. Each request then costs one
+    locked read and write of that small file.
+
+    @ivar rate: The tokens added per second.
+    @ivar burst: The most tokens a bucket holds.
+    @ivar waited: The total seconds requests were held back.
+    @ivar _path: The path of the bucket file, None to keep them in memory.
+    @ivar _buckets: The (tokens, time) of each bucket when kept in memory.
+    '''
+
+    def __init__(self, rate, burst=None, path=None):
+        '''
+        Creates a new rate limiter.
+
+        @param rate: The requests per second allowed per credential.
+        @type rate: float
+        @param burst: The requests allowed at once after being idle,
+                      defaults to one second worth of requests.
+        @type burst: float
+        @param path: The path of the bucket file shared with other
+                     processes, None to keep the buckets in memory.
+        @type path: str
+        '''
+        if rate <= 0:
+            raise ValueError('The rate must be positive')
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self.waited = 0.0
+        self._path = path
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + '.lock') if path else None
+
+    @staticmethod
+    def key(deployment, username):
+        '''
+        The key of the bucket of a user on a deployment.
+
+        @rtype: str
+        '''
+        return '{d} {u}'.format(d=deployment, u=username)
+
+    def acquire(self, key):
+        '''
+        Takes a token for a request, sleeping until it is due.
+
+        @param key: The key of the bucket, see L{key}.
+        @type key: str
+        @return: The seconds slept.
+        @rtype: float
+        '''
+        wait = self._update(key, lambda tokens: tokens - 1)
+        if wait > 0:
+            time.sleep(wait)
+            with self._lock:
+                self.waited += wait
+        return wait
+
+    def penalize(self, key, seconds=None):
+        '''
+        Empties a bucket after the server refused a request for exceeding
+        the quota, so no request is sent for the given time.
+
+        @param key: The key of the bucket.
+        @type key: str
+        @param seconds: The time to hold requests back, e.g. from a
+                        Retry-After header, defaults to one token's worth.
+        @type seconds: float
+        '''
+        debt = (seconds or 0) * self.rate
+        self._update(key, lambda tokens: min(tokens, -max(debt, 1.0) + 1))
+
+    def _update(self, key, change):
+        '''
+        Refills a bucket, applies the change to its tokens and returns the
+        seconds until the bucket is out of debt.
+        '''
+        with self._lock:
+            if self._file_lock is None:
+                return self._change(self._buckets, key, change)
+            with self._file_lock:
+                buckets = self._read()
+                wait = self._change(buckets, key, change)
+                self._write(buckets)
+                return wait
+
+    def _change(self, buckets, key, change):
+        now = time.time()
+        tokens, updated = buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        tokens = change(tokens)
+        buckets[key] = (tokens, now)
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+    def _read(self):
+        if not os.path.exists(self._path):
+            return {}
+        with open(self._path) as bucket_file:
+            try:
+                return json.load(bucket_file)
+            except ValueError:
+                return {}
+
+    def _write(self, buckets):
+        with open(self._path, 'w') as bucket_file:
+            json.dump(buckets, bucket_file)
@@ -3,8 +3,30 @@
 '''
 
 from .base import Connector
+from .transport import HTTPConnectionPool
+from .cache import ResponseCache
+from .cassette import default_cassette
+from .session import SessionStore, default_session_store
+from .ratelimit import RateLimiter, default_rate_limiter
+from .retry import retry_after
+from .metrics import REQUEST_METRICS
+from .trace import TRACE_RECORDER
+from testingframework.util.concurrency import WorkerPool, gather
+from testingframework.util.jsonstream import iter_array, iter_chunks
 import urllib
+import urlparse
+import base64
+import Cookie
+import gzip
+import zlib
+import StringIO
+import logging
+import sys
+import threading
+import time
+import httplib
 import httplib2
+import socket
 import ssl
 import json
 import xml.etree.ElementTree as et
@@ -19,21 +41,53 @@ class RESTConnector(Connector):
     turn contains connection info and auth.
 
     When a connector is logged in a sessionkey is generated and will be kept
-    until the point that you logout or the server is restarted.
+    until the point that you logout or the server is restarted. Requests made
+    with use_sessionkey log in on first use and log in again once when the
+    session is refused.
 
     When Sumo is restarted or upgraded the connector I{tries} to login again
 
-    @ivar _service: The underlying service, aka the http request object
-    @cvar HEADERS: The default headers to pass with http request. this will
-    get appended with the 'Authorization' key when sessionkey is used
+    Requests go through a pool of C{httplib2.Http} objects and the headers
+    are built per request, so one connector can be shared between threads.
+
+    @ivar _pool: The pool of underlying services, aka the http request objects
+    @ivar _cache: The GET response cache, None unless enabled with
+    L{cache_ttl}
+    @ivar _compression_threshold: The body size from which POST and PUT
+    bodies are gzipped, None unless enabled with L{compression}
+    @ivar _retry: The retry policy for failed requests, None to not retry
+    @ivar _cassette: The cassette requests are recorded to or replayed from,
+    None to just use the network
+    @ivar _metrics: The per-endpoint metrics every request is recorded in
+    @ivar _trace: The recorder of recent exchanges, None to not keep any
+    @ivar _limiter: The rate limiter requests wait for, None to not limit
+    @ivar _sessions: The session store sessions are shared through
+    @ivar _session: The id and cookie of the current session, None until
+    logged in
+    @ivar _login_url: The url of the login endpoint, None to use
+    L{LOGIN_PATH} under the Sumo url
+    @ivar sessionkey: The apiSessionId of the current session
+    @cvar HEADERS: The default headers to pass with http request. Each
+    connector works on its own copy, the 'Authorization' key is added to the
+    headers of a single request when sessionkey is used
+    @cvar LOGIN_PATH: The path of the login endpoint under the API url
+    @cvar DEFAULT_POOL_SIZE: The number of connections kept per connector if
+    pool_size is not specified
+    @cvar DEFAULT_COMPRESSION_THRESHOLD: The body size in bytes from which
+    bodies are gzipped if compression is enabled without a threshold
+    @cvar TRACE_LOG_BYTES: The number of content bytes logged at DEBUG level
 
     """
     HEADERS = {'content-type': 'text/xml; charset=utf-8'}
     METHODS = ['GET', 'POST', 'PUT', 'DELETE']
     SUCCESS = {'GET': '200', 'POST': '201', 'DELETE': '200', 'PUT': '200'}
+    DEFAULT_POOL_SIZE = 1
+    DEFAULT_COMPRESSION_THRESHOLD = 8192
+    LOGIN_PATH = 'authentication/loginwithcredentials'
+    TRACE_LOG_BYTES = 4096
 
-
-    def __init__(self, sumo, username=None, password=None, app=None):
+    def __init__(self, sumo, username=None, password=None, app=None,
+                 pool_size=None):
         """
          Creates a new REST connector.
          The connector will logged in when created with default values
@@ -46,6 +100,9 @@ class RESTConnector(Connector):
          @param password: The password to use. If None (default)
                           L{Connector.DEFAULT_PASSWORD} is used.
          @type password: str
+         @param pool_size: The maximum number of concurrent connections. If
+                           None (default) L{DEFAULT_POOL_SIZE} is used.
+         @type pool_size: int
 
         """
         if username is None:
@@ -60,33 +117,106 @@ class RESTConnector(Connector):
         self._debug_level = 0
         self._disable_ssl_certificate = True
         self._follow_redirects = False
-        httplib2.debuglevel = self._debug_level
-        self._service = httplib2.Http(timeout=self._timeout,
-                                      disable_ssl_certificate_validation=
-                                      self._disable_ssl_certificate)
-        self._service.follow_redirects = self._follow_redirects
-        self._service.add_credentials(self._username, self._password)
+        self._cache = None
+        self._compression_threshold = None
+        self._retry = None
+        self._cassette = default_cassette()
+        self._limiter = default_rate_limiter()
+        self._sessions = default_session_store()
+        self._session = None
+        self._login_url = None
+        self.sessionkey = None
+        self._metrics = REQUEST_METRICS
+        self._trace = TRACE_RECORDER
+        self.HEADERS = dict(self.HEADERS)
+        self._headers_lock = threading.Lock()
+        self._pool = HTTPConnectionPool(self._create_service,
+                                        pool_size or self.DEFAULT_POOL_SIZE)
         sumo.register_start_listener(self)
 
+    def _create_service(self):
+        """
+        Creates a new http request object with the current settings.
+
+        Used by the connection pool whenever it needs another connection.
+
+        @rtype: httplib2.Http
+        """
+        httplib2.debuglevel = self._debug_level
+        service = httplib2.Http(timeout=self._timeout,
+                                disable_ssl_certificate_validation=
+                                self._disable_ssl_certificate)
+        service.follow_redirects = self._follow_redirects
+        service.add_credentials(self._username, self._password)
+        return service
+
+    def _recreate_service(self):
+        """
+        Drops all pooled connections so new ones are created with the
+        current settings.
+        """
+        self._pool.clear()
+
     def make_request(self, method, uri, body=None, urlparam=None,
-                     use_sessionkey=False):
+                     use_sessionkey=False, headers=None):
         """
         Make a HTTP request to an endpoint
 
         @type  method: string
         @param method: HTTP valid methods: PUT, GET, POST, DELETE
         @type  uri: string
-        @param uri: URI of the REST endpoint
+        @param uri: URI of the REST endpoint, without the scheme unless it
+                    differs from the Sumo deployment's
         @type  body: string or dictionary or a sequence of two-element tuples
         @param body: the request body
         @type  urlparam: string/ dictionary or a sequence of two-element tuples
         @param urlparam: the URL parameters
         @type  use_sessionkey: bool
         @param use_sessionkey: toggle for using sessionkey or not
+        @type  headers: dict
+        @param headers: headers for this request only, replacing those of
+                        the connector with the same name in any case
 
         >>> conn.make_request('POST', '/services/receivers/simple',
         urlparam={'host': 'foo'}, body="my event")
 
+        """
+        url, body = self._build_request(uri, body, urlparam)
+
+        headers = _merge_headers(self.headers, headers)
+        headers.pop('Authorization', None)
+        session = None
+        if use_sessionkey:
+            session = self._session or self._refresh_session()
+            self._add_session_headers(headers, session)
+
+        cache = self._cache if method == 'GET' else None
+        if cache is not None:
+            cached = cache.lookup(url, headers)
+            headers.update(cache.validators(cached))
+        wire_body = self._encode_body(method, body, headers)
+        response, content = self._exchange(method, url, body, wire_body,
+                                           headers, use_sessionkey)
+        if session is not None and response.status == 401:
+            self.logger.info("Session of %s expired, logging in again",
+                             self._username)
+            self._add_session_headers(headers,
+                                      self._refresh_session(stale=session))
+            response, content = self._exchange(method, url, body, wire_body,
+                                               headers, use_sessionkey)
+        if cache is not None:
+            response, content = cache.resolve(url, headers, response, content,
+                                              cached)
+        elif self._cache is not None and method in ('POST', 'PUT', 'DELETE'):
+            self._cache.invalidate(url)
+
+        return response, content
+
+    def _build_request(self, uri, body, urlparam):
+        """
+        Encodes the body and url parameters of a request.
+
+        @return: the url and body to send
         """
         if body is None:
             body = ''
@@ -96,35 +226,426 @@ class RESTConnector(Connector):
             urlparam = ''
         if type(urlparam) != str:
             urlparam = urllib.urlencode(urlparam)
+        uri_base = '' if '://' in uri else self.uri_base
         if urlparam != '':
-            url = "%s%s?%s" % (self.uri_base, uri, urlparam)
+            url = "%s%s?%s" % (uri_base, uri, urlparam)
         else:
-            url = "%s%s" % (self.uri_base, uri)
+            url = "%s%s" % (uri_base, uri)
+        return url, body
+
+    def iter_json_array(self, method, uri, key, body=None, urlparam=None,
+                        use_sessionkey=False, headers=None):
+        """
+        Makes a HTTP request and yields the elements of a JSON array in the
+        response as they are read from the socket
+
+        Only the undecoded rest of the response is kept in memory, so
+        listing thousands of collectors or messages costs about as much
+        memory as listing one, and the first element is available before the
+        response is complete. The response is asked for gzipped, as httplib2
+        does for L{make_request}, and decompressed as it streams in.
+
+        The request goes the way of L{make_request}: it holds a pooled
+        connection until the response is read, is rate limited, retried by
+        the retry policy until the response starts, logs in again when the
+        session expired, and is recorded in the metrics, the trace and the
+        cassette. Only the first L{TRACE_LOG_BYTES} of the content are kept
+        for the trace. Once elements have been handed out a failure is
+        raised rather than retried.
+
+        @type  method: string
+        @param method: HTTP valid methods: PUT, GET, POST, DELETE
+        @type  uri: string
+        @param uri: URI of the REST endpoint, as for L{make_request}
+        @type  key: string
+        @param key: the key of the array in the response object, e.g.
+                    'collectors', None if the response is the array itself
+        @type  body: string or dictionary or a sequence of two-element tuples
+        @param body: the request body
+        @type  urlparam: string/ dictionary or a sequence of two-element tuples
+        @param urlparam: the URL parameters
+        @type  use_sessionkey: bool
+        @param use_sessionkey: toggle for using sessionkey or not
+        @type  headers: dict
+        @param headers: headers for this request only, as for L{make_request}
+        @raise StreamRequestFailed: if the status is not 200
+
+        >>> for collector in conn.iter_json_array('GET', collectors_uri,
+        'collectors'):
+        ...     print collector['name']
 
+        """
+        url, body = self._build_request(uri, body, urlparam)
+        headers = _merge_headers(self.headers, headers)
+        session = None
         if use_sessionkey:
-            self._service.clear_credentials()
-            self.update_headers('Authorization',
-                                'Sumo %s' % self.sessionkey)
+            headers.pop('Authorization', None)
+            session = self._session or self._refresh_session()
+            self._add_session_headers(headers, session)
         else:
-            if not self._service.credentials:
-                self._service.add_credentials(self._username, self._password)
-            if 'Authorization' in self.HEADERS:
-                self.HEADERS.pop('Authorization')
-        response, content = self._service.request(
-            url, method, body=body, headers=self.HEADERS)
-
-        self.logger.info("Request  => {r}".format(r={
-            'method': method,
-            'url': url,
-            'body': body,
-            'auth': '{u}:{p}'.format(u=self._username, p=self._password),
-            'header': self.HEADERS
-            }))
-        self.logger.info("Response => {r}".format(r=response))
-        self.logger.debug("Content  => {c}".format(c=content))
+            headers['Authorization'] = 'Basic ' + base64.b64encode(
+                '%s:%s' % (self._username, self._password))
+        headers['accept-encoding'] = 'gzip'
+        wire_body = self._encode_body(method, body, headers)
+
+        started = time.time()
+        with self._pool.connection() as service:
+            response, content = self._exchange(method, url, body, wire_body,
+                                               headers, use_sessionkey,
+                                               stream=service)
+            if session is not None and response.status == 401:
+                self.logger.info("Session of %s expired, logging in again",
+                                 self._username)
+                self._add_session_headers(
+                    headers, self._refresh_session(stale=session))
+                response, content = self._exchange(
+                    method, url, body, wire_body, headers, use_sessionkey,
+                    stream=service)
+            self._check_stream(method, url, response, content)
+            for element in self._read_stream(method, url, headers, body,
+                                             wire_body, response, content,
+                                             key, started):
+                yield element
+
+    def _read_stream(self, method, url, headers, body, wire_body, response,
+                     content, key, started):
+        """
+        Yields the array elements of a streamed 200 response and records the
+        exchange once it is read or failed.
+
+        @param content: the httplib response to read, or the content string
+                        if it came from the cassette
+        """
+        cassette = self._cassette
+        replayed = isinstance(content, basestring)
+        received = [0]
+        recorded = [] if cassette is not None and not replayed else None
+        head = []
+        chunks = iter_chunks(content) if not replayed else [content]
+        if not replayed and response.get('content-encoding') == 'gzip':
+            response['-content-encoding'] = 'gzip'
+            chunks = _gunzip(chunks)
+        chunks = _count(chunks, received, recorded, head,
+                        self.TRACE_LOG_BYTES)
+        try:
+            for element in iter_array(chunks, key):
+                yield element
+            for _ in chunks:
+                pass
+        except BaseException:
+            self._record(method, url, headers, body, wire_body, response,
+                         ''.join(head), time.time() - started, received[0])
+            raise
+        self._record(method, url, headers, body, wire_body, response,
+                     ''.join(head), time.time() - started, received[0])
+        if recorded is not None:
+            cassette.record(method, url, body, response, ''.join(recorded))
+
+    def _open_stream(self, service, url, method, wire_body, headers):
+        """
+        Sends a request over the keep-alive connection of a pooled Http
+        object and returns once the response headers are in.
+
+        A connection that was closed by the server while idle is reopened
+        once, as httplib2 does.
+
+        @return: the response and, for a 200, the httplib response to read
+                 the content from, otherwise the content
+        """
+        scheme, authority, request_uri, _ = httplib2.urlnorm(url)
+        conn_key = scheme + ':' + authority
+        for attempt in range(2):
+            connection = service.connections.get(conn_key)
+            if connection is None:
+                connection = service.connections[conn_key] = \
+                    self._open_connection(url)
+            reused = connection.sock is not None
+            try:
+                connection.request(method, request_uri, wire_body, headers)
+                raw = connection.getresponse()
+            except (socket.error, httplib.HTTPException):
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            response = httplib2.Response(raw)
+            if response.status == 200:
+                return response, raw
+            return response, raw.read()
+
+    def _open_connection(self, url):
+        """
+        Opens a plain httplib connection for streaming a response, kept by
+        the pooled Http object for its later requests.
+        """
+        parsed = urlparse.urlsplit(url)
+        if parsed.scheme == 'https':
+            kwargs = {}
+            if self._disable_ssl_certificate and \
+                    hasattr(ssl, '_create_unverified_context'):
+                kwargs['context'] = ssl._create_unverified_context()
+            return httplib.HTTPSConnection(parsed.hostname, parsed.port,
+                                           timeout=self._timeout, **kwargs)
+        return httplib.HTTPConnection(parsed.hostname, parsed.port,
+                                      timeout=self._timeout)
+
+    def _check_stream(self, method, url, response, content):
+        if response.status != 200:
+            raise StreamRequestFailed(method, url, response.status, content)
+
+    def _exchange(self, method, url, body, wire_body, headers,
+                  use_sessionkey, stream=None):
+        """
+        Sends a request and records it, also when it raises. Failed tries
+        are repeated as the retry policy allows, each is recorded.
+
+        A streamed 200 is returned unread and unrecorded, its reader records
+        it once the content has been read.
+
+        @param stream: the pooled Http object to stream the response over,
+                       None to read it with httplib2
+        @return: the (response, content) pair from httplib2
+        """
+        policy = self._retry
+        first_started = time.time()
+        attempt = 0
+        while True:
+            started = time.time()
+            try:
+                response, content = self._send(url, method, body, wire_body,
+                                               headers, use_sessionkey,
+                                               stream)
+            except Exception, err:
+                exc_info = sys.exc_info()
+                self._record(method, url, headers, body, wire_body, None, '',
+                             time.time() - started)
+                delay = None if policy is None else policy.delay(
+                    attempt, method, time.time() - first_started, error=err)
+                if delay is None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                self.logger.info("Retrying %s %s in %.2fs after %r", method,
+                                 url, delay, err)
+            else:
+                if stream is not None and response.status == 200:
+                    return response, content
+                self._record(method, url, headers, body, wire_body, response,
+                             content, time.time() - started)
+                delay = None if policy is None else policy.delay(
+                    attempt, method, time.time() - first_started,
+                    response=response)
+                if delay is None:
+                    return response, content
+                self.logger.info("Retrying %s %s in %.2fs after status %s",
+                                 method, url, delay, response.status)
+            time.sleep(delay)
+            attempt += 1
+
+    def login(self):
+        """
+        Logs in with the username and password and keeps the session for
+        requests made with use_sessionkey
+
+        The session is shared through the session store, so a session another
+        connector or test worker already got for the same user is reused
+        instead of logging in again.
+
+        @rtype: str
+        @return: the sessionkey, i.e. the apiSessionId of the login
+
+        """
+        self._refresh_session()
+        return self.sessionkey
+
+    def logout(self):
+        """
+        Forgets the session, also for the connectors sharing it
+        """
+        self._sessions.discard(SessionStore.key(self._get_login_url(),
+                                                self._username))
+        self._session = None
+        self.sessionkey = None
+
+    def _refresh_session(self, stale=None):
+        """
+        Gets the session from the session store, which logs in when it has
+        none or only the stale one.
+
+        @rtype: dict
+        """
+        session = self._sessions.session(
+            SessionStore.key(self._get_login_url(), self._username),
+            self._login, stale=stale)
+        self._session = session
+        self.sessionkey = str(session['id'])
+        return session
+
+    def _login(self):
+        """
+        Logs in with the username and password.
+
+        @rtype: dict
+        @return: the id and cookie of the new session
+        @raise LoginFailed: if the credentials are refused
+        """
+        url = self._get_login_url()
+        body = json.dumps({'email': self._username,
+                           'password': self._password})
+        headers = {'content-type': 'application/json',
+                   'accept': 'application/json'}
+        self.logger.info("Logging in as %s at %s", self._username, url)
+        # use_sessionkey keeps the basic credentials out of the login
+        response, content = self._exchange('POST', url, body, body, headers,
+                                           True)
+        if response.status != 200:
+            raise LoginFailed(self._username, response.status, content)
+        session_id = str(self.parse_content_json(content)['apiSessionId'])
+        cookies = Cookie.SimpleCookie()
+        cookies.load(response.get('set-cookie', ''))
+        pairs = ['%s=%s' % (name, morsel.value)
+                 for name, morsel in sorted(cookies.items())]
+        pairs.append('ASID=%s' % session_id)
+        return {'id': session_id, 'cookie': '; '.join(pairs)}
+
+    def _add_session_headers(self, headers, session):
+        headers['ApiSession'] = str(session['id'])
+        headers['Cookie'] = str(session['cookie'])
+
+    def _get_login_url(self):
+        if self._login_url is not None:
+            return self._login_url
+        return '%s%s' % (getattr(self.sumo, 'sumo_url', ''), self.LOGIN_PATH)
+
+    def _encode_body(self, method, body, headers):
+        """
+        Gzips POST and PUT bodies of at least the compression threshold when
+        compression is enabled, adding the matching header.
+
+        Responses need no negotiation, httplib2 asks for gzip and deflate and
+        decompresses them on every request.
+
+        @return: the body to send
+        """
+        if self._compression_threshold is None or \
+                method not in ('POST', 'PUT') or \
+                len(body) < self._compression_threshold:
+            return body
+        headers['content-encoding'] = 'gzip'
+        buf = StringIO.StringIO()
+        gzip_file = gzip.GzipFile(fileobj=buf, mode='wb')
+        gzip_file.write(body)
+        gzip_file.close()
+        return buf.getvalue()
+
+    def _record(self, method, url, headers, body, wire_body, response,
+                content, seconds, received=None):
+        """
+        Records an exchange in the metrics and the trace, and logs it.
+
+        Log messages are only built when their level is enabled, the full
+        exchange is only kept (clipped) by the trace recorder.
 
+        @param received: the size of the content if only its head is given,
+                         e.g. for a streamed response
+        """
+        status = response.status if response is not None else None
+        if received is None:
+            received = len(content)
+        self._metrics.record(method, url, seconds, status, len(body),
+                             received, request_wire_bytes=len(wire_body),
+                             compressed=response is not None and
+                             '-content-encoding' in response)
+        if self._trace is not None:
+            self._trace.record(method, url, headers, body, response, content,
+                               seconds)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Request  => %s %s (%d bytes, user %s)",
+                             method, url, len(body), self._username)
+            self.logger.info("Response => %s in %.3fs (%d bytes)",
+                             status, seconds, received)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Content  => %s", content[:self.TRACE_LOG_BYTES])
+
+    def _send(self, url, method, body, wire_body, headers, use_sessionkey,
+              stream=None):
+        """
+        Sends a single request over a pooled connection, or answers it from
+        the cassette when one is being replayed.
+
+        The cassette sees the body as given, the network gets the possibly
+        compressed wire_body. A streamed 200 is left for its reader to
+        record to the cassette.
+
+        @param stream: the pooled Http object to stream the response over,
+                       None to read it with httplib2
+        @return: the (response, content) pair from httplib2
+        """
+        cassette = self._cassette
+        if cassette is not None and cassette.replaying:
+            return cassette.play(method, url, body)
+        limiter = self._limiter
+        if limiter is not None:
+            waited = limiter.acquire(self._rate_limit_key())
+            if waited:
+                self.logger.debug("Held back %s %s for %.3fs by the rate "
+                                  "limit", method, url, waited)
+        if stream is not None:
+            response, content = self._open_stream(stream, url, method,
+                                                  wire_body, headers)
+        else:
+            with self._pool.connection() as service:
+                if use_sessionkey:
+                    service.clear_credentials()
+                elif not service.credentials:
+                    service.add_credentials(self._username, self._password)
+                response, content = service.request(url, method,
+                                                     body=wire_body,
+                                                     headers=headers)
+        if limiter is not None and response.status == 429:
+            limiter.penalize(self._rate_limit_key(), retry_after(response))
+        if stream is not None and response.status == 200:
+            return response, content
+        if cassette is not None:
+            cassette.record(method, url, body, response, content)
         return response, content
 
+    def _rate_limit_key(self):
+        return RateLimiter.key(getattr(self.sumo, 'sumo_url', self.sumo.name),
+                               self._username)
+
+    def make_requests(self, specs, max_in_flight=None):
+        """
+        Makes many HTTP requests concurrently
+
+        Each spec is a tuple of arguments for L{make_request}, i.e.
+        C{(method, uri, body, urlparam)} where body and urlparam may be left
+        out. A request that fails does not stop the others; its pair is
+        C{(None, exception)} instead.
+
+        @type  specs: list(tuple)
+        @param specs: the requests to make
+        @type  max_in_flight: int
+        @param max_in_flight: the maximum number of requests running at once,
+                              defaults to the connection pool size
+        @rtype: list(tuple)
+        @return: the (response, content) pairs in the order of specs
+
+        >>> conn.make_requests([('GET', collectors_uri),
+        ('DELETE', source_uri)], max_in_flight=4)
+
+        """
+        if not specs:
+            return []
+        max_in_flight = min(max_in_flight or self._pool.size, len(specs))
+        workers = WorkerPool(max_in_flight, name=self.__class__.__name__)
+        try:
+            futures = [workers.submit(self.make_request, *spec)
+                       for spec in specs]
+            results = gather(futures, return_exceptions=True)
+        finally:
+            workers.shutdown(wait=True)
+        return [result if isinstance(result, tuple) else (None, result)
+                for result in results]
+
     def parse_content_json(self, content):
         """
         Parses the content object (in json format) to python dict
@@ -133,7 +654,26 @@ class RESTConnector(Connector):
         @param content: content object from http request in json format
         """
 
-        return json.loads(str(content))
+        return json.loads(content)
+
+    @property
+    def pool_size(self):
+        """
+        The maximum number of concurrent connections.
+
+        @rtype: int
+        """
+        return self._pool.size
+
+    @property
+    def headers(self):
+        """
+        A copy of the headers that will be sent with the next request.
+
+        @rtype: dict
+        """
+        with self._headers_lock:
+            return dict(self.HEADERS)
 
     def update_headers(self, key=None, value=None):
         """
@@ -145,9 +685,10 @@ class RESTConnector(Connector):
         @param value: value for that key to append to  HEADERS
 
         """
-        if key in self.HEADERS:
-            self.HEADERS.pop(key)
-        self.HEADERS.update({key: value})
+        with self._headers_lock:
+            if key in self.HEADERS:
+                self.HEADERS.pop(key)
+            self.HEADERS.update({key: value})
 
     def debug_level(self, value):
         """
@@ -159,6 +700,7 @@ class RESTConnector(Connector):
         """
 
         self._debug_level = value
+        self._recreate_service()
 
     def timeout(self, value):
         """
@@ -170,6 +712,7 @@ class RESTConnector(Connector):
         """
 
         self._timeout = value
+        self._recreate_service()
 
     def disable_ssl_certificate(self, value):
         """
@@ -181,6 +724,7 @@ class RESTConnector(Connector):
         """
 
         self._disable_ssl_certificate = value
+        self._recreate_service()
 
     def follow_redirects(self, value):
         """
@@ -192,6 +736,134 @@ class RESTConnector(Connector):
         """
 
         self._follow_redirects = value
+        self._recreate_service()
+
+    def cache_ttl(self, value):
+        """
+        Enables the conditional GET response cache
+
+        Cached responses are revalidated with the server using their ETag or
+        Last-Modified and dropped when the resource is written to, see
+        L{ResponseCache<testingframework.connector.cache.ResponseCache>}.
+
+        @type value: int
+        @param value: seconds a cached response is kept, 0 or None disables
+                      the cache
+
+        """
+
+        self._cache = ResponseCache(value) if value else None
+
+    def compression(self, value, threshold=None):
+        """
+        Enables gzip compression of request bodies
+
+        POST and PUT bodies of at least threshold bytes are sent gzipped with
+        'Content-Encoding: gzip'. The request metrics count both the body
+        size and the size sent. Responses are compressed regardless, since
+        httplib2 always asks for them that way.
+
+        @type value: bool
+        @param value: enable/disable compression
+        @type threshold: int
+        @param threshold: the body size from which bodies are gzipped, if
+                          None L{DEFAULT_COMPRESSION_THRESHOLD} is used
+
+        """
+
+        if value:
+            self._compression_threshold = \
+                threshold or self.DEFAULT_COMPRESSION_THRESHOLD
+        else:
+            self._compression_threshold = None
+
+    def retry_policy(self, value):
+        """
+        Retries failed requests, e.g. on connection resets and 429 or 5xx
+        statuses, with backoff
+
+        @type value: L{RetryPolicy<testingframework.connector.retry.RetryPolicy>}
+        @param value: the policy deciding whether and when to try again, None
+                      to not retry
+
+        """
+
+        self._retry = value
+
+    def rate_limiter(self, value):
+        """
+        Overrides the rate limiter set with
+        L{set_default_rate_limiter<testingframework.connector.ratelimit.set_default_rate_limiter>}
+
+        @type value: L{RateLimiter<testingframework.connector.ratelimit.RateLimiter>}
+        @param value: the limiter every request to the network waits for,
+                      None to not limit requests
+
+        """
+
+        self._limiter = value
+
+    def cassette(self, value):
+        """
+        Overrides the cassette set with
+        L{set_default_cassette<testingframework.connector.cassette.set_default_cassette>}
+
+        @type value: L{Cassette<testingframework.connector.cassette.Cassette>}
+        @param value: cassette to record to or replay from, None to just use
+                      the network
+
+        """
+
+        self._cassette = value
+
+    def login_url(self, value):
+        """
+        Overrides the url of the login endpoint, by default L{LOGIN_PATH}
+        under the Sumo url
+
+        @type value: str
+        @param value: the url of the login endpoint, including the scheme
+
+        """
+
+        self._login_url = value
+        self._session = None
+
+    def session_store(self, value):
+        """
+        Overrides the session store set with
+        L{set_default_session_store<testingframework.connector.session.set_default_session_store>}
+
+        @type value: L{SessionStore<testingframework.connector.session.SessionStore>}
+        @param value: the store the sessions are shared through
+
+        """
+
+        self._sessions = value
+        self._session = None
+
+    def request_metrics(self, value):
+        """
+        Overrides the default per-endpoint metrics registry
+
+        @type value: L{RequestMetrics<testingframework.connector.metrics.RequestMetrics>}
+        @param value: the registry every request is recorded in
+
+        """
+
+        self._metrics = value
+
+    def trace_recorder(self, value):
+        """
+        Overrides the default recorder of recent exchanges
+
+        @type value: L{TraceRecorder<testingframework.connector.trace.TraceRecorder>}
+        @param value: the recorder every exchange is kept in, None to not
+                      keep any
+
+        """
+
+        self._trace = value
 
     def __del__(self):
         """
@@ -222,3 +894,79 @@ class RESTConnector(Connector):
         dom = parseString(content)
         xmlTag = dom.getElementsByTagName(tag)[0].toxml()
         return xmlTag
+
+
+def _merge_headers(headers, extra):
+    """
+    Sets the extra headers on a copy of the connector headers, dropping
+    those they replace regardless of the case of their names.
+    """
+    if extra:
+        replaced = set(key.lower() for key in extra)
+        for key in [key for key in headers if key.lower() in replaced]:
+            del headers[key]
+        headers.update(extra)
+    return headers
+
+
+def _gunzip(chunks):
+    """
+    Decompresses a stream of gzipped chunks.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+def _count(chunks, received, recorded, head, head_bytes):
+    """
+    Passes chunks on, adding up their size, keeping the first head_bytes of
+    them in head and all of them if recorded is a list.
+    """
+    for chunk in chunks:
+        if received[0] < head_bytes:
+            head.append(chunk[:head_bytes - received[0]])
+        received[0] += len(chunk)
+        if recorded is not None:
+            recorded.append(chunk)
+        yield chunk
+
+
+class StreamRequestFailed(RuntimeError):
+    """
+    Raised when a streamed request does not get a 200
+    """
+
+    def __init__(self, method, url, status, content):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.content = content
+        super(StreamRequestFailed, self).__init__(self._error_message)
+
+    @property
+    def _error_message(self):
+        return '{m} {u} failed with status {s}: {c}'.format(
+            m=self.method, u=self.url, s=self.status, c=self.content[:1024])
+
+
+class LoginFailed(RuntimeError):
+    """
+    Raised when logging in is refused
+    """
+
+    def __init__(self, username, status, content):
+        self.username = username
+        self.status = status
+        self.content = content
+        super(LoginFailed, self).__init__(self._error_message)
+
+    @property
+    def _error_message(self):
+        return 'Login of {u} failed with status {s}: {c}'.format(
+            u=self.username, s=self.status, c=self.content)
@@ -0,0 +1,205 @@
+'''
+Module for retrying failed REST calls with backoff.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-07
+'''
+
+import email.utils
+import errno
+import httplib
+import random
+import socket
+import sys
+import time
+
+# Errors on which the request never reached the server.
+_NOT_SENT_ERRNOS = (errno.ECONNREFUSED, errno.EHOSTUNREACH,
+                    errno.ENETUNREACH)
+
+
+class RetryPolicy(object):
+    '''
+    Decides whether and when a failed request is tried again.
+
+    A request is retried when it raised a connection error or got one of the
+    retryable statuses, while tries and time are left. The wait doubles with
+    every try from C{backoff} up to C{max_backoff} and is drawn at random
+    below that ("full jitter"), so many clients that failed together do not
+    come back together. A C{Retry-After} header is honored instead when the
+    server sends one.
+
+    Requests whose method is not idempotent, i.e. POST, are only retried when
+    the server surely did not act on them: the connection was refused or
+    the status is in C{safe_statuses} (by default 429, which is sent before
+    a request is processed). Pass C{methods} to retry POSTs that are known to
+    be safe, such as search and metrics queries.
+
+    The same backoff is available for polling with L{call}.
+
+    >>> conn.retry_policy(RetryPolicy(tries=5, deadline=60))
+    >>> RetryPolicy(deadline=300).call(find_messages, retry_on=(KeyError,))
+
+    @cvar RETRYABLE_STATUSES: The statuses retried by default.
+    @cvar IDEMPOTENT_METHODS: The methods retried on any retryable failure
+                              by default.
+    '''
+
+    RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+    def __init__(self, tries=5, backoff=0.2, max_backoff=30.0, deadline=120.0,
+                 statuses=None, methods=None, safe_statuses=(429,),
+                 jitter=True):
+        '''
+        Creates a new retry policy.
+
+        @param tries: The maximum number of tries, including the first one,
+                      None to only be limited by the deadline.
+        @type tries: int
+        @param backoff: Seconds of the first wait.
+        @type backoff: float
+        @param max_backoff: The longest wait in seconds.
+        @type max_backoff: float
+        @param deadline: Seconds after the first try from which no further
+                         try is started, None for no deadline.
+        @type deadline: float
+        @param statuses: The retryable statuses, defaults to
+                         L{RETRYABLE_STATUSES}.
+        @type statuses: list(int)
+        @param methods: The methods retried on any retryable failure,
+                        defaults to L{IDEMPOTENT_METHODS}.
+        @type methods: list(str)
+        @param safe_statuses: The statuses that are retried for any method.
+        @type safe_statuses: list(int)
+        @param jitter: Whether waits are drawn at random below the backoff.
+        @type jitter: bool
+        '''
+        self.tries = tries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.statuses = frozenset(statuses or self.RETRYABLE_STATUSES)
+        self.methods = frozenset(methods or self.IDEMPOTENT_METHODS)
+        self.safe_statuses = frozenset(safe_statuses)
+        self.jitter = jitter
+
+    def delay(self, attempt, method, elapsed, response=None, error=None):
+        '''
+        Returns the seconds to wait before trying a request again, or None
+        if it must not be tried again.
+
+        @param attempt: The number of the failed try, counting from 0.
+        @type attempt: int
+        @param method: The HTTP method.
+        @type method: str
+        @param elapsed: Seconds since the first try started.
+        @type elapsed: float
+        @param response: The response, None if the request raised.
+        @param error: The exception the request raised.
+        @rtype: float
+        '''
+        if self.tries is not None and attempt + 1 >= self.tries:
+            return None
+        if error is not None:
+            if not self.retryable_error(method, error):
+                return None
+            wait = self.wait(attempt)
+        else:
+            if not self.retryable_status(method, response.status):
+                return None
+            wait = retry_after(response)
+            if wait is None:
+                wait = self.wait(attempt)
+        if self.deadline is not None and elapsed + wait > self.deadline:
+            return None
+        return wait
+
+    def retryable_status(self, method, status):
+        '''
+        Whether a response with this status may be retried.
+
+        @rtype: bool
+        '''
+        if status in self.safe_statuses:
+            return True
+        return status in self.statuses and method in self.methods
+
+    def retryable_error(self, method, error):
+        '''
+        Whether a request that raised this error may be retried.
+
+        @rtype: bool
+        '''
+        if isinstance(error, socket.error) and \
+                error.errno in _NOT_SENT_ERRNOS:
+            return True
+        if method not in self.methods:
+            return False
+        return isinstance(error, (socket.error, httplib.HTTPException))
+
+    def wait(self, attempt):
+        '''
+        Returns the backoff after a failed try.
+
+        @param attempt: The number of the failed try, counting from 0.
+        @type attempt: int
+        @rtype: float
+        '''
+        ceiling = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+    def call(self, function, retry_on=(AssertionError,)):
+        '''
+        Calls a function until it stops raising, waiting with the same
+        backoff in between. Meant for polling until the server shows a
+        result, e.g. until a search finds the newly ingested messages.
+
+        @param function: The function to call, without arguments.
+        @type function: callable
+        @param retry_on: The exceptions to try again on, others propagate
+                         at once.
+        @type retry_on: tuple
+        @return: What the function returned.
+        @raise Exception: What the last try raised when out of tries or time.
+        '''
+        started = time.time()
+        attempt = 0
+        while True:
+            try:
+                return function()
+            except retry_on:
+                exc_info = sys.exc_info()
+                wait = None
+                if self.tries is None or attempt + 1 < self.tries:
+                    wait = self.wait(attempt)
+                    if self.deadline is not None and \
+                            time.time() - started + wait > self.deadline:
+                        wait = None
+                if wait is None:
+                    raise exc_info[0], exc_info[1], exc_info[2]
+            time.sleep(wait)
+            attempt += 1
+
+
+def retry_after(response):
+    '''
+    Returns the seconds of the Retry-After header of a response, given in
+    seconds or as a date, None if there is none.
+
+    @param response: The response.
+    @type response: httplib2.Response
+    @rtype: float
+    '''
+    value = response.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(email.utils.mktime_tz(parsed) - time.time(), 0.0)
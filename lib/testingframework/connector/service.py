@@ -4,6 +4,8 @@
 
 from .base import Connector
 from .rest import RESTConnector
+import Cookie
+import threading
 import urllib
 import httplib2
 import ssl
@@ -14,17 +16,65 @@ from xml.dom.minidom import parseString
 
 
 class ServiceConnector(RESTConnector):
+    """
+    A REST connector for the service API behind the Sumo web app.
 
+    Every service API access needs an apiSession and its cookies, so
+    service API requests are made with use_sessionkey=True, which sends the
+    session of L{service_login}. The session is shared through the session
+    store and renewed when the server refuses it, see
+    L{RESTConnector.login}.
 
-    def __init__(self, sumo, username=None, password=None):
+    The cookies of the login and any the server sets later are kept in a
+    cookie jar and sent with every request, together with the ASID cookie
+    and ApiSession header of the session.
 
-        super(ServiceConnector, self).__init__(sumo, username, password)
+    @ivar _cookies: The cookie jar of the current session
+    @ivar _cookies_session: The id of the session the jar belongs to
+    """
+
+    def __init__(self, sumo, username=None, password=None, app=None,
+                 pool_size=None):
+
+        super(ServiceConnector, self).__init__(sumo, username, password, app,
+                                               pool_size)
         self.update_headers(key='Accept', value='application/json, text/javascript')
         self.update_headers(key='Content-Type', value='application/json')
+        self._cookies = Cookie.SimpleCookie()
+        self._cookies_session = None
+        self._cookies_lock = threading.Lock()
 
     def service_login(self):
         '''
         Seems every API access needs apiSession and cookie, which starts with login
+
+        Reuses the session of an earlier login of the same user, also from
+        other connectors or test workers, instead of logging in again.
+
+        @rtype: str
+        @return: the apiSessionId
         '''
-        pass
-        
+        return self.login()
+
+    def _add_session_headers(self, headers, session):
+        with self._cookies_lock:
+            if self._cookies_session != session['id']:
+                self._cookies = Cookie.SimpleCookie()
+                self._cookies.load(str(session['cookie']))
+                self._cookies_session = session['id']
+            headers['ApiSession'] = str(session['id'])
+            headers['Cookie'] = '; '.join(
+                '%s=%s' % (name, morsel.value)
+                for name, morsel in sorted(self._cookies.items()))
+
+    def _exchange(self, method, url, body, wire_body, headers,
+                  use_sessionkey, stream=None):
+        response, content = super(ServiceConnector, self)._exchange(
+            method, url, body, wire_body, headers, use_sessionkey, stream)
+        set_cookie = response.get('set-cookie')
+        if use_sessionkey and set_cookie and \
+                self._cookies_session is not None and \
+                headers.get('ApiSession') == self._cookies_session:
+            with self._cookies_lock:
+                self._cookies.load(set_cookie)
+        return response, content
@@ -0,0 +1,159 @@
+'''
+Module for sharing API sessions between connectors and test processes.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-05
+'''
+
+import json
+import os
+import threading
+
+from testingframework.util.filelock import FileLock
+
+_DEFAULT_SESSION_STORE = None
+
+
+def default_session_store():
+    '''
+    The store new REST connectors keep their sessions in.
+
+    Unless one was set with L{set_default_session_store} this is an in-memory
+    store shared by the connectors of this process.
+
+    @rtype: L{SessionStore}
+    '''
+    global _DEFAULT_SESSION_STORE
+    if _DEFAULT_SESSION_STORE is None:
+        _DEFAULT_SESSION_STORE = SessionStore()
+    return _DEFAULT_SESSION_STORE
+
+
+def set_default_session_store(store):
+    '''
+    Sets the store new REST connectors keep their sessions in, e.g. a file
+    shared by the pytest-xdist workers.
+
+    @param store: The store, or None for a new in-memory store.
+    @type store: L{SessionStore}
+    '''
+    global _DEFAULT_SESSION_STORE
+    _DEFAULT_SESSION_STORE = store
+
+
+class SessionStore(object):
+    '''
+    The API sessions of a test run, keyed by API url and username.
+
+    Without a path the sessions are only shared by the connectors of this
+    process. With a path they are kept in a JSON file guarded by a
+    L{FileLock<testingframework.util.filelock.FileLock>}, so parallel
+    workers log in once between them: the first one to need a session logs
+    in while holding the lock and the others find its session when they get
+    the lock.
+
+    A session is a dict with the C{id} and C{cookie} of a login.
+
+    @ivar _path: The path of the session file, None to keep them in memory.
+    @ivar _sessions: The sessions by key when kept in memory.
+    '''
+
+    def __init__(self, path=None):
+        '''
+        Creates a new session store.
+
+        @param path: The path of the session file, None to keep the sessions
+                     in memory.
+        @type path: str
+        '''
+        self._path = path
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + '.lock') if path else None
+
+    @property
+    def path(self):
+        '''
+        The path of the session file, None if sessions are kept in memory.
+
+        @rtype: str
+        '''
+        return self._path
+
+    def session(self, key, login, stale=None):
+        '''
+        Returns the session of a key, logging in if there is none yet or the
+        stored one is the stale session a caller was refused with.
+
+        @param key: The key of the session, see L{key}.
+        @type key: str
+        @param login: Called without arguments to log in, returns the new
+                      session.
+        @type login: callable
+        @param stale: The session the server no longer accepts.
+        @type stale: dict
+        @rtype: dict
+        '''
+        with self._lock:
+            if self._file_lock is None:
+                return self._update(self._sessions, key, login, stale)[0]
+            with self._file_lock:
+                sessions = self._read()
+                session, changed = self._update(sessions, key, login, stale)
+                if changed:
+                    self._write(sessions)
+                return session
+
+    def discard(self, key):
+        '''
+        Forgets the session of a key, e.g. after logging out.
+
+        @param key: The key of the session.
+        @type key: str
+        '''
+        with self._lock:
+            if self._file_lock is None:
+                self._sessions.pop(key, None)
+                return
+            with self._file_lock:
+                sessions = self._read()
+                if sessions.pop(key, None) is not None:
+                    self._write(sessions)
+
+    @staticmethod
+    def key(url, username):
+        '''
+        The key of the session of a user on a deployment.
+
+        @rtype: str
+        '''
+        return '{u} {n}'.format(u=url, n=username)
+
+    def _update(self, sessions, key, login, stale):
+        session = sessions.get(key)
+        if session is not None and (stale is None or
+                                    session.get('id') != stale.get('id')):
+            return session, False
+        session = sessions[key] = login()
+        return session, True
+
+    def _read(self):
+        if not os.path.exists(self._path):
+            return {}
+        with open(self._path) as session_file:
+            try:
+                return json.load(session_file)
+            except ValueError:
+                return {}
+
+    def _write(self, sessions):
+        temp_path = self._path + '.tmp'
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+        with os.fdopen(fd, 'w') as session_file:
+            json.dump(sessions, session_file)
+        if os.name == 'nt' and os.path.exists(self._path):
+            # rename does not replace an existing file on Windows; readers
+            # hold the file lock too, so none sees the file missing
+            os.remove(self._path)
+        os.rename(temp_path, self._path)
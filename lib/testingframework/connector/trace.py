@@ -0,0 +1,137 @@
+'''
+Module for keeping a bounded trace of recent REST exchanges.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-01
+'''
+
+import datetime
+import hashlib
+import json
+import threading
+from collections import deque
+
+# Headers whose values are never written to a trace.
+REDACTED_HEADERS = ['authorization', 'cookie', 'set-cookie', 'apisession']
+
+
+class TraceRecorder(object):
+    '''
+    A ring buffer of the most recent request/response exchanges.
+
+    Only the first C{max_body} bytes of request bodies and response contents
+    are kept, together with their full size and SHA-1 so an exchange can
+    still be matched against a full capture. Nothing is formatted until
+    L{dump} is called, which writes the buffer as a HAR-like JSON file, e.g.
+    when a test fails.
+
+    @ivar _entries: The recorded exchanges, oldest first.
+    @ivar _max_body: The number of body bytes kept per exchange.
+    '''
+
+    def __init__(self, capacity=200, max_body=2048):
+        '''
+        Creates a new trace recorder.
+
+        @param capacity: The number of exchanges kept.
+        @type capacity: int
+        @param max_body: The number of body bytes kept per exchange.
+        @type max_body: int
+        '''
+        self._entries = deque(maxlen=capacity)
+        self._max_body = max_body
+        self._lock = threading.Lock()
+
+    def record(self, method, url, headers, body, response, content, seconds):
+        '''
+        Records one exchange.
+
+        @param method: The HTTP method.
+        @param url: The requested url.
+        @param headers: The request headers.
+        @param body: The request body.
+        @param response: The response, None if the request raised.
+        @param content: The response content.
+        @param seconds: The wall time of the request.
+        '''
+        entry = (datetime.datetime.utcnow(), seconds, method, url,
+                 dict(headers), self._clip(body),
+                 dict(response) if response is not None else None,
+                 response.status if response is not None else None,
+                 self._clip(content))
+        with self._lock:
+            self._entries.append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        '''
+        Drops all recorded exchanges.
+        '''
+        with self._lock:
+            self._entries.clear()
+
+    def dump(self, path, comment=None):
+        '''
+        Writes the recorded exchanges to a HAR-like JSON file.
+
+        @param path: The path of the file.
+        @type path: str
+        @param comment: A comment for the log, e.g. the failed test.
+        @type comment: str
+        '''
+        with self._lock:
+            entries = list(self._entries)
+        document = {'log': {
+            'version': '1.2',
+            'creator': {'name': 'testingframework', 'version': '1.0'},
+            'comment': comment or '',
+            'entries': [_har_entry(entry) for entry in entries]}}
+        with open(path, 'w') as trace_file:
+            json.dump(document, trace_file, indent=2)
+
+    def _clip(self, data):
+        '''
+        Returns the kept prefix, full size and SHA-1 of a body.
+        '''
+        data = data or ''
+        if isinstance(data, unicode):
+            data = data.encode('utf-8')
+        return data[:self._max_body], len(data), hashlib.sha1(data).hexdigest()
+
+
+def _har_entry(entry):
+    started, seconds, method, url, headers, body, response, status, \
+        content = entry
+    return {
+        'startedDateTime': started.isoformat() + 'Z',
+        'time': int(seconds * 1000),
+        'request': {
+            'method': method,
+            'url': url,
+            'headers': _har_headers(headers),
+            'postData': _har_body(body),
+        },
+        'response': {
+            'status': status,
+            'headers': _har_headers(response or {}),
+            'content': _har_body(content),
+        },
+    }
+
+
+def _har_headers(headers):
+    return [{'name': name, 'value': '<redacted>'
+             if name.lower() in REDACTED_HEADERS else str(value)}
+            for name, value in sorted(headers.items())]
+
+
+def _har_body(body):
+    text, size, sha1 = body
+    return {'text': text.decode('utf-8', 'replace'), 'size': size,
+            'sha1': sha1, 'truncated': len(text) < size}
+
+
+TRACE_RECORDER = TraceRecorder()
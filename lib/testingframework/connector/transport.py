@@ -0,0 +1,165 @@
+'''
+Module for pooling the HTTP transport used by the REST connectors.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-14
+'''
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class HTTPConnectionPool(object):
+    '''
+    A pool of C{httplib2.Http} objects.
+
+    C{httplib2.Http} is not thread safe, so a single one cannot be shared
+    between threads. Each Http object keeps its own keep-alive connection per
+    host though, so handing out one Http object per request gives us several
+    keep-alive connections per host without any locking around the request.
+
+    Http objects are created lazily, at most C{size} of them. When all of them
+    are in use L{connection} blocks until one is returned.
+
+    @ivar _factory: Function that creates a new, configured Http object.
+    @ivar _size: The maximum number of Http objects in the pool.
+    @ivar _idle: The Http objects not currently in use, the most recently
+                 returned last.
+    @ivar _created: The number of Http objects created for this generation.
+    @ivar _generation: Bumped by L{clear} so that Http objects handed out
+                       before the clear are closed instead of returned.
+    '''
+
+    def __init__(self, factory, size=1):
+        '''
+        Creates a new pool.
+
+        @param factory: Function with no arguments that returns a new Http
+                        object.
+        @type factory: function
+        @param size: The maximum number of Http objects in the pool.
+        @type size: int
+        '''
+        if size < 1:
+            raise ValueError('Pool size must be at least 1')
+        self._factory = factory
+        self._size = size
+        self._idle = []
+        self._created = 0
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        '''
+        The maximum number of Http objects in this pool.
+
+        @rtype: int
+        '''
+        return self._size
+
+    @contextmanager
+    def connection(self, timeout=None):
+        '''
+        Borrows an Http object from the pool for the duration of the block.
+
+        If the block raises, or is left early like a generator that is closed
+        half way, the Http object is closed and dropped since its connection
+        may be in an unknown state.
+
+        >>> with pool.connection() as http:
+        ...     response, content = http.request(url, 'GET')
+
+        @param timeout: Seconds to wait for a free Http object, None means
+                        forever.
+        @type timeout: int
+        @raise PoolTimeout: If no Http object became free in time.
+        '''
+        http, generation = self._acquire(timeout)
+        try:
+            yield http
+        except BaseException:
+            self._discard(http, generation)
+            raise
+        self._release(http, generation)
+
+    def clear(self):
+        '''
+        Closes all idle Http objects and makes sure the ones in use are closed
+        when they are returned.
+
+        Used when the connector settings change or Sumo is restarted. Threads
+        waiting for a free Http object are woken up since the pool has room
+        for new ones again.
+        '''
+        with self._condition:
+            self._generation += 1
+            self._created = 0
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for http in idle:
+            _close(http)
+
+    def _acquire(self, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                generation = self._generation
+                if self._idle:
+                    return self._idle.pop(), generation
+                if self._created < self._size:
+                    self._created += 1
+                    break
+                if deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise PoolTimeout(timeout)
+                self._condition.wait(remaining)
+        try:
+            return self._factory(), generation
+        except Exception:
+            self._discard(None, generation)
+            raise
+
+    def _release(self, http, generation):
+        with self._condition:
+            if generation == self._generation:
+                self._idle.append(http)
+                self._condition.notify()
+                return
+        _close(http)
+
+    def _discard(self, http, generation):
+        if http is not None:
+            _close(http)
+        with self._condition:
+            if generation == self._generation:
+                self._created -= 1
+                self._condition.notify()
+
+
+def _close(http):
+    '''
+    Closes all the connections an Http object holds on to.
+    '''
+    for connection in http.connections.values():
+        connection.close()
+    http.connections.clear()
+
+
+class PoolTimeout(RuntimeError):
+    '''
+    Raised when no connection became free in the pool in time.
+    '''
+    def __init__(self, seconds_waited):
+        self.seconds_waited = seconds_waited
+        super(PoolTimeout, self).__init__(self._error_message)
+
+    @property
+    def _error_message(self):
+        message = 'No connection was free in the pool after {0} seconds'
+        return message.format(self.seconds_waited)
@@ -0,0 +1,15 @@
+'''
+Module for putting sustained, measurable load on a Sumo deployment.
+
+Run it with C{python -m testingframework.load --help}.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-27
+'''
+
+__all__ = ['dashboard', 'runner', 'scenario']
+
+from .dashboard import DashboardLoader, format_dashboard_report
+from .runner import LoadRunner, format_report
+from .scenario import Scenario, ScenarioRequest
@@ -0,0 +1,90 @@
+'''
+Command line entry point of the load runner.
+
+    python -m testingframework.load --url https://nite-api.sumologic.net/api/v1/
+        --username ACCESSID --password ACCESSKEY
+        --scenario data/load/json/metrics_scenario.json
+        --users 10 --rate 20 --duration 60
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-27
+'''
+
+import argparse
+import json
+import logging
+import sys
+
+from testingframework.load import LoadRunner, Scenario, format_report
+from testingframework.sumo.aws import AWSSumo
+from testingframework.sumo.standin import StandInSumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m testingframework.load',
+        description='Drives virtual users through a scenario against a Sumo '
+                    'deployment and reports throughput and latency per '
+                    'endpoint.')
+    parser.add_argument('--url', help='the Sumo API url, e.g. '
+                        'https://nite-api.sumologic.net/api/v1/')
+    parser.add_argument('--standin', action='store_true',
+                        help='run against an in-process stand-in instead '
+                             'of --url')
+    parser.add_argument('--username', default='', help='username or access id')
+    parser.add_argument('--password', default='',
+                        help='password or access key')
+    parser.add_argument('--scenario', required=True,
+                        help='the scenario file')
+    parser.add_argument('--users', type=int, default=1,
+                        help='the number of virtual users')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='arrivals per second, default is a closed loop')
+    parser.add_argument('--poisson', action='store_true',
+                        help='random instead of evenly spaced arrivals')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='seconds between requests in a closed loop')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='seconds to run for')
+    parser.add_argument('--requests', type=int, default=None,
+                        help='the total number of requests to send')
+    parser.add_argument('--report', default=None,
+                        help='also write the report as JSON to this file')
+    parser.add_argument('--debug', action='store_true',
+                        help='log at DEBUG level')
+    args = parser.parse_args(argv)
+    if not args.url and not args.standin:
+        parser.error('one of --url or --standin is required')
+    if args.duration is None and args.requests is None:
+        parser.error('one of --duration or --requests is required')
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARN)
+    standin = None
+    url = args.url
+    if args.standin:
+        standin = StandInSumo()
+        standin.start()
+        url = standin.url
+    try:
+        sumo = AWSSumo(url)
+        connector = sumo.create_connector(username=args.username,
+                                          password=args.password,
+                                          pool_size=args.users)
+        runner = LoadRunner(connector, Scenario.load(args.scenario), url,
+                            users=args.users, rate=args.rate,
+                            poisson=args.poisson, think_time=args.think_time)
+        report = runner.run(duration=args.duration, requests=args.requests)
+    finally:
+        if standin is not None:
+            standin.stop()
+
+    print format_report(report)
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=4, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
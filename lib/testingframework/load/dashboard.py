@@ -0,0 +1,236 @@
+'''
+Module for loading whole dashboards through the service API and measuring
+how long they take to render.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-14
+'''
+
+import json
+import time
+
+from testingframework.log import Logging
+from testingframework.util.concurrency import WorkerPool, gather
+from testingframework.util.stats import summarize
+
+# Panel states that mean the panel query is still running.
+IN_PROGRESS_STATES = ['InProgress', 'Pending', 'NotStarted', 'Running',
+                      'GATHERING RESULTS']
+# Panel states that mean the panel query is done, any other state is an error.
+DONE_STATES = ['Done', 'Completed', 'DONE GATHERING RESULTS']
+DEFAULT_TIME_RANGE_MS = -900000
+
+
+class DashboardLoader(Logging):
+    '''
+    Loads every panel of a dashboard (a report) the way the web app does.
+
+    The report is read from C{reports/{id}}, one C{sessionids} request
+    starts the queries of all its panels at once and then the
+    C{sessionidsV2?sid=} handles of all panels are polled together, each
+    round sending the polls of every pending panel concurrently, until all
+    panels are done. A panel in a state that is neither running nor done,
+    or in no state at all, is not polled again and counts as failed. Every
+    panel is timed from the start of the load to
+    the poll that found it done, which gives the time to the first and to
+    the last panel.
+
+    >>> loader = DashboardLoader(conn, api_url)
+    >>> report = loader.load(report_id)
+    >>> report['time_to_first_panel'], report['time_to_all_panels']
+
+    @ivar _connector: The connector requests are sent with.
+    @ivar _api_url: The Sumo API url the report uris are relative to.
+    '''
+
+    def __init__(self, connector, api_url, max_in_flight=None,
+                 poll_interval=0.5, timeout=300, time_zone='UTC'):
+        '''
+        Creates a new dashboard loader.
+
+        @param connector: The logged in connector to use, its connection
+                          pool should be as large as max_in_flight.
+        @type connector: L{ServiceConnector<testingframework.connector.service.ServiceConnector>}
+        @param api_url: The Sumo API url, including the scheme unless it is
+                        the connector's default.
+        @type api_url: str
+        @param max_in_flight: The most polls running at once, defaults to the
+                              connector's connection pool size.
+        @type max_in_flight: int
+        @param poll_interval: Seconds between polls of a pending panel.
+        @type poll_interval: float
+        @param timeout: Seconds after which panels still pending are given
+                        up on.
+        @type timeout: float
+        @param time_zone: The time zone the panels are queried in.
+        @type time_zone: str
+        '''
+        Logging.__init__(self)
+        self._connector = connector
+        self._api_url = api_url
+        self._max_in_flight = max_in_flight or connector.pool_size
+        self._poll_interval = poll_interval
+        self._timeout = timeout
+        self._time_zone = time_zone
+
+    def load(self, report_id, time_range_ms=DEFAULT_TIME_RANGE_MS,
+             query=None):
+        '''
+        Loads all panels of a report.
+
+        @param report_id: The id of the report.
+        @param time_range_ms: The relative time range of the panels.
+        @type time_range_ms: int
+        @param query: The metrics query of every panel, None to use the
+                      panels' own queries.
+        @type query: str
+        @return: The done C{panels} by id, each with its C{seconds} and last
+                 C{result}, the C{failed} panels by id, each with its
+                 C{seconds}, last C{result} and C{error}, the ids of
+                 C{pending} panels that did not finish in time,
+                 C{time_to_first_panel}, C{time_to_all_panels} (None if
+                 panels failed or are pending) and the latency C{summary} of
+                 the done panels.
+        @rtype: dict
+        '''
+        started = time.time()
+        report_uri = '%sreports/%s' % (self._api_url, report_id)
+        report = self._request('GET', report_uri)
+        panels = report.get('panels', [])
+        self.logger.info('Loading {n} panels of report {r}'.format(
+            n=len(panels), r=report_id))
+        sessions = self._request(
+            'POST', report_uri + '/sessionids',
+            json.dumps(self._session_body(panels, time_range_ms, query)))
+        handles = dict((str(panel['id']),
+                        str(sessions['results'][str(panel['id'])]
+                            ['searchQueryId'])) for panel in panels)
+        done, failed = self._poll(report_uri, handles, started)
+        seconds = [panel['seconds'] for panel in done.values()]
+        pending = sorted(set(handles) - set(done) - set(failed))
+        return {
+            'panels': done,
+            'failed': failed,
+            'pending': pending,
+            'time_to_first_panel': min(seconds) if seconds else None,
+            'time_to_all_panels': max(seconds)
+            if seconds and not pending and not failed else None,
+            'summary': summarize(seconds),
+        }
+
+    def _poll(self, report_uri, handles, started):
+        '''
+        Polls the handles of all panels until they are done or failed, or
+        the timeout has passed.
+
+        @return: The seconds and result of every done panel by id and the
+                 seconds, result and error of every failed panel by id.
+        @rtype: tuple
+        '''
+        done = {}
+        failed = {}
+        deadline = started + self._timeout
+        workers = WorkerPool(min(self._max_in_flight, len(handles) or 1),
+                             name=self.__class__.__name__)
+        try:
+            while len(done) + len(failed) < len(handles) and \
+                    time.time() < deadline:
+                round_started = time.time()
+                pending = [panel_id for panel_id in handles
+                           if panel_id not in done and panel_id not in failed]
+                futures = [workers.submit(self._poll_panel, report_uri,
+                                          handles[panel_id])
+                           for panel_id in pending]
+                for panel_id, (state, result, at) in \
+                        zip(pending, gather(futures)):
+                    if state in DONE_STATES:
+                        done[panel_id] = {'seconds': at - started,
+                                          'result': result}
+                    elif state not in IN_PROGRESS_STATES:
+                        error = 'Unexpected panel state {s!r}'.format(
+                            s=state)
+                        self.logger.warn('Panel {p}: {e}'.format(
+                            p=panel_id, e=error))
+                        failed[panel_id] = {'seconds': at - started,
+                                            'result': result, 'error': error}
+                if len(done) + len(failed) < len(handles):
+                    time.sleep(max(self._poll_interval -
+                                   (time.time() - round_started), 0))
+        finally:
+            workers.shutdown(wait=True)
+        return done, failed
+
+    def _poll_panel(self, report_uri, handle):
+        '''
+        Polls one panel.
+
+        @return: The state of the panel, None if the poll had none, the
+                 result and when it was received.
+        @rtype: tuple
+        '''
+        result = self._request('GET', '%s/sessionidsV2' % report_uri,
+                               urlparam={'sid': handle})
+        state = result.get('state', result.get('status'))
+        return state, result, time.time()
+
+    def _session_body(self, panels, time_range_ms, query):
+        time_range = json.dumps([{'t': 'relative', 'd': time_range_ms}],
+                                separators=(',', ':'))
+        tuples = []
+        for panel in panels:
+            queries = panel.get('metricsQueries') or []
+            if query is not None or not queries:
+                queries = [{'rowId': 'A', 'query': query or ''}]
+            tuples.append({'id': str(panel['id']), 'timeRange': time_range,
+                           'metricsQueries': queries, 'queryString': ''})
+        return {'aggregateKeyFilters': {}, 'panelTimerangeTuples': tuples,
+                'timeZone': self._time_zone}
+
+    def _request(self, method, uri, body=None, urlparam=None):
+        response, content = self._connector.make_request(
+            method, uri, body, urlparam, use_sessionkey=True)
+        if response.status != 200:
+            raise DashboardRequestFailed(method, uri, response.status,
+                                         content)
+        return self._connector.parse_content_json(content)
+
+
+def format_dashboard_report(report):
+    '''
+    Formats a report of L{DashboardLoader.load} as a few lines.
+
+    @param report: The report.
+    @type report: dict
+    @rtype: str
+    '''
+    def seconds(value):
+        return '-' if value is None else '%.3fs' % value
+    summary = report['summary']
+    return '\n'.join([
+        'panels:              %d done, %d failed, %d pending' % (
+            len(report['panels']), len(report['failed']),
+            len(report['pending'])),
+        'time to first panel: %s' % seconds(report['time_to_first_panel']),
+        'time to all panels:  %s' % seconds(report['time_to_all_panels']),
+        'panel p50/p90:       %s / %s' % (seconds(summary['p50']),
+                                          seconds(summary['p90'])),
+    ])
+
+
+class DashboardRequestFailed(RuntimeError):
+    '''
+    Raised when a request of a dashboard load does not get a 200.
+    '''
+
+    def __init__(self, method, uri, status, content):
+        self.method = method
+        self.uri = uri
+        self.status = status
+        self.content = content
+        super(DashboardRequestFailed, self).__init__(self._error_message)
+
+    @property
+    def _error_message(self):
+        return '{m} {u} failed with status {s}: {c}'.format(
+            m=self.method, u=self.uri, s=self.status, c=self.content[:1024])
@@ -0,0 +1,213 @@
+'''
+Module for driving virtual users through a REST connector.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-27
+'''
+
+import random
+import threading
+import time
+
+from testingframework.log import Logging
+from testingframework.util.stats import summarize
+
+
+class LoadRunner(Logging):
+    '''
+    Drives a number of virtual users through a scenario.
+
+    Every virtual user is a thread that repeatedly picks a request from the
+    scenario and sends it with the shared connector, which is thread safe
+    and should have a connection pool as large as the number of users.
+
+    Without an arrival rate the users run closed loop: each sends its next
+    request C{think_time} seconds after the previous one finished. With an
+    arrival rate requests are started on a shared schedule of C{rate}
+    requests per second, at constant intervals or, with C{poisson}, at
+    exponentially distributed ones; a user that is still busy when its turn
+    comes simply starts late, which shows up as latency.
+
+    @ivar _connector: The connector requests are sent with.
+    @ivar _scenario: The scenario requests are picked from.
+    @ivar _api_url: The Sumo API url scenario uris are relative to.
+    @ivar _samples: The (name, start, seconds, status) of every request.
+    '''
+
+    def __init__(self, connector, scenario, api_url, users=1, rate=None,
+                 poisson=False, think_time=0.0):
+        '''
+        Creates a new load runner.
+
+        @param connector: The connector to send the requests with.
+        @type connector: L{RESTConnector}
+        @param scenario: The scenario to pick requests from.
+        @type scenario: L{Scenario<testingframework.load.scenario.Scenario>}
+        @param api_url: The Sumo API url scenario uris are relative to.
+        @type api_url: str
+        @param users: The number of virtual users.
+        @type users: int
+        @param rate: The arrival rate in requests per second, None for a
+                     closed loop.
+        @type rate: float
+        @param poisson: Whether arrivals are random rather than evenly spaced
+        @type poisson: bool
+        @param think_time: Seconds a user waits between requests in a closed
+                           loop.
+        @type think_time: float
+        '''
+        Logging.__init__(self)
+        self._connector = connector
+        self._scenario = scenario
+        self._api_url = api_url
+        self._users = users
+        self._rate = rate
+        self._poisson = poisson
+        self._think_time = think_time
+        self._samples = []
+        self._lock = threading.Lock()
+        self._next_arrival = None
+        self._deadline = None
+        self._remaining = None
+
+    def run(self, duration=None, requests=None):
+        '''
+        Runs the load until the duration has passed or the number of requests
+        has been sent, whichever comes first.
+
+        @param duration: Seconds to run for.
+        @type duration: float
+        @param requests: The total number of requests to send.
+        @type requests: int
+        @return: The report, see L{report}.
+        @rtype: dict
+        '''
+        if duration is None and requests is None:
+            raise ValueError('Either duration or requests must be given')
+        self._samples = []
+        started = time.time()
+        self._deadline = started + duration if duration else None
+        self._remaining = requests
+        self._next_arrival = started
+        self.logger.info('Starting {u} virtual users on {s}'.format(
+            u=self._users, s=self._scenario.name))
+        users = [threading.Thread(target=self._user, args=(index,),
+                                  name='VirtualUser-{i}'.format(i=index))
+                 for index in range(self._users)]
+        for user in users:
+            user.daemon = True
+            user.start()
+        for user in users:
+            while user.is_alive():
+                user.join(1)
+        return self.report(time.time() - started)
+
+    def report(self, elapsed):
+        '''
+        Summarizes the samples of the last run per request name.
+
+        @param elapsed: The wall time of the run in seconds.
+        @type elapsed: float
+        @return: The report with an entry per request name and a C{total}
+                 entry, each with the count, errors, throughput in requests
+                 per second and latency percentiles in seconds.
+        @rtype: dict
+        '''
+        by_name = {}
+        for name, _, seconds, status in self._samples:
+            by_name.setdefault(name, []).append((seconds, status))
+            by_name.setdefault('total', []).append((seconds, status))
+        report = {}
+        for name, samples in by_name.items():
+            entry = summarize([seconds for seconds, _ in samples])
+            entry['errors'] = len([status for _, status in samples
+                                   if status is None or status >= 400])
+            entry['throughput'] = len(samples) / elapsed if elapsed else None
+            report[name] = entry
+        return report
+
+    def _user(self, index):
+        rand = random.Random()
+        while True:
+            if not self._claim():
+                return
+            if self._rate:
+                delay = self._schedule(rand) - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            if self._deadline is not None and time.time() >= self._deadline:
+                return
+            self._send(self._scenario.pick(rand))
+            if not self._rate and self._think_time:
+                time.sleep(self._think_time)
+
+    def _claim(self):
+        '''
+        Claims one of the remaining requests, False when none are left.
+        '''
+        with self._lock:
+            if self._deadline is not None and time.time() >= self._deadline:
+                return False
+            if self._remaining is None:
+                return True
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            return True
+
+    def _schedule(self, rand):
+        '''
+        Returns the start time of the next arrival.
+        '''
+        with self._lock:
+            arrival = self._next_arrival
+            if self._poisson:
+                self._next_arrival += rand.expovariate(self._rate)
+            else:
+                self._next_arrival += 1.0 / self._rate
+            return arrival
+
+    def _send(self, request):
+        method, uri, body, urlparam = request.render(self._api_url)
+        started = time.time()
+        try:
+            response, _ = self._connector.make_request(method, uri, body,
+                                                       urlparam)
+            status = response.status
+        except Exception, err:
+            self.logger.warn('{n} failed: {e}'.format(n=request.name, e=err))
+            status = None
+        seconds = time.time() - started
+        with self._lock:
+            self._samples.append((request.name, started, seconds, status))
+
+
+def format_report(report):
+    '''
+    Formats a report of L{LoadRunner.run} as a table.
+
+    @param report: The report.
+    @type report: dict
+    @rtype: str
+    '''
+    columns = ['count', 'errors', 'throughput', 'mean', 'p50', 'p90', 'p95',
+               'p99', 'max']
+    names = sorted(name for name in report if name != 'total')
+    if 'total' in report:
+        names.append('total')
+    width = max([len(name) for name in names] + [8])
+    lines = ['{0:<{w}}'.format('endpoint', w=width) +
+             ''.join('{0:>11}'.format(column) for column in columns)]
+    for name in names:
+        cells = []
+        for column in columns:
+            value = report[name][column]
+            if value is None:
+                cells.append('{0:>11}'.format('-'))
+            elif isinstance(value, float):
+                cells.append('{0:>11.3f}'.format(value))
+            else:
+                cells.append('{0:>11}'.format(value))
+        lines.append('{0:<{w}}'.format(name, w=width) + ''.join(cells))
+    return '\n'.join(lines)
@@ -0,0 +1,187 @@
+'''
+Module for reading load scenario files.
+
+A scenario is a JSON file listing the requests a virtual user picks from::
+
+    {
+        "name": "metrics",
+        "requests": [
+            {
+                "name": "autocomplete",
+                "method": "POST",
+                "uri": "metrics/suggest/autocomplete",
+                "body_file": "data/metrics/json/metrics_autocomplete.json",
+                "body_args": ["{seq}", "_source=weimin_cloud_watch", 26,
+                              "{start_ms}", "{end_ms}", 1],
+                "weight": 3
+            }
+        ]
+    }
+
+C{uri} is relative to the Sumo API url. C{body_file} is relative to the
+scenario file and is filled in with C{body_args} using C{%} formatting, the
+same way the tests fill in the files in C{data}. String arguments may use
+these placeholders:
+  - C{{now_ms}}, C{{end_ms}}: the current time in milliseconds
+  - C{{start_ms}}: C{window_ms} (default 15 minutes) before that
+  - C{{now_iso}}, C{{start_iso}}: the same as ISO 8601 strings
+  - C{{seq}}: a number unique to the request
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-27
+'''
+
+import datetime
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+DEFAULT_WINDOW_MS = 15 * 60 * 1000
+
+
+class Scenario(object):
+    '''
+    A weighted set of requests to send.
+
+    @ivar name: The name of the scenario.
+    @ivar requests: The requests of the scenario.
+    @type requests: list(L{ScenarioRequest})
+    '''
+
+    def __init__(self, name, requests):
+        if not requests:
+            raise ValueError('A scenario needs at least one request')
+        self.name = name
+        self.requests = requests
+        self._weights = _accumulate([each.weight for each in requests])
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Reads a scenario file.
+
+        @param path: The path of the scenario file.
+        @type path: str
+        @rtype: L{Scenario}
+        '''
+        with open(path) as scenario_file:
+            document = json.load(scenario_file)
+        directory = os.path.dirname(os.path.abspath(path))
+        requests = [ScenarioRequest.from_dict(each, directory)
+                    for each in document['requests']]
+        return cls(document.get('name', os.path.basename(path)), requests)
+
+    def pick(self, rand=random):
+        '''
+        Picks a request at random according to the weights.
+
+        @rtype: L{ScenarioRequest}
+        '''
+        point = rand.uniform(0, self._weights[-1])
+        for request, weight in zip(self.requests, self._weights):
+            if point <= weight:
+                return request
+        return self.requests[-1]
+
+
+class ScenarioRequest(object):
+    '''
+    A request template of a scenario.
+
+    @ivar name: The name the request is reported under.
+    @ivar method: The HTTP method.
+    @ivar uri: The uri relative to the Sumo API url.
+    @ivar body: The body template, None for no body.
+    @ivar body_args: The arguments for the body template.
+    @ivar urlparam: The url parameters.
+    @ivar weight: How often the request is picked relative to the others.
+    @ivar window_ms: The time window for the {start_ms} placeholder.
+    '''
+
+    _sequence = itertools.count(1)
+    _sequence_lock = threading.Lock()
+
+    def __init__(self, name, method, uri, body=None, body_args=None,
+                 urlparam=None, weight=1, window_ms=DEFAULT_WINDOW_MS):
+        self.name = name
+        self.method = method
+        self.uri = uri
+        self.body = body
+        self.body_args = body_args or []
+        self.urlparam = urlparam
+        self.weight = weight
+        self.window_ms = window_ms
+
+    @classmethod
+    def from_dict(cls, document, directory):
+        '''
+        Creates a request from its entry in a scenario file.
+
+        @param document: The entry.
+        @type document: dict
+        @param directory: The directory body files are relative to.
+        @type directory: str
+        @rtype: L{ScenarioRequest}
+        '''
+        body = document.get('body')
+        if 'body_file' in document:
+            with open(os.path.join(directory, document['body_file'])) as f:
+                body = f.read().replace('\n', ' ')
+        return cls(name=str(document.get('name', document['uri'])),
+                   method=str(document.get('method', 'GET')),
+                   uri=str(document['uri']), body=body,
+                   body_args=document.get('body_args'),
+                   urlparam=document.get('urlparam'),
+                   weight=document.get('weight', 1),
+                   window_ms=document.get('window_ms', DEFAULT_WINDOW_MS))
+
+    def render(self, api_url):
+        '''
+        Fills in the template for one request.
+
+        @param api_url: The Sumo API url the uri is relative to.
+        @type api_url: str
+        @return: The arguments for C{RESTConnector.make_request}.
+        @rtype: tuple
+        '''
+        with self._sequence_lock:
+            sequence = next(self._sequence)
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - self.window_ms
+        context = {'now_ms': now_ms, 'end_ms': now_ms, 'start_ms': start_ms,
+                   'now_iso': _iso(now_ms), 'start_iso': _iso(start_ms),
+                   'seq': sequence}
+        body = self.body
+        if body is not None and self.body_args:
+            body = body % tuple(_fill(arg, context)
+                                for arg in self.body_args)
+        if isinstance(body, unicode):
+            body = body.encode('utf-8')
+        return self.method, api_url + self.uri, body, self.urlparam
+
+
+def _fill(arg, context):
+    '''
+    Fills the placeholders of a string body argument.
+    '''
+    if not isinstance(arg, basestring):
+        return arg
+    return arg.format(**context)
+
+
+def _iso(milliseconds):
+    return datetime.datetime.fromtimestamp(milliseconds / 1000) \
+        .replace(microsecond=0).isoformat()
+
+
+def _accumulate(values):
+    total = 0
+    result = []
+    for value in values:
+        total += value
+        result.append(total)
+    return result
@@ -41,3 +41,16 @@ class JobNotFound(RuntimeError):
     @property
     def _error_message(self):
         return 'Could not find a job with SID {sid}'.format(sid=self.sid)
+
+
+from testingframework.connector.rest import RESTConnector
+from testingframework.connector.service import ServiceConnector
+from testingframework.connector.asyncrest import AsyncRESTConnector
+from .restwrapper import RESTJobsWrapper
+
+_CONNECTOR_TO_WRAPPER_MAPPINGS = {RESTConnector: RESTJobsWrapper,
+                                  ServiceConnector: RESTJobsWrapper,
+                                  AsyncRESTConnector: RESTJobsWrapper}
+
+from .group import JobGroup
+from .scheduler import JobScheduler
@@ -0,0 +1,216 @@
+'''
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-22
+'''
+import Queue
+import threading
+import time
+
+from testingframework.log import Logging
+from testingframework.exceptions.wait import WaitTimedOut
+from testingframework.manager.jobs.poller import default_job_poller
+
+
+class JobGroup(Logging):
+    '''
+    A batch of jobs that are waited for together.
+
+    Every job is handed to the L{JobPoller} when it is added, so all jobs of
+    the group are polled on the poller's adaptive schedule while the caller
+    waits for all of them, for any of them or for each one as it finishes.
+    Every wait is bounded by the group deadline as well as by its own
+    timeout.
+
+    >>> group = JobGroup([jobs.create(query) for query in queries],
+    ...                  timeout=600)
+    >>> for job in group.as_completed():
+    ...     counts[job.sid] = job.get_event_count()
+
+    @ivar _jobs: The jobs in the order they were added.
+    @ivar _futures: The future of every job from the poller.
+    @ivar _watching: The jobs the group holds a watch of the poller for.
+    @ivar _listeners: The queues of the running L{as_completed} calls, every
+                      job that finishes is put on each of them.
+    @ivar _deadline: The time after which waits time out, None for never.
+    @ivar _poller: The poller the jobs are watched by.
+    '''
+
+    def __init__(self, jobs=None, timeout=None, poller=None):
+        '''
+        Creates a new group.
+
+        @param jobs: The jobs to start with.
+        @type jobs: list(L{Job<testingframework.manager.jobs.job.Job>})
+        @param timeout: Seconds from now after which every wait of the group
+                        times out, None for no group deadline.
+        @type timeout: float
+        @param poller: The poller, by default the shared one.
+        @type poller: L{JobPoller}
+        '''
+        Logging.__init__(self)
+        self._jobs = []
+        self._futures = {}
+        self._watching = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._deadline = None if timeout is None else time.time() + timeout
+        self._poller = poller or default_job_poller()
+        for job in jobs or []:
+            self.add(job)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __iter__(self):
+        return iter(list(self._jobs))
+
+    def add(self, job):
+        '''
+        Adds a job and starts polling it. The time it takes the job to finish
+        from now on is its C{wait_time_cost}.
+
+        @param job: The job.
+        @type job: L{Job<testingframework.manager.jobs.job.Job>}
+        '''
+        if job in self._futures:
+            return
+        job.start_time = time.time()
+        job.finish_wait_time = None
+        self._jobs.append(job)
+        self._watch(job)
+
+    def _watch(self, job):
+        '''
+        Makes sure the group holds a watch of a pending job, again after a
+        wait that timed out gave it up.
+        '''
+        if job in self._watching:
+            return
+        self._watching.add(job)
+        future = self._poller.watch(job)
+        if future is not self._futures.get(job):
+            self._futures[job] = future
+            future.add_done_callback(
+                lambda future: self._finished(job, future))
+
+    def _unwatch(self, job):
+        '''
+        Gives up the group's watch of a pending job, other waiters of the job
+        keep it polled.
+        '''
+        if job in self._watching:
+            self._watching.discard(job)
+            self._poller.unwatch(job)
+
+    def _finished(self, job, future):
+        '''
+        The one done callback of the future of a job, passes the job on to
+        the running L{as_completed} calls.
+        '''
+        if future is not self._futures.get(job):
+            return
+        job.finish_wait_time = time.time()
+        self._watching.discard(job)
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener.put((job, future))
+
+    @property
+    def pending(self):
+        '''
+        The jobs that are not done yet.
+
+        @rtype: list(L{Job<testingframework.manager.jobs.job.Job>})
+        '''
+        return [job for job in self._jobs if not self._futures[job].done()]
+
+    def wait_all(self, timeout=None):
+        '''
+        Waits for all jobs to finish.
+
+        @param timeout: The maximum time to wait in seconds, None means until
+                        the group deadline.
+        @type timeout: float
+        @return: The jobs in the order they were added.
+        @rtype: list(L{Job<testingframework.manager.jobs.job.Job>})
+        @raise WaitTimedOut: If a job isn't done in time.
+        '''
+        for _ in self.as_completed(timeout):
+            pass
+        return list(self._jobs)
+
+    def wait_any(self, timeout=None):
+        '''
+        Waits for the first job to finish, or returns one that already has.
+
+        @param timeout: The maximum time to wait in seconds, None means until
+                        the group deadline.
+        @type timeout: float
+        @rtype: L{Job<testingframework.manager.jobs.job.Job>}
+        @raise WaitTimedOut: If no job is done in time.
+        @raise ValueError: If the group is empty.
+        '''
+        if not self._jobs:
+            raise ValueError('The group has no jobs')
+        for job in self.as_completed(timeout):
+            return job
+
+    def as_completed(self, timeout=None):
+        '''
+        Yields the jobs as they finish, first those that already have.
+
+        If a job failed to be polled its exception is raised when it is its
+        turn. After a timeout the group gives up its watch of the pending
+        jobs, which are then only polled for other waiters, until the group
+        is waited for again.
+
+        @param timeout: The maximum time to wait in seconds, None means until
+                        the group deadline.
+        @type timeout: float
+        @raise WaitTimedOut: If the remaining jobs aren't done in time.
+        '''
+        started = time.time()
+        deadline = self._deadline
+        if timeout is not None:
+            deadline = min(deadline or started + timeout, started + timeout)
+        finished = Queue.Queue()
+        with self._lock:
+            self._listeners.append(finished)
+        try:
+            for job in self.pending:
+                self._watch(job)
+            for job in list(self._jobs):
+                future = self._futures[job]
+                if future.done():
+                    finished.put((job, future))
+            # A job that finishes while the done ones are gathered is put
+            # on the queue twice
+            yielded = set()
+            while len(yielded) < len(self._jobs):
+                try:
+                    job, future = finished.get(
+                        timeout=None if deadline is None
+                        else max(deadline - time.time(), 0))
+                except Queue.Empty:
+                    for job in self.pending:
+                        self._unwatch(job)
+                    raise WaitTimedOut(time.time() - started)
+                if job in yielded:
+                    continue
+                yielded.add(job)
+                future.result()
+                yield job
+        finally:
+            with self._lock:
+                self._listeners.remove(finished)
+
+    def wait_time_cost(self):
+        '''
+        The seconds every finished job took from being added to being done.
+
+        @return: The seconds by job, None for jobs not done yet.
+        @rtype: dict
+        '''
+        return dict((job, job.wait_time_cost()) for job in self._jobs)
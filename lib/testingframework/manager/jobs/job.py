@@ -10,6 +10,7 @@ import time
 from testingframework.manager.object import ItemFromManager
 from testingframework.exceptions.wait import WaitTimedOut
 from testingframework.exceptions.search import SearchFailure
+from testingframework.manager.jobs.poller import default_job_poller
 
 
 class Job(ItemFromManager):
@@ -19,7 +20,8 @@ class Job(ItemFromManager):
     different data about the job such as event count.
     '''
 
-    _SECONDS_BETWEEN_JOB_IS_DONE_CHECKS = 1
+    start_time = None
+    finish_wait_time = None
 
     @abstractmethod
     def get_results(self, **kwargs):
@@ -33,11 +35,18 @@ class Job(ItemFromManager):
         """
         Waits for this search to finish.
 
+        The job is polled by the shared
+        L{JobPoller<testingframework.manager.jobs.poller.JobPoller>} rather
+        than by this thread, on the job's own schedule: soon after the wait
+        starts, then less and less often. Jobs waited for from many threads thus share
+        one polling thread, and threads waiting for the same job share its
+        polls. A wait that times out only gives up its own watch.
+
         @param timeout: The maximum time to wait in seconds. None or 0
                         means no limit, None is default.
         @type timeout: int
         @return: self
-        @rtype: L{SDKJobWrapper}
+        @rtype: L{Job}
         @raise WaitTimedOut: If the search isn't done after
                                   C{timeout} seconds.
         """
@@ -46,11 +55,13 @@ class Job(ItemFromManager):
             timeout = None
 
         self.start_time = time.time()
-        while not self.is_done():
-            _check_if_wait_has_timed_out(self.start_time, timeout)
-            time.sleep(self._SECONDS_BETWEEN_JOB_IS_DONE_CHECKS)
-        else:
-            self.finish_wait_time = time.time()
+        poller = default_job_poller()
+        try:
+            poller.watch(self).result(timeout)
+        except WaitTimedOut:
+            poller.unwatch(self)
+            raise
+        self.finish_wait_time = time.time()
         return self
 
     def wait_time_cost(self):
@@ -66,13 +77,3 @@ class Job(ItemFromManager):
                 if key == 'error':
                     raise SearchFailure(message[key])
 
-
-def _check_if_wait_has_timed_out(start_time, timeout):
-    if timeout is None:
-        return
-    if _wait_timed_out(start_time, timeout):
-        raise WaitTimedOut(timeout)
-
-
-def _wait_timed_out(start_time, timeout):
-    return time.time() > start_time + timeout
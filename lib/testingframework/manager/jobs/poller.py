@@ -0,0 +1,223 @@
+'''
+Module for waiting for many search jobs with a single thread.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-21
+'''
+import sys
+import threading
+import time
+
+from testingframework.log import Logging
+from testingframework.util.concurrency import Future, WorkerPool, gather
+
+_DEFAULT_JOB_POLLER = None
+_DEFAULT_JOB_POLLER_LOCK = threading.Lock()
+
+
+def default_job_poller():
+    '''
+    The poller L{Job.wait<testingframework.manager.jobs.job.Job.wait>} uses,
+    created on first use.
+
+    @rtype: L{JobPoller}
+    '''
+    global _DEFAULT_JOB_POLLER
+    with _DEFAULT_JOB_POLLER_LOCK:
+        if _DEFAULT_JOB_POLLER is None:
+            _DEFAULT_JOB_POLLER = JobPoller()
+        return _DEFAULT_JOB_POLLER
+
+
+def set_default_job_poller(poller):
+    '''
+    Sets the poller L{Job.wait<testingframework.manager.jobs.job.Job.wait>}
+    uses, e.g. one with other intervals.
+
+    @param poller: The poller, None to create a default one on next use.
+    @type poller: L{JobPoller}
+    '''
+    global _DEFAULT_JOB_POLLER
+    with _DEFAULT_JOB_POLLER_LOCK:
+        _DEFAULT_JOB_POLLER = poller
+
+
+class JobPoller(Logging):
+    '''
+    Polls all watched jobs from one background thread.
+
+    Every job is checked with C{is_done} on its own schedule: right away
+    when it is watched, then after C{min_interval} seconds, with the
+    interval growing by C{growth} per check up to C{max_interval}. Short
+    searches are thus noticed quickly while long ones cost few requests.
+    Each tick checks all jobs that are due, at most C{max_in_flight} of them
+    at a time, and resolves the future of every job that is done. Waiting
+    for dozens of jobs thus takes about as long as the slowest of them,
+    instead of needing a sleeping thread per job. The thread stops when no
+    job is watched and is started again by the next L{watch}.
+
+    Several callers may wait for the same job; they share its future and
+    the job is polled until it is done or every one of them gave up with
+    L{unwatch}.
+
+    >>> futures = [poller.watch(job) for job in jobs]
+    >>> gather(futures, timeout=300)
+
+    @ivar min_interval: Seconds before the first check after the initial one.
+    @ivar max_interval: The longest wait between two checks of a job.
+    @ivar growth: The factor the interval of a job grows by per check.
+    @ivar _watched: The future, next check time, interval and number of
+                    watchers by job.
+    @ivar _thread: The polling thread, None when it is not running.
+    '''
+
+    def __init__(self, min_interval=0.25, max_interval=5, growth=1.5,
+                 max_in_flight=8):
+        '''
+        Creates a new poller.
+
+        @param min_interval: Seconds before the first check after the
+                             initial one.
+        @type min_interval: float
+        @param max_interval: The longest wait between two checks of a job.
+        @type max_interval: float
+        @param growth: The factor the interval of a job grows by per check.
+        @type growth: float
+        @param max_in_flight: The most status requests sent at once.
+        @type max_in_flight: int
+        '''
+        Logging.__init__(self)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.growth = growth
+        self._max_in_flight = max_in_flight
+        self._watched = {}
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def watch(self, job):
+        '''
+        Starts polling a job.
+
+        Watching a job that is already watched returns the same future. A
+        caller that stops waiting before the job is done calls L{unwatch}
+        once per watch.
+
+        @param job: The job, anything with an C{is_done} method.
+        @type job: L{Job<testingframework.manager.jobs.job.Job>}
+        @return: The future that gets the job once it is done, or the
+                 exception C{is_done} raised.
+        @rtype: L{Future<testingframework.util.concurrency.Future>}
+        '''
+        with self._condition:
+            if job in self._watched:
+                self._watched[job][3] += 1
+            else:
+                self._watched[job] = [Future(), time.time(), self.min_interval,
+                                      1]
+                self._condition.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name=self.__class__.__name__)
+                self._thread.daemon = True
+                self._thread.start()
+            return self._watched[job][0]
+
+    def unwatch(self, job):
+        '''
+        Gives up one watch of a job, e.g. after waiting for it timed out.
+        Once no watcher is left the job is no longer polled and its future
+        is left pending.
+
+        @param job: The job.
+        '''
+        with self._condition:
+            state = self._watched.get(job)
+            if state is None:
+                return
+            state[3] -= 1
+            if state[3] <= 0:
+                del self._watched[job]
+
+    @property
+    def watched(self):
+        '''
+        The number of jobs being polled.
+
+        @rtype: int
+        '''
+        with self._condition:
+            return len(self._watched)
+
+    def _run(self):
+        workers = WorkerPool(self._max_in_flight, name='job-poller')
+        try:
+            while True:
+                jobs = self._due()
+                if jobs is None:
+                    return
+                futures = [workers.submit(_check, job) for job in jobs]
+                for job, (done, exc_info) in zip(jobs, gather(futures)):
+                    if done or exc_info is not None:
+                        self._resolve(job, exc_info)
+                    else:
+                        self._reschedule(job)
+        except Exception:
+            self.logger.exception('Polling jobs failed')
+            self._fail_all(sys.exc_info())
+        finally:
+            workers.shutdown()
+
+    def _fail_all(self, exc_info):
+        '''
+        Fails every watched job and lets the next L{watch} start a new
+        thread, once the polling thread itself failed.
+        '''
+        with self._condition:
+            watched, self._watched = self._watched, {}
+            self._thread = None
+        for state in watched.values():
+            state[0].set_exc_info(exc_info)
+
+    def _due(self):
+        '''
+        Waits until at least one job is due and returns the due jobs, or
+        None once no job is watched, which ends the thread.
+        '''
+        with self._condition:
+            while True:
+                if not self._watched:
+                    self._thread = None
+                    return None
+                now = time.time()
+                due = [job for job, state in self._watched.items()
+                       if state[1] <= now]
+                if due:
+                    return due
+                self._condition.wait(min(state[1] for state in
+                                         self._watched.values()) - now)
+
+    def _reschedule(self, job):
+        with self._condition:
+            if job in self._watched:
+                state = self._watched[job]
+                state[1] = time.time() + state[2]
+                state[2] = min(state[2] * self.growth, self.max_interval)
+
+    def _resolve(self, job, exc_info):
+        with self._condition:
+            state = self._watched.pop(job, None)
+        if state is None:
+            return
+        if exc_info is not None:
+            state[0].set_exc_info(exc_info)
+        else:
+            state[0].set_result(job)
+
+
+def _check(job):
+    try:
+        return job.is_done(), None
+    except Exception:
+        return False, sys.exc_info()
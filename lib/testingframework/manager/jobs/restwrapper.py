@@ -0,0 +1,228 @@
+'''
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-21
+'''
+import datetime
+import json
+import time
+
+from testingframework.connector.paginate import paginate
+from testingframework.exceptions.search import SearchFailure
+from testingframework.manager.jobs import Jobs, JobNotFound
+from testingframework.manager.jobs.job import Job
+from testingframework.manager.jobs.results import Results
+
+JOBS_PATH = 'search/jobs'
+# Job states after which the job will not change any more.
+DONE_STATES = ['DONE GATHERING RESULTS', 'CANCELLED', 'FORCE PAUSED']
+DEFAULT_TIME_RANGE_MS = 15 * 60 * 1000
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%S'
+JSON_HEADERS = {'accept': 'application/json',
+                'content-type': 'application/json'}
+
+
+class RESTJobsWrapper(Jobs):
+    '''
+    Jobs of the C{search/jobs} endpoint of the Sumo API.
+
+    The API cannot list jobs, so L{items} are the jobs created through this
+    manager. The API speaks JSON only, so every request is sent with
+    L{JSON_HEADERS} whatever the headers of the connector are.
+
+    @ivar _jobs: The jobs created through this manager by id.
+    '''
+
+    def __init__(self, connector):
+        super(RESTJobsWrapper, self).__init__(connector)
+        self._jobs = {}
+
+    @property
+    def _jobs_uri(self):
+        return _api_url(self.connector) + JOBS_PATH
+
+    def create(self, query, **kwargs):
+        '''
+        Starts a search job.
+
+        @param query: The search query
+        @type query: str
+        @param kwargs: C{from_time} and C{to_time} in epoch ms or ISO format,
+                       i.e. C{2016-07-21T10:00:00}, by default the last 15
+                       minutes, and C{time_zone}, UTC by default. Without
+                       C{from_time} the search starts 15 minutes before
+                       C{to_time}, in the format of C{to_time}.
+        @return: The job
+        @rtype: L{RESTJobWrapper}
+        @raise SearchFailure: If the job could not be created.
+        @raise ValueError: If C{to_time} is neither epoch ms nor ISO format.
+        '''
+        to_time = kwargs.get('to_time', int(time.time() * 1000))
+        from_time = kwargs.get('from_time')
+        if from_time is None:
+            from_time = _default_from_time(to_time)
+        body = {'query': query, 'from': from_time, 'to': to_time,
+                'timeZone': kwargs.get('time_zone', 'UTC')}
+        self.logger.info('Creating search job: {q}'.format(q=query))
+        response, content = self.connector.make_request(
+            'POST', self._jobs_uri, json.dumps(body), headers=JSON_HEADERS)
+        if response.status not in (200, 201, 202):
+            raise SearchFailure(content)
+        sid = json.loads(content)['id']
+        job = RESTJobWrapper(self.connector, sid)
+        self._jobs[sid] = job
+        return job
+
+    def __getitem__(self, sid):
+        '''
+        Returns a job by id, including jobs not created through this manager.
+
+        @raise JobNotFound: If there is no such job.
+        @rtype: L{RESTJobWrapper}
+        '''
+        if sid in self._jobs:
+            return self._jobs[sid]
+        job = RESTJobWrapper(self.connector, sid)
+        job.refresh()
+        return job
+
+    def items(self):
+        return self._jobs.values()
+
+    def __contains__(self, item):
+        sid = item.sid if isinstance(item, Job) else item
+        return sid in self._jobs
+
+
+class RESTJobWrapper(Job):
+    '''
+    A job of the C{search/jobs} endpoint of the Sumo API.
+
+    @ivar _status: The status of the job as last read.
+    '''
+
+    def __init__(self, connector, sid):
+        super(RESTJobWrapper, self).__init__(connector, sid)
+        self._status = None
+
+    def __repr__(self):
+        return '<{cls} sid={sid}>'.format(cls=self.__class__.__name__,
+                                          sid=self.sid)
+
+    @property
+    def sid(self):
+        return self.raw_item
+
+    @property
+    def _uri(self):
+        return '{a}{p}/{s}'.format(a=_api_url(self.connector), p=JOBS_PATH,
+                                   s=self.sid)
+
+    def refresh(self):
+        '''
+        Reads the status of the job.
+
+        @return: The status, with C{state}, C{messageCount}, C{recordCount},
+                 C{pendingErrors} and C{pendingWarnings}.
+        @rtype: dict
+        @raise JobNotFound: If the job does not exist (any more).
+        '''
+        response, content = self.connector.make_request(
+            'GET', self._uri, headers=JSON_HEADERS)
+        if response.status == 404:
+            raise JobNotFound(self.sid)
+        if response.status != 200:
+            raise SearchFailure(content)
+        self._status = json.loads(content)
+        return self._status
+
+    @property
+    def status(self):
+        '''
+        The status of the job as last read, read now if it never was.
+
+        @rtype: dict
+        '''
+        return self._status or self.refresh()
+
+    def is_done(self):
+        '''
+        Reads the status and checks if the job has finished.
+
+        @rtype: bool
+        '''
+        return self.refresh()['state'] in DONE_STATES
+
+    def get_event_count(self):
+        '''
+        The number of messages found so far.
+
+        @rtype: int
+        '''
+        return self.status['messageCount']
+
+    def get_record_count(self):
+        '''
+        The number of aggregate records found so far.
+
+        @rtype: int
+        '''
+        return self.status['recordCount']
+
+    def get_messages(self):
+        '''
+        The pending errors and warnings of the job, see
+        L{check_message<testingframework.manager.jobs.job.Job.check_message>}.
+
+        @rtype: dict
+        '''
+        status = self.status
+        messages = {}
+        if status.get('pendingErrors'):
+            messages['error'] = status['pendingErrors']
+        if status.get('pendingWarnings'):
+            messages['warn'] = status['pendingWarnings']
+        return messages
+
+    def get_results(self, records=False, count=None, page_size=1000,
+                    **kwargs):
+        '''
+        Reads the messages, or the records of an aggregate search.
+
+        @param records: Whether to read records rather than messages.
+        @type records: bool
+        @param count: The most results to read, None for all.
+        @type count: int
+        @param page_size: The results read per request.
+        @type page_size: int
+        @rtype: L{Results<testingframework.manager.jobs.results.Results>}
+        '''
+        key = 'records' if records else 'messages'
+        return Results([result['map'] for result in paginate(
+            self.connector, '{u}/{k}'.format(u=self._uri, k=key), page_size,
+            key=key, limit=count, headers=JSON_HEADERS)])
+
+    def cancel(self):
+        '''
+        Deletes the job.
+        '''
+        self.connector.make_request('DELETE', self._uri, headers=JSON_HEADERS)
+
+
+def _api_url(connector):
+    return connector.sumo.sumo_url
+
+
+def _default_from_time(to_time):
+    '''
+    The start of the default time range ending at to_time, in its format.
+    '''
+    if isinstance(to_time, (int, long)):
+        return to_time - DEFAULT_TIME_RANGE_MS
+    try:
+        end = datetime.datetime.strptime(to_time.split('.')[0], ISO_FORMAT)
+    except (AttributeError, ValueError):
+        raise ValueError('to_time {t!r} is neither epoch ms nor ISO format, '
+                         'e.g. 2016-07-21T10:00:00'.format(t=to_time))
+    start = end - datetime.timedelta(milliseconds=DEFAULT_TIME_RANGE_MS)
+    return start.strftime(ISO_FORMAT)
@@ -3,7 +3,8 @@
 @contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
 @since: 2016-04-29
 '''
-import copy
+from abc import ABCMeta, abstractmethod
+from array import array
 
 
 class Results(object):
@@ -39,9 +40,16 @@ class Results(object):
 
     As you can see each event in the list doesn't have to contain all fields.
 
-    @ivar _list: The results as a list
-    @ivar _dict_cached: Since creating the dictionary is expensive it's cached.
-                        You should use the _dict property though!
+    The results are stored by column rather than as the list of events, see
+    L{_Columns}, which takes a fraction of the memory for the wide and
+    repetitive events of log searches. Events, fields and both formats are
+    built from the columns when they are read, as L{ReadOnlyList} and
+    L{ReadOnlyDict}. Those are a real list and dict, so C{json.dumps} and
+    C{isinstance} work on them, but changing them raises TypeError. Values
+    are shared with the columns rather than copied. Use L{copy}, or
+    C{copy()} on a read-only list or dict, to get data that can be changed.
+
+    @ivar _columns: The results by column
     """
 
     def __init__(self, results_):
@@ -53,8 +61,7 @@ class Results(object):
         """
         super(Results, self).__init__()
 
-        self._list = results_
-        self._dict_cache = None
+        self._columns = _Columns(results_)
 
     def __repr__(self):
         """
@@ -72,9 +79,10 @@ class Results(object):
         @param field: The field to get
         @type field: str
         @return: A list of values for that field
-        @rtype: list(str)
+        @rtype: L{ReadOnlyList}
         """
-        return self.as_dict.get(field)
+        column = self._columns.column(field)
+        return None if column is None else ReadOnlyList(column)
 
     def __getitem__(self, index):
         """
@@ -86,9 +94,11 @@ class Results(object):
         @param index: The index to get
         @type index: int
         @return: The fields for that event
-        @rtype: dict(str: str)
+        @rtype: L{ReadOnlyDict}
         """
-        return self.as_list[index]
+        if isinstance(index, slice):
+            return ReadOnlyList(self._columns[index])
+        return self._columns[index]
 
     def get_event(self, index):
         """
@@ -99,7 +109,7 @@ class Results(object):
         @param index: The index to get
         @type index: int
         @return: The event at that index
-        @rtype: dict(str: str)
+        @rtype: L{ReadOnlyDict}
         """
         return self[index]
 
@@ -115,7 +125,7 @@ class Results(object):
         @return: The iterator
         @rtype: iterator
         """
-        return self.as_list.__iter__()
+        return iter(self._columns)
 
     def __contains__(self, field):
         """
@@ -128,7 +138,7 @@ class Results(object):
         @return: True if it exists
         @rtype: bool
         """
-        return field in self._dict
+        return self._columns.column(field) is not None
 
     def __len__(self):
         """
@@ -137,7 +147,7 @@ class Results(object):
         @return: The event count
         @rtype: int
         """
-        return len(self._list)
+        return len(self._columns)
 
     @property
     def as_dict(self):
@@ -145,12 +155,13 @@ class Results(object):
         This result set as a dictionary. The format is specified in the
         documentation for the class.
 
-        This is a copy of the results so you can do whatever you want to do with
-        it.
+        The dictionary is built on every access and cannot be changed, call
+        C{copy()} on it for a dictionary you can change.
 
-        @rtype: dict
+        @rtype: L{ReadOnlyDict}
         """
-        return copy.deepcopy(self._dict)
+        return ReadOnlyDict((name, ReadOnlyList(self._columns.column(name)))
+                            for name in self._columns.fields)
 
     @property
     def as_list(self):
@@ -158,12 +169,12 @@ class Results(object):
         This result set as a list. The format is specified in the documentation
         for the class
 
-        This is a copy of the results so you can do whatever you want to do with
-        it.
+        The list is built on every access and cannot be changed, call
+        C{copy()} on it for a list you can change.
 
-        @rtype: list
+        @rtype: L{ReadOnlyList}
         """
-        return copy.deepcopy(self._list)
+        return ReadOnlyList(self._columns)
 
     @property
     def fields(self):
@@ -175,77 +186,306 @@ class Results(object):
 
         @rtype: list
         """
-        return self._dict.keys()
+        return list(self._columns.fields)
 
-    @property
-    def _dict(self):
+    def copy(self):
+        """
+        Returns a copy of this result set that shares no data with it.
+
+        @rtype: L{Results}
         """
-        Returns the results as a dictionary.
+        return Results(self.as_list.copy())
+
 
-        It caches the results so that the second call is very fast
+class ReadOnlyList(list):
+    """
+    A list that cannot be changed, e.g. a column or the events of L{Results}.
+
+    Elements that are lists or dictionaries are read-only too, so nothing
+    reachable from it can be changed through it. Being a list it works with
+    C{json.dumps}, C{isinstance} and comparisons like any other list;
+    copying or pickling it gives a plain list.
+    """
+
+    def __init__(self, data=()):
+        list.__init__(self, (_view(value) for value in data))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyList(list.__getitem__(self, index))
+        return list.__getitem__(self, index)
+
+    def __getslice__(self, start, stop):
+        return ReadOnlyList(list.__getslice__(self, start, stop))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('ReadOnlyList cannot be changed, use copy()')
+
+    __setitem__ = __delitem__ = __setslice__ = __delslice__ = _read_only
+    __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def copy(self):
+        """
+        Returns a copy of the list that can be changed.
+
+        @rtype: list
+        """
+        return [_plain(value) for value in self]
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __reduce_ex__(self, protocol):
+        return list, (list(self),)
+
+
+class ReadOnlyDict(dict):
+    """
+    A dictionary that cannot be changed, e.g. an event of L{Results}, see
+    L{ReadOnlyList}.
+    """
+
+    def __init__(self, data=()):
+        items = data.iteritems() if isinstance(data, dict) else data
+        dict.__init__(self, ((key, _view(value)) for key, value in items))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('ReadOnlyDict cannot be changed, use copy()')
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self):
+        """
+        Returns a copy of the dictionary that can be changed.
 
         @rtype: dict
         """
-        if not self._dict_cache:
-            self._dict_cache = _list_to_dictionary(self._list)
-        return self._dict_cache
+        return dict((key, _plain(value)) for key, value in self.iteritems())
 
+    def __deepcopy__(self, memo):
+        return self.copy()
 
-def _list_to_dictionary(events):
+    def __reduce_ex__(self, protocol):
+        return dict, (dict(self),)
+
+
+def _view(value):
+    """
+    Returns lists and dictionaries as read-only ones, other values as they
+    are.
     """
-    Converts a list of events to a dictionary of fields.
+    if isinstance(value, (ReadOnlyList, ReadOnlyDict)):
+        return value
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    return value
 
-    Input format::
-        [
-            {
-                'field1': value1,
-                'field2': value2,
-                ...
-            },
 
-            {
-                'field2': value3,
-                'field3': value4,
-                ...
-            },
+def _plain(value):
+    """
+    Returns a value that can be changed: lists and dictionaries are copied,
+    all the way down, other values are immutable and returned as they are.
+    """
+    if isinstance(value, list):
+        return [_plain(each) for each in value]
+    if isinstance(value, dict):
+        return dict((key, _plain(each)) for key, each in value.iteritems())
+    return value
 
-            ...
-        ]
 
-    Output format::
-        {
-            'field1': [value1, None, ...],
-            'field2': [value2, value3, ...],
-            'field3': [None, value4, ...],
-            ...
-        }
+class _Columns(object):
+    """
+    A result set stored by column, indexed like the list of its events.
+
+    Every field has one column holding its value for every event, with a
+    bitmap of the events that have the field at all. Columns of ints or of
+    floats are typed arrays. All other columns are dictionary encoded: each
+    distinct value is kept once and every event stores the small code of its
+    value, in an array of bytes while the field has at most 256 distinct
+    values. Each field name is kept once, however many events have it.
+    Events are only built as dictionaries when they are read.
+
+    @ivar fields: The field names in the order they were first seen.
+    @ivar _columns: The (field name, column) pairs in the same order.
+    @ivar _index: The column of every field name.
+    @ivar _length: The number of events.
+    """
 
-    If not all fields are present in every event None will be inserted instead.
+    def __init__(self, events):
+        self._length = len(events)
+        self.fields = []
+        entries = {}
+        for row, event in enumerate(events):
+            for name, value in event.iteritems():
+                entry = entries.get(name)
+                if entry is None:
+                    entry = entries[name] = ([], [])
+                    self.fields.append(name)
+                entry[0].append(row)
+                entry[1].append(value)
+        self._columns = [(name, _column(self._length, *entries.pop(name)))
+                         for name in self.fields]
+        self._index = dict(self._columns)
 
-    @param events: The events as a list of dictionaries
-    @type events: list(dict(field(str): value(str)))
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._event(row)
+                    for row in xrange(*index.indices(self._length))]
+        return self._event(_row(index, self._length))
+
+    def __iter__(self):
+        for row in xrange(self._length):
+            yield self._event(row)
+
+    def column(self, name):
+        """
+        Returns the column of a field, None if no event has it.
 
-    @return: The events as a dictionary.
-    @rtype: dict(field(str): values(list(str)))
+        @rtype: L{_Column}
+        """
+        return self._index.get(name)
+
+    def _event(self, row):
+        return ReadOnlyDict((name, column.value(row)) for name, column in
+                            self._columns if column.present(row))
+
+
+def _column(length, rows, values):
     """
-    fields = _get_fields(events)
-    r = {}
-    for event in events:
-        for field in fields:
-            r[field].append(event.get(field, None))
-    return r
+    Creates the column of a field with the given values at the given rows.
+    """
+    kinds = set(value.__class__ for value in values)
+    if kinds == set([int]):
+        return _ArrayColumn(length, rows, values, 'l')
+    if kinds == set([float]):
+        return _ArrayColumn(length, rows, values, 'd')
+    try:
+        return _DictionaryColumn(length, rows, values)
+    except TypeError:
+        return _ObjectColumn(length, rows, values)
+
+
+def _row(index, length):
+    if index < 0:
+        index += length
+    if not 0 <= index < length:
+        raise IndexError('Results index out of range')
+    return index
+
+
+class _Column(object):
+    """
+    The values of one field, None for the events that do not have it.
 
+    @ivar _length: The number of events.
+    @ivar _present: The bitmap of the events that have the field.
+    """
+
+    __metaclass__ = ABCMeta
+
+    def __init__(self, length, rows):
+        self._length = length
+        self._present = bytearray((length + 7) // 8)
+        for row in rows:
+            self._present[row >> 3] |= 1 << (row & 7)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[row] for row in xrange(*index.indices(self._length))]
+        row = _row(index, self._length)
+        return self.value(row) if self.present(row) else None
 
-def _get_fields(events):
+    def __iter__(self):
+        for row in xrange(self._length):
+            yield self.value(row) if self.present(row) else None
+
+    def present(self, row):
+        """
+        Checks if the event at row has the field.
+
+        @rtype: bool
+        """
+        return self._present[row >> 3] & (1 << (row & 7)) != 0
+
+    @abstractmethod
+    def value(self, row):
+        """
+        The value of the event at row, which must have the field.
+        """
+
+
+class _ArrayColumn(_Column):
+    """
+    A column of ints or floats in a typed array.
+    """
+
+    def __init__(self, length, rows, values, typecode):
+        _Column.__init__(self, length, rows)
+        self._values = array(typecode, [0]) * length
+        for row, value in zip(rows, values):
+            self._values[row] = value
+
+    def value(self, row):
+        return self._values[row]
+
+
+class _DictionaryColumn(_Column):
     """
-    Returns a list of all fields in the given event set.
+    A column of the codes of values in a dictionary of its distinct values.
 
-    @param events: The events as a list of dictionaries.
-    @type events: list(dict(str: str))
-    @return: All the fields.
-    @rtype: set(str)
+    @raise TypeError: If a value cannot be hashed.
+    """
+
+    def __init__(self, length, rows, values):
+        _Column.__init__(self, length, rows)
+        self._dictionary = []
+        codes = {}
+        row_codes = [0] * length
+        for row, value in zip(rows, values):
+            # Keyed by type as well, 1 and True or 'a' and u'a' are equal
+            key = (value.__class__, value)
+            code = codes.get(key)
+            if code is None:
+                code = codes[key] = len(self._dictionary)
+                self._dictionary.append(value)
+            row_codes[row] = code
+        self._codes = array(_code_type(len(self._dictionary)), row_codes)
+
+    def value(self, row):
+        return self._dictionary[self._codes[row]]
+
+
+class _ObjectColumn(_Column):
+    """
+    A column of values that cannot be dictionary encoded, e.g. lists.
+    """
+
+    def __init__(self, length, rows, values):
+        _Column.__init__(self, length, rows)
+        self._values = [None] * length
+        for row, value in zip(rows, values):
+            self._values[row] = value
+
+    def value(self, row):
+        return self._values[row]
+
+
+def _code_type(size):
+    """
+    The array type code of the smallest unsigned ints that hold size codes.
     """
-    fields = set()
-    for event in events:
-        fields.update(event.keys())
-    return fields
+    if size <= 0x100:
+        return 'B'
+    if size <= 0x10000:
+        return 'H'
+    return 'L'
@@ -0,0 +1,246 @@
+'''
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-22
+'''
+import heapq
+import itertools
+import sys
+import threading
+import time
+
+from testingframework.log import Logging
+from testingframework.connector.ratelimit import RateLimiter
+from testingframework.exceptions.wait import WaitTimedOut
+from testingframework.manager.jobs.poller import default_job_poller
+from testingframework.util.concurrency import Future, WorkerPool
+
+
+class JobScheduler(Logging):
+    '''
+    Admits search jobs so that no account runs more than C{max_running} of
+    them at once.
+
+    Searches are queued by L{submit} and started with C{Jobs.create} while
+    their account has a free slot. The queue of an account is ordered by
+    priority, highest first, then by deadline, earliest first, then by
+    submission. The shared L{JobPoller} watches every started job and the
+    moment one is done the next queued search of its account is started, so
+    exactly the allowed number of jobs is in flight and the server neither
+    rejects the excess nor has all of them crawl along together.
+
+    The scheduler holds a watch of its own on every job it started, so a
+    wait for the same job elsewhere that times out does not keep its slot
+    from being freed. A queued search whose deadline passes fails right
+    then, from a thread that sleeps until the earliest deadline.
+
+    >>> scheduler = JobScheduler(max_running=10)
+    >>> futures = [scheduler.submit(jobs, query) for query in queries]
+    >>> for job in gather(futures):
+    ...     counts[job.sid] = job.get_event_count()
+
+    @ivar max_running: The most jobs an account runs at once.
+    @ivar _queues: The heap of queued searches by account.
+    @ivar _running: The number of jobs starting or running by account.
+    @ivar _workers: The threads jobs are created on.
+    @ivar _expiry: The thread failing queued searches whose deadline passed,
+                   None while no queued search has a deadline.
+    '''
+
+    def __init__(self, max_running=10, poller=None, max_starting=4):
+        '''
+        Creates a new scheduler.
+
+        @param max_running: The most jobs an account runs at once.
+        @type max_running: int
+        @param poller: The poller, by default the shared one.
+        @type poller: L{JobPoller}
+        @param max_starting: The most jobs being created at once.
+        @type max_starting: int
+        '''
+        if max_running < 1:
+            raise ValueError('At least one job must be allowed to run')
+        Logging.__init__(self)
+        self.max_running = max_running
+        self._poller = poller or default_job_poller()
+        self._queues = {}
+        self._running = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._expiry = None
+        self._workers = WorkerPool(max_starting, name='job-scheduler')
+
+    def submit(self, jobs, query, priority=0, deadline=None, **kwargs):
+        '''
+        Queues a search.
+
+        Any other argument is passed to C{Jobs.create}.
+
+        @param jobs: The jobs manager of the account to search with.
+        @type jobs: L{Jobs<testingframework.manager.jobs.Jobs>}
+        @param query: The search query.
+        @type query: str
+        @param priority: Searches with a higher priority start first.
+        @type priority: int
+        @param deadline: Seconds from now within which the search must have
+                         started, None for no deadline. Earlier deadlines
+                         start first.
+        @type deadline: float
+        @return: The future that gets the job once it is done, or the
+                 exception raised creating or polling it. A search whose
+                 deadline passed before a slot was free fails with
+                 WaitTimedOut.
+        @rtype: L{Future<testingframework.util.concurrency.Future>}
+        '''
+        future = Future()
+        account = _account(jobs)
+        now = time.time()
+        due = float('inf') if deadline is None else now + deadline
+        entry = (-priority, due, next(self._sequence), now, jobs, query,
+                 kwargs, future)
+        with self._lock:
+            heapq.heappush(self._queues.setdefault(account, []), entry)
+            if deadline is not None:
+                self._watch_deadlines()
+        self._dispatch(account)
+        return future
+
+    def queued(self, jobs=None):
+        '''
+        The number of searches waiting for a slot.
+
+        @param jobs: The jobs manager of the account, None for all accounts.
+        @rtype: int
+        '''
+        with self._lock:
+            if jobs is not None:
+                return len(self._queues.get(_account(jobs), []))
+            return sum(len(queue) for queue in self._queues.values())
+
+    def running(self, jobs=None):
+        '''
+        The number of jobs starting or running.
+
+        @param jobs: The jobs manager of the account, None for all accounts.
+        @rtype: int
+        '''
+        with self._lock:
+            if jobs is not None:
+                return self._running.get(_account(jobs), 0)
+            return sum(self._running.values())
+
+    def shutdown(self):
+        '''
+        Stops the threads jobs are created on once the started ones are.
+        '''
+        self._workers.shutdown()
+
+    def _dispatch(self, account):
+        '''
+        Starts queued searches of an account while it has free slots.
+        '''
+        starts, expired = [], []
+        with self._lock:
+            queue = self._queues.get(account, [])
+            while queue and self._running.get(account, 0) < self.max_running:
+                entry = heapq.heappop(queue)
+                if entry[1] < time.time():
+                    expired.append(entry)
+                    continue
+                self._running[account] = self._running.get(account, 0) + 1
+                starts.append(entry)
+        for entry in expired:
+            _fail(entry[-1], WaitTimedOut(time.time() - entry[3]))
+        for entry in starts:
+            self._workers.submit(self._start, account, entry)
+
+    def _watch_deadlines(self):
+        '''
+        Wakes up the expiry thread for a new deadline, or starts it. Called
+        with the lock held.
+        '''
+        if self._expiry is None:
+            self._expiry = threading.Thread(target=self._expire,
+                                            name='job-scheduler-expiry')
+            self._expiry.daemon = True
+            self._expiry.start()
+        else:
+            self._condition.notify()
+
+    def _expire(self):
+        '''
+        Fails queued searches as their deadline passes, until no queued
+        search has a deadline.
+        '''
+        while True:
+            with self._condition:
+                expired = self._take_expired(time.time())
+                if not expired:
+                    due = min([entry[1] for queue in self._queues.values()
+                               for entry in queue
+                               if entry[1] != float('inf')] or [None])
+                    if due is None:
+                        self._expiry = None
+                        return
+                    self._condition.wait(max(due - time.time(), 0))
+                    continue
+            for entry in expired:
+                _fail(entry[-1], WaitTimedOut(time.time() - entry[3]))
+
+    def _take_expired(self, now):
+        '''
+        Removes and returns the queued searches whose deadline passed.
+        Called with the lock held.
+        '''
+        expired = []
+        for account, queue in self._queues.items():
+            kept = [entry for entry in queue if entry[1] >= now]
+            if len(kept) < len(queue):
+                expired.extend(entry for entry in queue if entry[1] < now)
+                heapq.heapify(kept)
+                self._queues[account] = kept
+        return expired
+
+    def _start(self, account, entry):
+        jobs, query, kwargs, future = entry[4:]
+        try:
+            job = jobs.create(query, **kwargs)
+        except Exception:
+            self._release(account)
+            future.set_exc_info(sys.exc_info())
+            return
+        job.start_time = time.time()
+        job.finish_wait_time = None
+        # never unwatched: the slot is only freed once the job is done
+        self._poller.watch(job).add_done_callback(
+            lambda done: self._finished(account, job, done, future))
+
+    def _finished(self, account, job, done, future):
+        job.finish_wait_time = time.time()
+        self._release(account)
+        try:
+            done.result()
+        except Exception:
+            future.set_exc_info(sys.exc_info())
+        else:
+            future.set_result(job)
+
+    def _release(self, account):
+        with self._lock:
+            self._running[account] -= 1
+        self._dispatch(account)
+
+
+def _account(jobs):
+    connector = jobs.connector
+    sumo = connector.sumo
+    return RateLimiter.key(getattr(sumo, 'sumo_url', sumo.name),
+                           connector.username)
+
+
+def _fail(future, error):
+    try:
+        raise error
+    except Exception:
+        future.set_exc_info(sys.exc_info())
@@ -0,0 +1,33 @@
+'''
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-21
+'''
+from abc import ABCMeta
+
+from testingframework.log import Logging
+
+
+class ItemFromManager(Logging):
+    '''
+    An item handed out by a L{Manager<testingframework.manager.Manager>},
+    e.g. a job of L{Jobs<testingframework.manager.jobs.Jobs>}.
+
+    @ivar _connector: The connector the item is accessed with.
+    @ivar _raw_item: The id or object the connector knows the item by.
+    '''
+    __metaclass__ = ABCMeta
+
+    def __init__(self, connector, raw_item):
+        self._connector = connector
+        self._raw_item = raw_item
+
+        Logging.__init__(self)
+
+    @property
+    def connector(self):
+        return self._connector
+
+    @property
+    def raw_item(self):
+        return self._raw_item
@@ -6,6 +6,8 @@ This module contains everything regarding a Sumo deployment.
 @since: 2016-04-24
 '''
 
-__all__ = ['aws']
+__all__ = ['aws', 'fleet', 'standin']
 
 from .aws import AWSSumo
+from .fleet import SumoFleet
+from .standin import StandInSumo
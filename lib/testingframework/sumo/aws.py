@@ -13,7 +13,6 @@ import shlex
 import urllib2
 import platform
 import time
-import sys
 import re
 import logging
 
@@ -21,6 +20,8 @@ import testingframework.util.archiver as archiver
 from .base import Sumo
 from testingframework.util.fileutils import FileUtils
 from testingframework.manager.jobs import Jobs
+from testingframework.util.concurrency import WorkerPool, gather
+from testingframework.util.convergence import wait_for_convergence
 
 
 LOGGER = logging.getLogger('AWSSumo')
@@ -72,6 +73,17 @@ class AWSSumo(Sumo):
         }
     
 
+    def uri_base(self):
+        '''
+        The scheme requests are sent with, plain HTTP if sumo_url asks for it
+        (e.g. a L{StandInSumo<testingframework.sumo.standin.StandInSumo>}).
+
+        @rtype: str
+        '''
+        if self._sumo_url.startswith('http://'):
+            return 'http://'
+        return super(AWSSumo, self).uri_base()
+
     @property
     def sumo_url(self):
         '''
@@ -89,41 +101,77 @@ class AWSSumo(Sumo):
         LOGGER.info('Getting event count')
         event_count = 0
         jobs = Jobs(self.default_connector)
-        job = jobs.create('search %s' % search_string)
+        job = jobs.create(search_string)
         job.wait()
         event_count = job.get_event_count()
         LOGGER.debug('Event count: {ec}'.format(ec=event_count))
         return event_count
 
-    def get_final_event_count(self, search_string='*', secondsToStable=60, retry_interval=30):
+    def get_final_event_count(self, search_string='*', secondsToStable=60,
+                              retry_interval=30, min_interval=1.0,
+                              timeout=None):
         '''
         Waits until indexing is done and then gives the final event count that the search reported.
+
+        The count is polled every C{min_interval} seconds while it changes and
+        the interval doubles, up to C{retry_interval}, while it stays the same,
+        see L{wait_for_convergence<testingframework.util.convergence.wait_for_convergence>}.
+
         @param search_string: The search string
         @param secondsToStable: The time to wait with stable index before we decide indexing is done
-        @param retry_interval: wait time b/w two successive search jobs
+        @param retry_interval: The longest wait b/w two successive search jobs
+        @param min_interval: The wait b/w two successive search jobs while the count changes
+        @param timeout: Seconds after which to give up, None to wait forever
+        @raise WaitTimedOut: If the count did not become stable within the timeout.
+        '''
+        return self._converge(search_string, secondsToStable, retry_interval,
+                              min_interval, timeout)['value']
+
+    def get_final_event_counts(self, search_strings, secondsToStable=60,
+                               retry_interval=30, min_interval=1.0,
+                               timeout=None, max_in_flight=8):
+        '''
+        Waits for the final event counts of several searches at once.
+
+        Every search string is polled on its own thread as in
+        L{get_final_event_count}, so the time taken is that of the slowest
+        search rather than the sum of all of them.
+
+        >>> counts = sumo.get_final_event_counts(['_sourceCategory=a', '_sourceCategory=b'])
+        >>> counts['_sourceCategory=a']['value'], counts['_sourceCategory=a']['converged_after']
+
+        @param search_strings: The search strings
+        @type search_strings: list(str)
+        @param max_in_flight: The most searches polled at once
+        @type max_in_flight: int
+        @return: For every search string, its final count as C{value},
+                 C{converged_after} (seconds until the final count was first
+                 seen), C{seconds} (until it was confirmed stable) and the
+                 number of C{polls}.
+        @rtype: dict
+        @raise WaitTimedOut: If a count did not become stable within the timeout.
         '''
-        resultPrev = -1
-        resultSameSince = sys.maxint
-        counts = []
-        while True:
-            time.sleep(retry_interval)
-            result = self.get_event_count(search_string=search_string)
-            now = int(time.time()) # time()'s precision will suffice here, and in fact seconds is all we want
-            if result == resultPrev:
-                if (now - resultSameSince) > secondsToStable: ### we have stable state
-                    LOGGER.info('Achieved stable state for search %s with totalEventCount=%s' % (search_string, result))
-                    return result # returns the final event count...
-                if resultSameSince == sys.maxint:             ### our first time in what could become stable state
-                    LOGGER.debug('Possibly entering stable state for search %s at totalEventCount=%s' % (search_string, result))
-                    resultSameSince = lastPolledAt
-                    LOGGER.debug('Using resultSameSince=%d ' % (resultSameSince))
-                else:                                         ### our 2nd/3rd/... time in what could become stable state
-                    LOGGER.debug('Confirming putative stable at totalEventCount=%s for search_string %s ' % (result, search_string))
-            else:                                             ### we do NOT have stable state
-                LOGGER.debug('Flux at totalEventCount=%s for search_string %s; delta +%s' % (result, search_string, (result-resultPrev)))
-                resultPrev = result
-                resultSameSince = sys.maxint
-            lastPolledAt = now
+        search_strings = list(search_strings)
+        workers = WorkerPool(max(min(max_in_flight, len(search_strings)), 1),
+                             name='final-event-count')
+        try:
+            futures = [workers.submit(self._converge, search_string,
+                                      secondsToStable, retry_interval,
+                                      min_interval, timeout)
+                       for search_string in search_strings]
+            return dict(zip(search_strings, gather(futures)))
+        finally:
+            workers.shutdown()
+
+    def _converge(self, search_string, secondsToStable, retry_interval,
+                  min_interval, timeout):
+        result = wait_for_convergence(
+            lambda: self.get_event_count(search_string=search_string),
+            stable_for=secondsToStable, min_interval=min_interval,
+            max_interval=max(retry_interval, min_interval), timeout=timeout,
+            name='Event count of search %s' % search_string)
+        LOGGER.info('Achieved stable state for search %s with totalEventCount=%s' % (search_string, result['value']))
+        return result
 
 class InvalidSumoURL(RuntimeError):
     '''
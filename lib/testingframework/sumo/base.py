@@ -5,12 +5,15 @@ This module has things regarding a generic Sumo deployment.
 @contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
 @since: 2016-04-25
 '''
+import threading
 from abc import ABCMeta, abstractmethod, abstractproperty
 from testingframework.exceptions import UnsupportedConnectorError
 from testingframework.log import Logging
 from testingframework.connector.base import Connector
 from testingframework.connector.rest import RESTConnector
 from testingframework.connector.service import ServiceConnector
+from testingframework.connector.asyncrest import AsyncRESTConnector
+from testingframework.connector.pool import ConnectorPool
 
 
 class Sumo(Logging):
@@ -23,6 +26,9 @@ class Sumo(Logging):
     @ivar _default_connector: The default connector. Is None at first and is
                               later created when L{default_connector} is used.
     @type _default_connector: L{Connector}
+    @ivar _connectors: The connector pools by connector id, each holding the
+                       registered connector of its type and user, see
+                       L{connector_pool}.
     @ivar _start_listeners: A collection of start listeners
     @type _start_listeners: set
     @ivar name: The name of this instance. Defaults to the ID of this object.
@@ -36,7 +42,9 @@ class Sumo(Logging):
 
     __metaclass__ = ABCMeta
 
-    _CONNECTOR_TYPE_TO_CLASS_MAPPINGS = {Connector.REST: RESTConnector, Connector.SERVICEREST: ServiceConnector}
+    _CONNECTOR_TYPE_TO_CLASS_MAPPINGS = {Connector.REST: RESTConnector,
+                                         Connector.SERVICEREST: ServiceConnector,
+                                         Connector.ASYNCREST: AsyncRESTConnector}
 
     def __init__(self, name):
         '''
@@ -45,6 +53,7 @@ class Sumo(Logging):
         self._default_connector = None
         self._start_listeners = set()
         self._connectors = {}
+        self._connectors_lock = threading.Lock()
 
         self._name = name or id(self)
 
@@ -157,6 +166,12 @@ class Sumo(Logging):
         Any argument specified to this method will be passed to the connector's
         initialization method
 
+        The connector becomes the registered connector of the pool of its
+        type and user, which L{connector} returns. Creating another one for
+        the same type and user registers that one instead; the earlier one
+        keeps working for whoever holds it. Connectors borrowed from the
+        pool, see L{borrow_connector}, are created with the same arguments.
+
         @param contype: Type of connector to create, defined in Connector class,
            defaults to Connector.REST
 
@@ -167,20 +182,17 @@ class Sumo(Logging):
         if contype not in self._CONNECTOR_TYPE_TO_CLASS_MAPPINGS:
             raise UnsupportedConnectorError
 
-        conn = self._CONNECTOR_TYPE_TO_CLASS_MAPPINGS[contype](self,
-                                                               *args,
-                                                               **kwargs)
-
-        connector_id = self._get_connector_id(contype=contype,
-                                              user=conn.username)
+        connector_class = self._CONNECTOR_TYPE_TO_CLASS_MAPPINGS[contype]
+        conn = connector_class(self, *args, **kwargs)
 
-        if connector_id in self._connectors.keys():
-            self.logger.warn("Connector {id} is being replaced".format(
-                id=connector_id))
-            del self._connectors[connector_id]
-        self._connectors[connector_id] = conn
+        pool = self._pool(contype, conn.username,
+                          lambda: connector_class(self, *args, **kwargs))
+        if pool.registered is not None:
+            self.logger.debug("Connector {id} registered again".format(
+                id=self._get_connector_id(contype, conn.username)))
+        pool.register(conn)
 
-        return self._connectors[connector_id]
+        return conn
 
     def create_logged_in_connector(self, set_as_default=None, contype=None,
                                    *args, **kwargs):
@@ -223,15 +235,21 @@ class Sumo(Logging):
         removes a  connector, sets default connector to None if removing the
         default connector
 
+        The pool of the connector is closed too, which drops the connector,
+        see L{connector_pool}.
+
         @param contype: type of connector, defined in L{Connector} class
         @param username: sumo username used by connector
         @type username: string
         '''
+
         if self.default_connector == self.connector(contype, username):
             self._default_connector = None
 
         connector_id = self._get_connector_id(contype, username)
-        del self._connectors[connector_id]
+        with self._connectors_lock:
+            pool = self._connectors.pop(connector_id)
+        pool.close()
 
     def _get_connector_id(self, contype, user):
         '''
@@ -280,11 +298,107 @@ class Sumo(Logging):
             return self.default_connector
 
         connector_id = self._get_connector_id(contype, username)
-        if connector_id not in self._connectors.keys():
+        with self._connectors_lock:
+            pool = self._connectors.get(connector_id)
+        if pool is None or pool.registered is None:
             raise InvalidConnector("Connector {id} does not exist".format(
                 id=connector_id))
 
-        return self._connectors[connector_id]
+        return pool.registered
+
+    def connector_pool(self, contype=None, username=None, password=None,
+                       size=4, idle_timeout=300, health_check=None,
+                       check_after=30, *args, **kwargs):
+        '''
+        Returns the pool of connectors of a type and user, creating it on
+        first use.
+
+        Besides the registered connector L{connector} returns, a pool hands
+        each thread its own connector, so parallel tests of the same account
+        neither share headers nor create a connector per test. The size and
+        other settings only apply when the pool is created. Pooled
+        connectors are created with the arguments of L{create_connector} if
+        it created the pool, otherwise with username, password and any other
+        argument given here.
+
+        @param contype: type of connector, defined in L{Connector} class,
+            defaults to Connector.REST
+        @param username: sumo username, defaults to L{username}
+        @type username: str
+        @param password: sumo password, defaults to L{password}
+        @type password: str
+        @param size: The most connectors of the pool
+        @type size: int
+        @param idle_timeout: Seconds after which an idle connector is evicted
+        @type idle_timeout: float
+        @param health_check: Function that takes a connector that was idle
+            for a while and returns whether it is still usable
+        @type health_check: function
+        @param check_after: Seconds a connector must have been idle before
+            the health check is run on it
+        @type check_after: float
+        @rtype: L{ConnectorPool<testingframework.connector.pool.ConnectorPool>}
+        '''
+        contype = contype or Connector.REST
+        if contype not in self._CONNECTOR_TYPE_TO_CLASS_MAPPINGS:
+            raise UnsupportedConnectorError
+        username = username or self.username
+        password = self.password if password is None else password
+        connector_class = self._CONNECTOR_TYPE_TO_CLASS_MAPPINGS[contype]
+        return self._pool(contype, username,
+                          lambda: connector_class(self, username, password,
+                                                  *args, **kwargs),
+                          size=size, idle_timeout=idle_timeout,
+                          health_check=health_check, check_after=check_after)
+
+    def _pool(self, contype, username, factory, **kwargs):
+        '''
+        Returns the pool of a type and user, creating it with factory and
+        the pool settings in kwargs on first use.
+        '''
+        connector_id = self._get_connector_id(contype, username)
+        with self._connectors_lock:
+            if connector_id not in self._connectors:
+                self._connectors[connector_id] = ConnectorPool(
+                    factory, close=self._close_connector, **kwargs)
+            return self._connectors[connector_id]
+
+    def borrow_connector(self, contype=None, username=None, password=None,
+                         timeout=None, **kwargs):
+        '''
+        Borrows a connector of the pool of a type and user for the duration
+        of a C{with} block, see L{connector_pool}.
+
+        >>> with sumo.borrow_connector(username=user, password=pw) as conn:
+        ...     response, content = conn.make_request('GET', 'collectors')
+
+        @param timeout: Seconds to wait for a free connector, None means
+            forever
+        @type timeout: float
+        @raise PoolTimeout: If no connector became free in time.
+        '''
+        pool = self.connector_pool(contype, username, password, **kwargs)
+        return pool.borrow(timeout)
+
+    def close_connector_pools(self):
+        '''
+        Drops all connector pools and the connectors they hold, including
+        the registered connectors.
+        '''
+        with self._connectors_lock:
+            pools = self._connectors.values()
+            self._connectors = {}
+        self._default_connector = None
+        for pool in pools:
+            pool.close()
+
+    def _close_connector(self, conn):
+        '''
+        Releases a connector dropped from a pool.
+        '''
+        self.unregister_start_listener(conn)
+        if hasattr(conn, 'close'):
+            conn.close()
 
     def jobs(self, contype=None, username=None):
         '''
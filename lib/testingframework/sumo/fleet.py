@@ -0,0 +1,309 @@
+'''
+Module for running the same requests against several Sumo deployments at
+once and comparing what they return.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-20
+'''
+
+import json
+import time
+
+from testingframework.log import Logging
+from testingframework.connector.base import Connector
+from testingframework.util.concurrency import WorkerPool, gather
+from .aws import AWSSumo
+
+# The API url of every deployment in DEPLOYMENT_COLLECTOR_URL_MAP we know it
+# for.
+DEPLOYMENT_API_URL_MAP = {
+    'NITE': 'https://nite-api.sumologic.net/api/v1/',
+    'STAG': 'https://stag-api.sumologic.net/api/v1/',
+    'LONG': 'https://long-api.sumologic.net/api/v1/',
+    'PROD': 'https://api.sumologic.com/api/v1/',
+    'DUB': 'https://api.eu.sumologic.com/api/v1/',
+    'SYD': 'https://api.au.sumologic.com/api/v1/',
+    'US2': 'https://api.us2.sumologic.com/api/v1/',
+    'US4': 'https://api.us4.sumologic.com/api/v1/',
+}
+JSON_HEADERS = {'accept': 'application/json',
+                'content-type': 'application/json'}
+
+
+class SumoFleet(Logging):
+    '''
+    A number of Sumo deployments that requests are fanned out to.
+
+    Every request is sent to all deployments concurrently, each with a
+    connector borrowed from the deployment's
+    L{connector_pool<testingframework.sumo.base.Sumo.connector_pool>}, so a
+    release can be validated on all deployments in the time of the slowest
+    one. The responses are returned by deployment together with the time
+    each took, and L{compare} lines up a value extracted from each of them.
+
+    >>> fleet = SumoFleet.from_names(['NITE', 'STAG', 'LONG'])
+    >>> fleet.connect(credentials={'NITE': (id, key), ...})
+    >>> responses = fleet.request('POST', 'metrics/results', query)
+    >>> print format_comparison(SumoFleet.compare(responses, first_value))
+
+    @ivar _deployments: The Sumo deployments by name.
+    @ivar _credentials: The (username, password) used on each deployment.
+    @ivar _max_in_flight: The most deployments requested at once.
+    '''
+
+    def __init__(self, deployments, max_in_flight=None):
+        '''
+        Creates a new fleet.
+
+        @param deployments: The deployments by name, each a Sumo or its API
+                            url.
+        @type deployments: dict
+        @param max_in_flight: The most deployments requested at once,
+                              defaults to all of them.
+        @type max_in_flight: int
+        '''
+        Logging.__init__(self)
+        self._deployments = {}
+        for name, sumo in deployments.items():
+            if isinstance(sumo, basestring):
+                sumo = AWSSumo(str(sumo), name=name)
+            self._deployments[name] = sumo
+        self._credentials = {}
+        self._max_in_flight = max_in_flight or len(self._deployments) or 1
+
+    @classmethod
+    def from_names(cls, names=None, max_in_flight=None):
+        '''
+        Creates a fleet of deployments known by name.
+
+        @param names: The names, e.g. C{['NITE', 'STAG', 'LONG']}, None for
+                      all of L{DEPLOYMENT_API_URL_MAP}.
+        @type names: list(str)
+        @raise KeyError: If the API url of a deployment is not known.
+        @rtype: L{SumoFleet}
+        '''
+        names = [name.upper() for name in names or DEPLOYMENT_API_URL_MAP]
+        return cls(dict((name, DEPLOYMENT_API_URL_MAP[name])
+                        for name in names), max_in_flight)
+
+    @property
+    def names(self):
+        '''
+        The names of the deployments, sorted.
+
+        @rtype: list(str)
+        '''
+        return sorted(self._deployments)
+
+    def sumo(self, name):
+        '''
+        Returns a deployment by name.
+
+        @rtype: L{Sumo<testingframework.sumo.base.Sumo>}
+        '''
+        return self._deployments[name]
+
+    def connect(self, username=None, password=None, credentials=None):
+        '''
+        Sets the credentials requests are sent with.
+
+        @param username: The username used on every deployment that has no
+                         credentials of its own.
+        @type username: str
+        @param password: The password that goes with username.
+        @type password: str
+        @param credentials: The (username, password) by deployment name, for
+                            access keys that differ per deployment.
+        @type credentials: dict
+        '''
+        credentials = credentials or {}
+        for name, sumo in self._deployments.items():
+            self._credentials[name] = credentials.get(
+                name, (username or sumo.username,
+                       sumo.password if password is None else password))
+
+    def request(self, method, path, body=None, urlparam=None,
+                use_sessionkey=False, contype=None):
+        '''
+        Sends the same request to every deployment.
+
+        A deployment that fails, e.g. because it cannot be reached, gets its
+        exception as C{error} instead of failing the whole request.
+
+        @param method: The HTTP method.
+        @type method: str
+        @param path: The uri relative to the API url, e.g.
+                     C{metrics/results}.
+        @type path: str
+        @param body: The body, for JSON endpoints a dict or its dump.
+        @type body: dict or str
+        @param urlparam: The url parameters.
+        @type urlparam: dict
+        @param use_sessionkey: Whether to log in rather than use basic auth.
+        @type use_sessionkey: bool
+        @param contype: type of connector, defined in L{Connector} class,
+            defaults to Connector.REST
+        @return: For every deployment name the C{status}, the decoded JSON
+                 C{content} (the raw content if it is not JSON), the
+                 C{seconds} the request took and the C{error} it raised.
+        @rtype: dict
+        '''
+        if isinstance(body, dict):
+            body = json.dumps(body)
+        return self.map(lambda name: self._request(
+            name, contype or Connector.REST, method, path, body, urlparam,
+            use_sessionkey))
+
+    def metrics_query(self, queries, start_time, end_time,
+                      requested_data_points=600, max_data_points=800):
+        '''
+        Runs a metrics query on every deployment.
+
+        @param queries: The metrics queries, the first has row id A and so
+                        on.
+        @type queries: list(str)
+        @param start_time: The start of the time range in epoch ms.
+        @type start_time: int
+        @param end_time: The end of the time range in epoch ms.
+        @type end_time: int
+        @return: See L{request}.
+        @rtype: dict
+        '''
+        body = {'query': [{'query': query, 'rowId': chr(ord('A') + index)}
+                          for index, query in enumerate(queries)],
+                'startTime': start_time, 'endTime': end_time,
+                'requestedDataPoints': requested_data_points,
+                'maxDataPoints': max_data_points}
+        return self.request('POST', 'metrics/results', body)
+
+    def final_event_counts(self, search_strings, **kwargs):
+        '''
+        Waits for the final event counts of searches on every deployment,
+        see L{get_final_event_counts<testingframework.sumo.aws.AWSSumo.get_final_event_counts>}.
+
+        Any other argument is passed to C{get_final_event_counts}.
+
+        @param search_strings: The search strings
+        @type search_strings: list(str)
+        @return: For every deployment name the counts by search string as
+                 C{content}, the C{seconds} until all were stable and the
+                 C{error} raised.
+        @rtype: dict
+        '''
+        def counts(name):
+            started = time.time()
+            content = self._deployments[name].get_final_event_counts(
+                search_strings, **kwargs)
+            return {'status': None, 'content': content,
+                    'seconds': time.time() - started, 'error': None}
+        return self.map(counts)
+
+    def map(self, function):
+        '''
+        Calls function with the name of every deployment concurrently.
+
+        An exception raised for a deployment is returned as its C{error}.
+
+        @param function: Function that takes a deployment name and returns a
+                         dict.
+        @type function: function
+        @return: The result of every deployment by name.
+        @rtype: dict
+        '''
+        names = self.names
+        workers = WorkerPool(min(self._max_in_flight, len(names) or 1),
+                             name=self.__class__.__name__)
+        try:
+            results = gather([workers.submit(_timed, function, name)
+                              for name in names])
+        finally:
+            workers.shutdown()
+        for name, result in zip(names, results):
+            if result['error'] is not None:
+                self.logger.warn('{n} failed: {e}'.format(
+                    n=name, e=result['error']))
+        return dict(zip(names, results))
+
+    def _request(self, name, contype, method, path, body, urlparam,
+                 use_sessionkey):
+        sumo = self._deployments[name]
+        username, password = self._credentials.get(
+            name, (sumo.username, sumo.password))
+        with sumo.borrow_connector(contype, username, password) as conn:
+            started = time.time()
+            response, content = conn.make_request(
+                method, sumo.sumo_url + path, body, urlparam,
+                use_sessionkey=use_sessionkey, headers=JSON_HEADERS)
+            seconds = time.time() - started
+        try:
+            content = json.loads(content)
+        except ValueError:
+            pass
+        return {'status': response.status, 'content': content,
+                'seconds': seconds, 'error': None}
+
+    @staticmethod
+    def compare(responses, extract=None):
+        '''
+        Lines up a value of the responses of every deployment.
+
+        @param responses: The responses by deployment name, from L{request}.
+        @type responses: dict
+        @param extract: Function that takes the content of a response and
+                        returns the value to compare, None to compare the
+                        whole content.
+        @type extract: function
+        @return: The C{values}, C{seconds} and C{errors} by deployment name,
+                 and whether all deployments that answered are
+                 C{consistent}. A deployment whose value could not be
+                 extracted has its exception under C{errors}.
+        @rtype: dict
+        '''
+        values, seconds, errors = {}, {}, {}
+        for name, response in responses.items():
+            seconds[name] = response['seconds']
+            if response['error'] is not None:
+                errors[name] = response['error']
+                continue
+            try:
+                values[name] = extract(response['content']) if extract \
+                    else response['content']
+            except (KeyError, IndexError, TypeError, ValueError), e:
+                errors[name] = e
+        distinct = []
+        for value in values.values():
+            if value not in distinct:
+                distinct.append(value)
+        return {'values': values, 'seconds': seconds, 'errors': errors,
+                'consistent': len(distinct) <= 1}
+
+
+def _timed(function, name):
+    started = time.time()
+    try:
+        return function(name)
+    except Exception, e:
+        return {'status': None, 'content': None,
+                'seconds': time.time() - started, 'error': e}
+
+
+def format_comparison(comparison):
+    '''
+    Formats a comparison of L{SumoFleet.compare} as a table with a line per
+    deployment.
+
+    @param comparison: The comparison.
+    @type comparison: dict
+    @rtype: str
+    '''
+    lines = ['%-10s %10s  %s' % ('deployment', 'seconds', 'value')]
+    for name in sorted(comparison['seconds']):
+        if name in comparison['errors']:
+            value = 'error: %s' % comparison['errors'][name]
+        else:
+            value = json.dumps(comparison['values'][name], sort_keys=True)
+        lines.append('%-10s %10.3f  %s' % (name, comparison['seconds'][name],
+                                           value[:200]))
+    lines.append('consistent: %s' % comparison['consistent'])
+    return '\n'.join(lines)
@@ -0,0 +1,738 @@
+'''
+Module with an in-process stand-in for the Sumo API.
+
+The stand-in is a small HTTP server that emulates the endpoints the tests and
+the framework call, so connector, polling and concurrency changes can be
+exercised and benchmarked without a live deployment:
+
+>>> with StandInSumo(latency=0.05) as standin:
+...     sumo = AWSSumo(standin.url)
+...     conn = sumo.create_connector(username='id', password='key')
+...     conn.make_request('GET', standin.url + 'collectors')
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-24
+'''
+
+import BaseHTTPServer
+import SocketServer
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import urlparse
+import zlib
+
+from testingframework.log import Logging
+
+DEFAULT_METRICS = ['CPU_Idle', 'CPU_IOWait', 'CPU_LoadAvg_1min',
+                   'CPU_LoadAvg_5min', 'CPU_LoadAvg_15min', 'CPU_Sys',
+                   'CPU_User', 'Disk_Reads', 'Disk_Writes', 'Mem_Free',
+                   'Mem_Used', 'Net_InBytes', 'Net_OutBytes']
+DEFAULT_VERSIONS = ['19.155-5', '19.162-12', '19.170-3']
+JOB_DONE = 'DONE GATHERING RESULTS'
+JOB_GATHERING = 'GATHERING RESULTS'
+UPGRADE_RUNNING = 1
+UPGRADE_DONE = 2
+LOGIN_ENDPOINT = 'authentication/loginwithcredentials'
+# Responses of at least this size are gzipped if the client accepts it.
+GZIP_MIN_BYTES = 1024
+
+
+class StandInSumo(Logging):
+    '''
+    An in-process stand-in for a Sumo API deployment.
+
+    Point L{AWSSumo<testingframework.sumo.aws.AWSSumo>} at L{url} to use it.
+
+    Emulated endpoints, relative to L{url}:
+      - C{authentication/loginwithcredentials}
+      - C{collectors} and C{collectors/{id}}
+      - C{collectors/{id}/sources} and C{collectors/{id}/sources/{id}}
+      - C{collectors/upgrades/targets}, C{collectors/upgrades} and
+        C{collectors/upgrades/{id}}
+      - C{search/jobs}, C{search/jobs/{id}} and C{search/jobs/{id}/messages}
+      - C{metrics/results}, C{metrics/meta/catalog/query} and
+        C{metrics/suggest/autocomplete}
+      - C{reports/{id}}, C{reports/{id}/sessionids} and
+        C{reports/{id}/sessionidsV2}
+
+    Single resources carry an C{ETag}; a PUT or DELETE with a stale
+    C{If-Match} gets C{412} and a GET with a current C{If-None-Match} gets
+    C{304}. List endpoints accept C{limit} and C{offset}. Search queries are
+    not evaluated, every job returns the stored messages.
+
+    Requests without an C{Authorization} header or the C{ApiSession} of a
+    login are challenged with C{401} like the real API does. Sessions never
+    expire unless L{expire_sessions} is called.
+
+    @ivar latency: Seconds every request is delayed.
+    @ivar jitter: Up to this many seconds are added to the latency at random.
+    @ivar endpoint_latency: Extra seconds per endpoint, keyed by a substring
+                            of the path, e.g. C{{'metrics/results': 0.5}}.
+    @ivar job_duration: Seconds a search job gathers results before it is
+                        done.
+    @ivar upgrade_duration: Seconds a collector upgrade runs before it is
+                            done.
+    @ivar requests: Count of handled requests by method and endpoint.
+    '''
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 endpoint_latency=None, job_duration=1.0,
+                 upgrade_duration=1.0, message_count=250, metrics=None,
+                 versions=None, panel_duration=0.5):
+        '''
+        Creates a new stand-in. It is not serving until L{start} is called.
+
+        @param host: The interface to listen on.
+        @type host: str
+        @param port: The port to listen on, 0 picks a free one.
+        @type port: int
+        @param latency: Seconds every request is delayed.
+        @type latency: float
+        @param jitter: Up to this many seconds are added to the latency.
+        @type jitter: float
+        @param endpoint_latency: Extra seconds per endpoint path substring.
+        @type endpoint_latency: dict
+        @param job_duration: Seconds until a search job is done.
+        @type job_duration: float
+        @param upgrade_duration: Seconds until a collector upgrade is done.
+        @type upgrade_duration: float
+        @param message_count: Number of synthetic messages every search
+                              returns.
+        @type message_count: int
+        @param metrics: The metric names in the catalog.
+        @type metrics: list(str)
+        @param versions: The collector versions to upgrade to, the last one
+                         is the latest.
+        @type versions: list(str)
+        @param panel_duration: Mean seconds until a dashboard panel is done.
+        @type panel_duration: float
+        '''
+        Logging.__init__(self)
+        self._host = host
+        self._port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.endpoint_latency = endpoint_latency or {}
+        self.job_duration = job_duration
+        self.upgrade_duration = upgrade_duration
+        self.panel_duration = panel_duration
+        self.requests = {}
+        self._metrics = list(metrics or DEFAULT_METRICS)
+        self._versions = list(versions or DEFAULT_VERSIONS)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(100000001)
+        self._collectors = {}
+        self._sources = {}
+        self._jobs = {}
+        self._upgrades = {}
+        self._sessions = set()
+        self._faults = []
+        self._reports = {}
+        self._panel_sessions = {}
+        self._messages = [_message(i) for i in range(message_count)]
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        '''
+        The API url to give to L{AWSSumo<testingframework.sumo.aws.AWSSumo>}.
+
+        @rtype: str
+        '''
+        host, port = self._server.server_address
+        return 'http://{h}:{p}/api/v1/'.format(h=host, p=port)
+
+    def start(self):
+        '''
+        Starts serving on a background thread.
+        '''
+        self._server = _Server((self._host, self._port), _Handler)
+        self._server.standin = self
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name=self.__class__.__name__)
+        self._thread.daemon = True
+        self._thread.start()
+        self.logger.info('Serving stand-in Sumo API at {u}'.format(u=self.url))
+
+    def stop(self):
+        '''
+        Stops serving.
+        '''
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+
+    def add_collector(self, name, alive=True, **fields):
+        '''
+        Adds a collector.
+
+        @param name: The collector name.
+        @type name: str
+        @param alive: Whether the collector is alive.
+        @type alive: bool
+        @return: The new collector.
+        @rtype: dict
+        '''
+        with self._lock:
+            collector = {'id': next(self._ids), 'name': name, 'alive': alive,
+                         'collectorType': 'Installable',
+                         'collectorVersion': self._versions[0],
+                         'ephemeral': False, 'sourceSyncMode': 'UI'}
+            collector.update(fields)
+            self._collectors[collector['id']] = collector
+            self._sources[collector['id']] = {}
+            return collector
+
+    def add_report(self, name, panels=20):
+        '''
+        Adds a dashboard.
+
+        @param name: The report name.
+        @type name: str
+        @param panels: The number of panels.
+        @type panels: int
+        @return: The new report.
+        @rtype: dict
+        '''
+        with self._lock:
+            report = {'id': next(self._ids), 'name': name, 'panels': [
+                {'id': next(self._ids), 'name': 'Panel %d' % index,
+                 'metricsQueries': [{'rowId': 'A', 'query':
+                                     'metric=%s' % self._metrics[
+                                         index % len(self._metrics)]}]}
+                for index in range(panels)]}
+            self._reports[report['id']] = report
+            return report
+
+    def add_messages(self, messages):
+        '''
+        Adds messages that every search returns.
+
+        @param messages: The message fields, one dict per message.
+        @type messages: list(dict)
+        '''
+        with self._lock:
+            self._messages.extend(messages)
+
+    # Request dispatching
+
+    def _handle(self, method, path, query, headers, body):
+        '''
+        Handles one request.
+
+        @return: The status, extra headers and JSON document of the response.
+        @rtype: tuple
+        '''
+        endpoint = _endpoint(path)
+        self._delay(endpoint)
+        with self._lock:
+            key = '{m} {e}'.format(m=method, e=endpoint)
+            self.requests[key] = self.requests.get(key, 0) + 1
+        fault = self._take_fault(endpoint)
+        if fault is not None:
+            status, retry_after = fault
+            extra = {} if retry_after is None else \
+                {'Retry-After': str(retry_after)}
+            return status, extra, _error(status, 'injected.failure')
+        if endpoint != LOGIN_ENDPOINT and not self._authorized(headers):
+            return 401, {'WWW-Authenticate': 'Basic realm="Sumo"'}, \
+                {'status': 401, 'code': 'unauthorized',
+                 'message': 'Credential could not be verified.'}
+        for pattern, handlers in _ROUTES:
+            match = pattern.match(endpoint)
+            if match is None:
+                continue
+            if method not in handlers:
+                return 405, {}, _error(405, 'method.not.allowed')
+            request = _Request(method, match.groupdict(), query, headers,
+                               body)
+            with self._lock:
+                return getattr(self, handlers[method])(request)
+        return 404, {}, _error(404, 'not.found')
+
+    def _authorized(self, headers):
+        '''
+        Whether a request has basic credentials or a live session.
+        '''
+        if headers.get('authorization'):
+            return True
+        with self._lock:
+            return headers.get('apisession') in self._sessions
+
+    def inject_failures(self, endpoint, count, status=503, retry_after=None):
+        '''
+        Makes the next requests to an endpoint fail.
+
+        @param endpoint: A substring of the endpoints to fail, e.g.
+                         C{metrics/results}.
+        @type endpoint: str
+        @param count: The number of requests to fail.
+        @type count: int
+        @param status: The status of the failed requests.
+        @type status: int
+        @param retry_after: The Retry-After seconds to send, None for none.
+        @type retry_after: int
+        '''
+        with self._lock:
+            self._faults.append([endpoint, count, status, retry_after])
+
+    def _take_fault(self, endpoint):
+        with self._lock:
+            for fault in self._faults:
+                if fault[0] in endpoint and fault[1] > 0:
+                    fault[1] -= 1
+                    return fault[2], fault[3]
+        return None
+
+    def expire_sessions(self):
+        '''
+        Drops all sessions, requests using them get a 401 from now on.
+        '''
+        with self._lock:
+            self._sessions.clear()
+
+    def _delay(self, endpoint):
+        delay = self.latency + random.uniform(0, self.jitter)
+        for part, extra in self.endpoint_latency.items():
+            if part in endpoint:
+                delay += extra
+        if delay > 0:
+            time.sleep(delay)
+
+    # Sessions
+
+    def _login(self, request):
+        document = request.json()
+        if not document.get('email') or not document.get('password'):
+            return 401, {}, _error(401, 'login.invalid.credentials')
+        session_id = '%016X' % random.getrandbits(64)
+        self._sessions.add(session_id)
+        return 200, {'Set-Cookie': 'JSESSIONID=%032x; Path=/; HttpOnly' %
+                     random.getrandbits(128)}, {'apiSessionId': session_id}
+
+    # Collectors and sources
+
+    def _list_collectors(self, request):
+        collectors = sorted(self._collectors.values(), key=lambda c: c['id'])
+        return _page(request, 'collectors', collectors)
+
+    def _get_collector(self, request):
+        collector = self._collectors.get(request.id('collector'))
+        if collector is None:
+            return 404, {}, _error(404, 'collectors.invalid.collector')
+        return _single(request, 'collector', collector)
+
+    def _update_collector(self, request):
+        collector = self._collectors.get(request.id('collector'))
+        if collector is None:
+            return 404, {}, _error(404, 'collectors.invalid.collector')
+        return _update(request, 'collector', collector)
+
+    def _delete_collector(self, request):
+        collector_id = request.id('collector')
+        if collector_id not in self._collectors:
+            return 404, {}, _error(404, 'collectors.invalid.collector')
+        del self._collectors[collector_id]
+        del self._sources[collector_id]
+        return 200, {}, None
+
+    def _list_sources(self, request):
+        sources = self._sources.get(request.id('collector'))
+        if sources is None:
+            return 404, {}, _error(404, 'collectors.invalid.collector')
+        return _page(request, 'sources',
+                     sorted(sources.values(), key=lambda s: s['id']))
+
+    def _create_source(self, request):
+        sources = self._sources.get(request.id('collector'))
+        if sources is None:
+            return 404, {}, _error(404, 'collectors.invalid.collector')
+        source = request.json().get('source')
+        if not source or 'name' not in source:
+            return 400, {}, _error(400, 'sources.invalid.source')
+        if any(each['name'] == source['name'] for each in sources.values()):
+            return 400, {}, _error(400, 'sources.duplicate.name')
+        source = dict(source, id=next(self._ids), alive=True)
+        sources[source['id']] = source
+        return 201, {'ETag': _etag(source)}, {'source': source}
+
+    def _get_source(self, request):
+        source = self._find_source(request)
+        if source is None:
+            return 404, {}, _error(404, 'sources.invalid.source')
+        return _single(request, 'source', source)
+
+    def _update_source(self, request):
+        source = self._find_source(request)
+        if source is None:
+            return 404, {}, _error(404, 'sources.invalid.source')
+        return _update(request, 'source', source)
+
+    def _delete_source(self, request):
+        source = self._find_source(request)
+        if source is None:
+            return 404, {}, _error(404, 'sources.invalid.source')
+        del self._sources[request.id('collector')][source['id']]
+        return 200, {}, None
+
+    def _find_source(self, request):
+        sources = self._sources.get(request.id('collector'), {})
+        return sources.get(request.id('source'))
+
+    # Collector upgrades
+
+    def _upgrade_targets(self, request):
+        targets = [{'version': version,
+                    'latest': index == len(self._versions) - 1}
+                   for index, version in enumerate(self._versions)]
+        return 200, {}, {'targets': targets}
+
+    def _create_upgrade(self, request):
+        document = request.json()
+        collector = self._collectors.get(document.get('collectorId'))
+        if collector is None:
+            return 400, {}, _error(400, 'collectors.invalid.collector')
+        if document.get('toVersion') not in self._versions:
+            return 400, {}, _error(400, 'upgrade.invalid.version')
+        upgrade_id = next(self._ids)
+        self._upgrades[upgrade_id] = {
+            'id': upgrade_id, 'collectorId': collector['id'],
+            'toVersion': document['toVersion'], 'requestTime': _now_ms()}
+        return 202, {}, {'id': upgrade_id,
+                         'link': {'rel': 'self', 'href':
+                                  '/v1/collectors/upgrades/%s' % upgrade_id}}
+
+    def _get_upgrade(self, request):
+        upgrade = self._upgrades.get(request.id('upgrade'))
+        if upgrade is None:
+            return 404, {}, _error(404, 'upgrade.invalid.id')
+        elapsed = (_now_ms() - upgrade['requestTime']) / 1000.0
+        status = UPGRADE_DONE if elapsed >= self.upgrade_duration \
+            else UPGRADE_RUNNING
+        if status == UPGRADE_DONE:
+            self._collectors[upgrade['collectorId']]['collectorVersion'] = \
+                upgrade['toVersion']
+        return 200, {}, {'upgrade': dict(upgrade, status=status,
+                                         message='')}
+
+    # Search jobs
+
+    def _create_job(self, request):
+        document = request.json()
+        if 'query' not in document:
+            return 400, {}, _error(400, 'searchjob.invalid.query')
+        job_id = '%016X' % random.getrandbits(64)
+        self._jobs[job_id] = {'query': document['query'],
+                              'created': time.time()}
+        return 202, {}, {'id': job_id,
+                         'link': {'rel': 'self', 'href':
+                                  '/v1/search/jobs/%s' % job_id}}
+
+    def _get_job(self, request):
+        job = self._jobs.get(request.params['job'])
+        if job is None:
+            return 404, {}, _error(404, 'jobid.invalid')
+        done = time.time() - job['created'] >= self.job_duration
+        count = len(self._messages)
+        if not done:
+            elapsed = time.time() - job['created']
+            count = int(count * elapsed / self.job_duration)
+        return 200, {}, {'state': JOB_DONE if done else JOB_GATHERING,
+                         'messageCount': count, 'recordCount': 0,
+                         'pendingWarnings': [], 'pendingErrors': [],
+                         'histogramBuckets': []}
+
+    def _delete_job(self, request):
+        if self._jobs.pop(request.params['job'], None) is None:
+            return 404, {}, _error(404, 'jobid.invalid')
+        return 200, {}, None
+
+    def _job_messages(self, request):
+        if request.params['job'] not in self._jobs:
+            return 404, {}, _error(404, 'jobid.invalid')
+        offset, limit = request.window(default_limit=100)
+        messages = self._messages[offset:offset + limit]
+        fields = sorted(set(field for each in messages for field in each))
+        return 200, {}, {'fields': [{'name': field, 'fieldType': 'string',
+                                     'keyField': False} for field in fields],
+                         'messages': [{'map': each} for each in messages]}
+
+    # Dashboards
+
+    def _get_report(self, request):
+        report = self._reports.get(request.id('report'))
+        if report is None:
+            return 404, {}, _error(404, 'report.invalid.id')
+        return 200, {}, report
+
+    def _create_panel_sessions(self, request):
+        report = self._reports.get(request.id('report'))
+        if report is None:
+            return 404, {}, _error(404, 'report.invalid.id')
+        panel_ids = set(str(panel['id']) for panel in report['panels'])
+        results = {}
+        for each in request.json().get('panelTimerangeTuples', []):
+            panel_id = str(each.get('id'))
+            if panel_id not in panel_ids:
+                return 400, {}, _error(400, 'report.invalid.panel')
+            sid = '%016X' % random.getrandbits(64)
+            self._panel_sessions[sid] = {
+                'panel': panel_id, 'created': time.time(),
+                'duration': self.panel_duration * random.uniform(0.5, 1.5)}
+            results[panel_id] = {'searchQueryId': sid}
+        return 200, {}, {'results': results}
+
+    def _poll_panel_session(self, request):
+        session = self._panel_sessions.get(request.query.get('sid', [''])[0])
+        if session is None:
+            return 404, {}, _error(404, 'report.invalid.sid')
+        if time.time() - session['created'] < session['duration']:
+            return 200, {}, {'state': 'InProgress', 'id': session['panel']}
+        return 200, {}, {'state': 'Done', 'id': session['panel'],
+                         'response': [{'rowId': 'A', 'results': []}]}
+
+    # Metrics
+
+    def _metrics_results(self, request):
+        document = request.json()
+        start = document.get('startTime', _now_ms() - 900000)
+        end = document.get('endTime', _now_ms())
+        points = min(document.get('requestedDataPoints', 600),
+                     document.get('maxDataPoints', 800))
+        step = max((end - start) // max(points, 1), 1)
+        timestamps = range(start, end, step)[:points]
+        response = []
+        for row in document.get('query', []):
+            datapoints = {'timestamp': timestamps,
+                          'value': [1.0] * len(timestamps),
+                          'outlierParams': [], 'max': [], 'min': [],
+                          'avg': [], 'sum': [], 'count': []}
+            response.append({'rowId': row.get('rowId'), 'results': [{
+                'metric': {'dimensions': [{'key': 'query',
+                                           'value': row.get('query')}],
+                           'algoId': 1},
+                'datapoints': datapoints}]})
+        return 200, {}, {'response': response, 'queryInfo': {
+            'startTime': start, 'endTime': end, 'desiredQuantizationInSecs':
+            {'empty': False, 'defined': True}}}
+
+    def _metrics_catalog(self, request):
+        document = request.json()
+        offset = int(document.get('offset', 0))
+        limit = int(document.get('limit', 100))
+        results = [{'name': name, 'dimensions': [], 'metaTags': []}
+                   for name in self._metrics]
+        return 200, {}, {'results': results[offset:offset + limit],
+                         'offset': offset, 'limit': limit,
+                         'total': len(results)}
+
+    def _metrics_autocomplete(self, request):
+        document = request.json()
+        query = document.get('query', '')[:document.get('pos')]
+        token = query.split()[-1] if query.split() else ''
+        prefix = token.split('=', 1)[-1]
+        items = [{'display': name, 'value': name}
+                 for name in self._metrics if name.startswith(prefix)]
+        if not items or query.rstrip().endswith('|'):
+            suggestions = []
+        else:
+            suggestions = [{'sectionName': 'Metrics', 'items': items}]
+        return 200, {}, {'queryId': document.get('queryId'),
+                         'query': document.get('query'),
+                         'pos': document.get('pos'),
+                         'suggestions': suggestions}
+
+
+class _Request(object):
+    '''
+    A parsed request handed to the endpoint handlers.
+    '''
+
+    def __init__(self, method, params, query, headers, body):
+        self.method = method
+        self.params = params
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def id(self, name):
+        return int(self.params[name])
+
+    def json(self):
+        try:
+            return json.loads(self.body) if self.body else {}
+        except ValueError:
+            return {}
+
+    def window(self, default_limit=1000):
+        offset = int(self.query.get('offset', ['0'])[0])
+        limit = int(self.query.get('limit', [str(default_limit)])[0])
+        return offset, limit
+
+
+_ROUTES = [(re.compile('^' + pattern + '$'), handlers) for pattern, handlers
+           in [
+    (LOGIN_ENDPOINT, {'POST': '_login'}),
+    ('collectors', {'GET': '_list_collectors'}),
+    ('collectors/upgrades/targets', {'GET': '_upgrade_targets'}),
+    ('collectors/upgrades', {'POST': '_create_upgrade'}),
+    (r'collectors/upgrades/(?P<upgrade>\d+)', {'GET': '_get_upgrade'}),
+    (r'collectors/(?P<collector>\d+)', {'GET': '_get_collector',
+                                        'PUT': '_update_collector',
+                                        'DELETE': '_delete_collector'}),
+    (r'collectors/(?P<collector>\d+)/sources', {'GET': '_list_sources',
+                                                'POST': '_create_source'}),
+    (r'collectors/(?P<collector>\d+)/sources/(?P<source>\d+)',
+     {'GET': '_get_source', 'PUT': '_update_source',
+      'DELETE': '_delete_source'}),
+    ('search/jobs', {'POST': '_create_job'}),
+    (r'search/jobs/(?P<job>[0-9A-F]+)', {'GET': '_get_job',
+                                         'DELETE': '_delete_job'}),
+    (r'search/jobs/(?P<job>[0-9A-F]+)/messages', {'GET': '_job_messages'}),
+    (r'reports/(?P<report>\d+)', {'GET': '_get_report'}),
+    (r'reports/(?P<report>\d+)/sessionids',
+     {'POST': '_create_panel_sessions'}),
+    (r'reports/(?P<report>\d+)/sessionidsV2',
+     {'GET': '_poll_panel_session'}),
+    ('metrics/results', {'POST': '_metrics_results'}),
+    ('metrics/meta/catalog/query', {'POST': '_metrics_catalog'}),
+    ('metrics/suggest/autocomplete', {'POST': '_metrics_autocomplete'}),
+]]
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    '''
+    Parses requests and writes the responses of the stand-in.
+    '''
+    protocol_version = 'HTTP/1.1'
+    # Without these the headers go out in many small writes and Nagle's
+    # algorithm adds tens of milliseconds to every response.
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        parsed = urlparse.urlparse(self.path)
+        length = int(self.headers.get('content-length') or 0)
+        body = self.rfile.read(length) if length else ''
+        headers = dict((key.lower(), value)
+                       for key, value in self.headers.items())
+        if headers.get('content-encoding') == 'gzip':
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        status, extra_headers, document = self.server.standin._handle(
+            self.command, parsed.path, urlparse.parse_qs(parsed.query),
+            headers, body)
+        content = '' if document is None else json.dumps(document)
+        gzipped = len(content) >= GZIP_MIN_BYTES and \
+            'gzip' in headers.get('accept-encoding', '')
+        if gzipped:
+            compressor = zlib.compressobj(6, zlib.DEFLATED,
+                                          16 + zlib.MAX_WBITS)
+            content = compressor.compress(content) + compressor.flush()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(content)))
+        for key, value in extra_headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        self.server.standin.logger.debug(format % args)
+
+
+def _endpoint(path):
+    '''
+    The path relative to the API root, e.g. C{collectors/1/sources}.
+    '''
+    path = path.strip('/')
+    for prefix in ('api/v1/', 'api/'):
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return path
+
+
+def _page(request, key, items):
+    offset, limit = request.window()
+    document = {key: items[offset:offset + limit]}
+    return _conditional(request, document)
+
+
+def _single(request, key, item):
+    return _conditional(request, {key: item})
+
+
+def _conditional(request, document):
+    etag = _etag(document)
+    if request.headers.get('if-none-match') == etag:
+        return 304, {'ETag': etag}, None
+    return 200, {'ETag': etag}, document
+
+
+def _update(request, key, item):
+    if_match = request.headers.get('if-match')
+    if if_match is not None and if_match != _etag({key: item}):
+        return 412, {}, _error(412, 'precondition.failed')
+    changes = request.json().get(key)
+    if not changes:
+        return 400, {}, _error(400, key + 's.invalid.' + key)
+    changes.pop('id', None)
+    item.update(changes)
+    document = {key: item}
+    return 200, {'ETag': _etag(document)}, document
+
+
+def _etag(document):
+    return '"%s"' % hashlib.md5(json.dumps(document, sort_keys=True)) \
+        .hexdigest()
+
+
+def _error(status, code):
+    return {'status': status, 'code': code, 'message': code}
+
+
+def _message(index):
+    now = _now_ms()
+    return {'_messageid': str(index), '_messagetime': str(now - index),
+            '_receipttime': str(now), '_source': 'standin',
+            '_sourcecategory': 'standin', '_sourcehost': 'localhost',
+            '_raw': 'stand-in message {i}'.format(i=index)}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
@@ -0,0 +1,225 @@
+'''
+Module with small helpers for running work concurrently on threads.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-16
+'''
+
+import logging
+import sys
+import threading
+import Queue
+
+from testingframework.exceptions.wait import WaitTimedOut
+
+LOGGER = logging.getLogger('Concurrency')
+
+
+class Future(object):
+    '''
+    The pending result of a call running on a L{WorkerPool}.
+
+    @ivar _done: Set when the call has finished.
+    @ivar _result: The return value of the call.
+    @ivar _exc_info: The exception info if the call raised.
+    '''
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        '''
+        Checks if the call has finished.
+
+        @rtype: bool
+        '''
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        '''
+        Waits for the call to finish and returns its return value.
+
+        If the call raised, the exception is re-raised here.
+
+        @param timeout: The maximum time to wait in seconds, None means forever
+        @type timeout: int
+        @raise WaitTimedOut: If the call isn't done after C{timeout} seconds.
+        '''
+        self._wait(timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        '''
+        Waits for the call to finish and returns the exception it raised, or
+        None if it did not raise.
+
+        @param timeout: The maximum time to wait in seconds, None means forever
+        @type timeout: int
+        @raise WaitTimedOut: If the call isn't done after C{timeout} seconds.
+        '''
+        self._wait(timeout)
+        if self._exc_info is None:
+            return None
+        return self._exc_info[1]
+
+    def add_done_callback(self, callback):
+        '''
+        Calls C{callback(future)} once the call has finished. If it already
+        has the callback is called right away.
+
+        A callback that raises later on is logged and does not keep the
+        other callbacks from being called, nor fail whoever finished the
+        call.
+
+        @param callback: The function to call.
+        @type callback: function
+        '''
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                LOGGER.exception('Done callback %r raised', callback)
+
+    def _wait(self, timeout):
+        # Event.wait without a timeout can't be interrupted with ctrl-c in
+        # Python 2, so we wait in slices.
+        if timeout is None:
+            while not self._done.wait(60):
+                pass
+        elif not self._done.wait(timeout):
+            raise WaitTimedOut(timeout)
+
+
+class WorkerPool(object):
+    '''
+    A fixed number of daemon threads that run submitted calls.
+
+    The threads are started lazily on the first L{submit}.
+
+    @ivar _size: The number of worker threads.
+    @ivar _tasks: The queue of calls waiting for a worker.
+    '''
+
+    def __init__(self, size, name='worker'):
+        '''
+        Creates a new worker pool.
+
+        @param size: The number of worker threads.
+        @type size: int
+        @param name: Prefix for the names of the worker threads.
+        @type name: str
+        '''
+        if size < 1:
+            raise ValueError('Worker pool size must be at least 1')
+        self._size = size
+        self._name = name
+        self._tasks = Queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        '''
+        The number of worker threads.
+
+        @rtype: int
+        '''
+        return self._size
+
+    def submit(self, function, *args, **kwargs):
+        '''
+        Schedules C{function(*args, **kwargs)} to run on a worker thread.
+
+        @return: The future result of the call.
+        @rtype: L{Future}
+        '''
+        self._start()
+        future = Future()
+        self._tasks.put((future, function, args, kwargs))
+        return future
+
+    def shutdown(self, wait=False):
+        '''
+        Stops the worker threads once the already submitted calls are done.
+
+        @param wait: If True this call blocks until the threads have stopped.
+        @type wait: bool
+        '''
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self._size:
+                thread = threading.Thread(
+                    target=self._work, name='{n}-{i}'.format(
+                        n=self._name, i=len(self._threads)))
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            future, function, args, kwargs = task
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                future.set_exc_info(sys.exc_info())
+            else:
+                future.set_result(result)
+
+
+def gather(futures, return_exceptions=False, timeout=None):
+    '''
+    Waits for all futures and returns their results in the same order.
+
+    @param futures: The futures to wait for.
+    @type futures: list(L{Future})
+    @param return_exceptions: If True exceptions are returned in place of the
+                              result, otherwise the first one is raised.
+    @type return_exceptions: bool
+    @param timeout: The maximum time to wait for each future in seconds, None
+                    means forever.
+    @type timeout: int
+    @rtype: list
+    '''
+    results = []
+    for future in futures:
+        if return_exceptions:
+            results.append(future.exception(timeout) or future.result())
+        else:
+            results.append(future.result(timeout))
+    return results
@@ -0,0 +1,82 @@
+'''
+Module for waiting until a polled value, such as the event count of a
+search, stops changing.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-18
+'''
+
+import logging
+import time
+
+from testingframework.exceptions.wait import WaitTimedOut
+
+LOGGER = logging.getLogger('Convergence')
+
+
+def wait_for_convergence(poll, stable_for=60, min_interval=1.0,
+                         max_interval=30.0, growth=2.0, timeout=None,
+                         name=None):
+    '''
+    Polls a value until it has not changed for C{stable_for} seconds.
+
+    Polling is adaptive: while the value changes it is polled every
+    C{min_interval} seconds, and every poll that finds it unchanged
+    multiplies the interval by C{growth}, up to C{max_interval}. A value
+    that is still moving is thus followed closely while a plateau costs
+    few polls. The stable time counts from the poll that first saw the
+    final value.
+
+    >>> result = wait_for_convergence(lambda: sumo.get_event_count(query))
+    >>> result['value'], result['converged_after']
+
+    @param poll: Returns the current value when called without arguments.
+    @type poll: callable
+    @param stable_for: Seconds the value must stay the same.
+    @type stable_for: float
+    @param min_interval: Seconds between polls while the value changes.
+    @type min_interval: float
+    @param max_interval: The longest wait between polls.
+    @type max_interval: float
+    @param growth: The factor the interval grows by per unchanged poll.
+    @type growth: float
+    @param timeout: Seconds after which to give up, None to wait forever.
+    @type timeout: float
+    @param name: The name of the value in log messages.
+    @type name: str
+    @return: The final C{value}, C{converged_after} (seconds until the
+             final value was first seen), C{seconds} (until it was
+             confirmed stable) and the number of C{polls}.
+    @rtype: dict
+    @raise WaitTimedOut: If the value did not converge within the timeout.
+    '''
+    started = time.time()
+    name = name or 'value'
+    value = poll()
+    polls = 1
+    same_since = time.time()
+    interval = min_interval
+    while True:
+        now = time.time()
+        if now - same_since >= stable_for:
+            LOGGER.info('%s converged at %s after %.1fs (%d polls)',
+                        name, value, same_since - started, polls)
+            return {'value': value, 'converged_after': same_since - started,
+                    'seconds': now - started, 'polls': polls}
+        # Do not sleep past the point where the value would count as stable
+        wait = min(interval, same_since + stable_for - now)
+        if timeout is not None and now + wait - started > timeout:
+            raise WaitTimedOut(now - started)
+        time.sleep(wait)
+        current = poll()
+        polls += 1
+        if current == value:
+            interval = min(interval * growth, max_interval)
+            LOGGER.debug('%s unchanged at %s, next poll in %.1fs', name,
+                         value, interval)
+        else:
+            LOGGER.debug('%s changed from %s to %s', name, value, current)
+            value = current
+            same_since = time.time()
+            interval = min_interval
@@ -0,0 +1,108 @@
+'''
+Module for locking files between processes, e.g. pytest-xdist workers.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-05
+'''
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock(object):
+    '''
+    An exclusive lock held on a lock file.
+
+    The lock is advisory: it only keeps out the processes and threads that
+    lock the same file. It is released when the holding process dies, so a
+    crashed worker does not leave it behind.
+
+    >>> with FileLock('/tmp/sessions.json.lock'):
+    ...     update('/tmp/sessions.json')
+
+    @ivar _path: The path of the lock file.
+    @ivar _fd: The descriptor of the lock file while the lock is held.
+    '''
+
+    def __init__(self, path):
+        '''
+        Creates a new lock, it is not acquired yet.
+
+        @param path: The path of the lock file, created if missing.
+        @type path: str
+        '''
+        self._path = path
+        self._fd = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def path(self):
+        '''
+        The path of the lock file.
+
+        @rtype: str
+        '''
+        return self._path
+
+    def acquire(self):
+        '''
+        Blocks until the lock is held.
+        '''
+        self._thread_lock.acquire()
+        try:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0600)
+            try:
+                _lock(fd)
+            except:
+                os.close(fd)
+                raise
+        except:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+
+    def release(self):
+        '''
+        Releases the lock.
+        '''
+        fd, self._fd = self._fd, None
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def _lock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        # LK_LOCK retries for 10 seconds before raising
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except IOError:
+                pass
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
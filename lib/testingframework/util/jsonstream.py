@@ -0,0 +1,182 @@
+'''
+Module for decoding the elements of a JSON array as they arrive.
+
+List and search responses of the Sumo API are an object holding one large
+array, e.g. C{{"collectors": [...]}} or C{{"messages": [...]}}. Instead of
+reading and decoding the whole document, L{iter_array} decodes the elements
+of such an array one by one from a stream of chunks, keeping only the
+undecoded rest of the stream in memory:
+
+>>> for collector in iter_array(chunks, 'collectors'):
+...     print collector['name']
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-07-11
+'''
+
+import json
+
+DEFAULT_MAX_BUFFER = 16 * 1024 * 1024
+
+_WHITESPACE = ' \t\n\r'
+# Characters that continue a number after the part already decoded, e.g. the
+# fraction of -500 in a buffer that ends with -500.
+_NUMBER_CONTINUATION = '.eE+-'
+
+
+def iter_array(chunks, key=None, max_buffer=DEFAULT_MAX_BUFFER):
+    '''
+    Yields the elements of a JSON array from a stream of chunks.
+
+    @param chunks: The chunks of the JSON document, e.g. from
+                   L{iter_chunks}.
+    @type chunks: iterable(str)
+    @param key: The key of the array in the top level object, None if the
+                document is the array itself.
+    @type key: str
+    @param max_buffer: The most bytes kept for an element that is not
+                       complete yet.
+    @type max_buffer: int
+    @raise ValueError: If the document is malformed, has no such array or
+                       an element is larger than max_buffer.
+    '''
+    return _ArrayDecoder(iter(chunks), max_buffer).elements(key)
+
+
+def iter_chunks(stream, chunk_size=64 * 1024):
+    '''
+    Yields the chunks read from a file-like object until it is exhausted.
+
+    @param stream: The file-like object, e.g. an C{httplib.HTTPResponse}.
+    @param chunk_size: The bytes read at a time.
+    @type chunk_size: int
+    '''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class _ArrayDecoder(object):
+    '''
+    The state of decoding one document: the undecoded buffer, the position
+    in it and whether the stream is exhausted.
+    '''
+
+    def __init__(self, chunks, max_buffer):
+        self._chunks = chunks
+        self._max_buffer = max_buffer
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def elements(self, key):
+        if key is None:
+            self._expect('[')
+        else:
+            self._seek(key)
+        first = True
+        while True:
+            char = self._next_char()
+            if char == ']':
+                return
+            if not first:
+                if char != ',':
+                    self._fail('Expected , or ]')
+                self._pos += 1
+            first = False
+            yield self._value()
+
+    def _seek(self, key):
+        '''
+        Moves past the '[' of the array under key in the top level object,
+        decoding and dropping the values before it.
+        '''
+        self._expect('{')
+        first = True
+        while True:
+            char = self._next_char()
+            if char == '}':
+                raise ValueError('No array under key {k}'.format(k=key))
+            if not first:
+                if char != ',':
+                    self._fail('Expected , or }')
+                self._pos += 1
+            first = False
+            self._next_char()
+            name = self._value()
+            self._expect(':')
+            if name == key:
+                self._expect('[')
+                return
+            self._value()
+
+    def _value(self):
+        '''
+        Decodes the value at the position, reading more of the stream until
+        it is complete.
+        '''
+        self._next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                value, end = None, None
+            # A value that ends with the buffer may go on in the next chunk,
+            # e.g. a number, unless the stream is exhausted. So may a number
+            # followed by the start of its fraction or exponent.
+            if end is not None and (self._eof or (
+                    end < len(self._buffer) and
+                    not _continues_number(value, self._buffer[end]))):
+                self._pos = end
+                return value
+            if self._eof:
+                self._fail('Truncated or malformed document')
+            self._read()
+
+    def _expect(self, char):
+        if self._next_char() != char:
+            self._fail('Expected {c}'.format(c=char))
+        self._pos += 1
+
+    def _next_char(self):
+        '''
+        Skips whitespace and returns the next character, reading more of the
+        stream as needed.
+        '''
+        while True:
+            while self._pos < len(self._buffer) and \
+                    self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                self._fail('Unexpected end of document')
+            self._read()
+
+    def _read(self):
+        '''
+        Drops the decoded part of the buffer and appends the next chunk.
+        '''
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            return
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        if len(self._buffer) > self._max_buffer:
+            raise ValueError('JSON value larger than {n} bytes'.format(
+                n=self._max_buffer))
+
+    def _fail(self, message):
+        raise ValueError('{m} at {c!r}'.format(
+            m=message, c=self._buffer[self._pos:self._pos + 40]))
+
+
+def _continues_number(value, char):
+    return isinstance(value, (int, long, float)) and \
+        not isinstance(value, bool) and char in _NUMBER_CONTINUATION
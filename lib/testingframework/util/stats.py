@@ -0,0 +1,45 @@
+'''
+Module with small statistics helpers for latency reporting.
+
+@author: Weimin Ma
+@contact: U{weimin@sumologic.com<mailto:weimin@sumologic.com>}
+@since: 2016-06-27
+'''
+
+import math
+
+
+def percentile(values, percent):
+    '''
+    Returns the nearest-rank percentile of the values.
+
+    @param values: The values, sorted ascending.
+    @type values: list(float)
+    @param percent: The percentile to get, between 0 and 100.
+    @type percent: float
+    @return: The percentile, or None if there are no values.
+    @rtype: float
+    '''
+    if not values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def summarize(values, percents=(50, 90, 95, 99)):
+    '''
+    Returns the count, mean, max and the given percentiles of the values.
+
+    @param values: The values, in any order.
+    @type values: list(float)
+    @param percents: The percentiles to include.
+    @type percents: tuple(float)
+    @rtype: dict
+    '''
+    values = sorted(values)
+    summary = {'count': len(values),
+               'mean': sum(values) / len(values) if values else None,
+               'max': values[-1] if values else None}
+    for percent in percents:
+        summary['p{0:g}'.format(percent)] = percentile(values, percent)
+    return summary
@@ -14,6 +14,7 @@ from testingframework.collector_package.collector_nightly import NightlyPackage
 from testingframework.collector_factory.collectorfactory import CollectorFactory
 from testingframework.sumo.aws import AWSSumo
 from testingframework.connector.base import Connector
+from testingframework.connector.retry import RetryPolicy
 
 
 LOGGER = logging.getLogger()
@@ -108,15 +109,16 @@ def connector_remotesumo(request, remote_sumo):
                                            password=password)
     restconn = remote_sumo.connector(Connector.REST, username)
     restconn.config = request.config
+    restconn.cache_ttl(300)
+    restconn.retry_policy(RetryPolicy())
 
     def fin():
         try:
             LOGGER.info("Teardown: removing remote sumo connectors")
             collector_api = "%s%s" % (request.config.option.sumo_api_url, 'collectors')
             collector_api = collector_api.replace('https://', '')
-            resp, cont = restconn.make_request("GET", collector_api)
-            cont_json = json.loads(cont)
-            for eachCollector in cont_json['collectors']:
+            for eachCollector in restconn.iter_json_array("GET", collector_api,
+                                                          'collectors'):
                 if eachCollector['name'] == socket.gethostname() and \
                    eachCollector['alive']:
                     collector_id = eachCollector['id']
@@ -1,4 +1,6 @@
 from testingframework.connector.base import Connector
+from testingframework.connector.paginate import paginate, PageRequestFailed
+from testingframework.connector.retry import RetryPolicy
 from testingframework.util import fileutils
 from sumotest.util.VerifierBase import VerifierBase
 import logging
@@ -49,11 +51,11 @@ class TestCollectorInstall(object):
         search_fd = open(search_path, 'r')
         original_content = search_fd.read()
         search_fd.close()
-        urlparam = {'limit': 100, 'offset': 0}
+        page_size = 100
         tries = 10
         time_to_wait = 10
 
-        for aTry in range(tries):
+        def search_messages():
             content = original_content.replace('\n', ' ')
             content = content % ('weimin_local_file', (datetime.now() + timedelta(minutes=-15)).replace(microsecond=0).isoformat(), \
                                  datetime.now().replace(microsecond=0).isoformat())
@@ -61,16 +63,13 @@ class TestCollectorInstall(object):
             resp, cont = restconn.make_request("POST", SEARCH_API, content)
             cont_json = json.loads(cont)
             RESULT_API = "%s/%s/messages" % (SEARCH_API, cont_json['id'])
-            resp, cont = restconn.make_request('GET', RESULT_API, urlparam=urlparam)
-            cont_json = json.loads(cont)
-            try:
-                verifier.verify_true(len(cont_json['messages']) > 0)
-                break
-            except (KeyError, AssertionError), e:
-                if aTry < tries - 1:
-                    time.sleep(time_to_wait)
-                else:
-                    raise e
+            messages = list(paginate(restconn, RESULT_API, page_size))
+            verifier.verify_true(len(messages) > 0)
+
+        # Poll with backoff instead of fixed sleeps, within the same time
+        RetryPolicy(tries=None, backoff=1, max_backoff=time_to_wait,
+                    deadline=tries * time_to_wait).call(
+            search_messages, retry_on=(KeyError, AssertionError, PageRequestFailed))
 
         resp, cont = restconn.make_request('GET', source_api)
         cont_json = json.loads(cont)
@@ -112,16 +111,13 @@ class TestCollectorInstall(object):
             rest_params = "{\"collectorId\":%s,\"toVersion\":\"%s\"}" % (collector_id, upgrade_version)
         else:
             rest_params = '{"collectorId":%s,"toVersion":"%s"}' % (collector_id, upgrade_version)
-        for aTry in range(tries):
-            try:
-                resp, cont = restconn.make_request("POST", collector_upgrade_api, rest_params)
-                verifier.verify_false(resp.status == 400)
-                break
-            except AssertionError, e:
-                if aTry < tries - 1:
-                    time.sleep(time_to_wait)
-                else:
-                    raise e
+        def request_upgrade():
+            resp, cont = restconn.make_request("POST", collector_upgrade_api, rest_params)
+            verifier.verify_false(resp.status == 400)
+            return cont
+
+        cont = RetryPolicy(tries=None, backoff=1, max_backoff=time_to_wait,
+                           deadline=tries * time_to_wait).call(request_upgrade)
         cont_json = json.loads(cont)
 
         status_uri = "%s%s" % (restconn.config.option.sumo_api_url, "collectors/upgrades/%s" % cont_json['id'])
@@ -0,0 +1,107 @@
+import logging
+import os
+import re
+
+from testingframework.connector.cassette import Cassette, default_cassette, \
+    set_default_cassette
+from testingframework.connector.metrics import REQUEST_METRICS
+from testingframework.connector.ratelimit import RateLimiter, \
+    set_default_rate_limiter
+from testingframework.connector.session import SessionStore, \
+    set_default_session_store
+from testingframework.connector.trace import TRACE_RECORDER
+
+LOGGER = logging.getLogger()
+
+
+def pytest_addoption(parser):
+    parser.addoption('--cassette-mode', action='store', dest='cassette_mode',
+                     default=None, choices=Cassette.MODES,
+                     help='record REST exchanges to a cassette or replay '
+                          'them from it instead of the network')
+    parser.addoption('--cassette', action='store', dest='cassette',
+                     default=None,
+                     help='path of the cassette file, defaults to '
+                          'cassette.jsonl in $TEST_ARTIFACTS or, if that is '
+                          'not set, the current directory')
+    parser.addoption('--rate-limit', action='store', dest='rate_limit',
+                     type='float', default=None,
+                     help='requests per second allowed per credential, '
+                          'shared by all workers of the run')
+    parser.addoption('--rate-burst', action='store', dest='rate_burst',
+                     type='float', default=None,
+                     help='requests allowed at once under --rate-limit, '
+                          'defaults to one second worth')
+
+
+def pytest_configure(config):
+    if 'TEST_ARTIFACTS' in os.environ:
+        # xdist workers share the sessions so each user logs in once per run
+        set_default_session_store(SessionStore(
+            os.path.join(os.environ['TEST_ARTIFACTS'], 'sessions.json')))
+    if config.option.rate_limit:
+        # one bucket file per run so xdist workers share the quota
+        path = os.path.join(os.environ['TEST_ARTIFACTS'], 'ratelimit.json') \
+            if 'TEST_ARTIFACTS' in os.environ else None
+        set_default_rate_limiter(RateLimiter(config.option.rate_limit,
+                                             config.option.rate_burst, path))
+    mode = config.option.cassette_mode
+    if mode is None:
+        return
+    path = config.option.cassette or \
+        os.path.join(os.environ.get('TEST_ARTIFACTS', '.'), 'cassette.jsonl')
+    # xdist workers record to files of their own next to path
+    worker = getattr(config, 'slaveinput', {}).get('slaveid')
+    cassette = Cassette(path, mode, worker)
+    LOGGER.info("Using cassette %s in %s mode" % (cassette.path, mode))
+    set_default_cassette(cassette)
+
+
+def pytest_unconfigure(config):
+    set_default_rate_limiter(None)
+    cassette = default_cassette()
+    if cassette is not None:
+        cassette.close()
+        set_default_cassette(None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """
+    Writes the per-endpoint request metrics of the run to TEST_ARTIFACTS,
+    one file per xdist worker.
+    """
+    if not REQUEST_METRICS.summary() or 'TEST_ARTIFACTS' not in os.environ:
+        return
+    worker = getattr(session.config, 'slaveinput', {}).get('slaveid')
+    name = 'request_metrics_%s.json' % worker if worker else \
+        'request_metrics.json'
+    path = os.path.join(os.environ['TEST_ARTIFACTS'], name)
+    REQUEST_METRICS.write(path)
+    LOGGER.info("Request metrics written to %s\n%s" %
+                (path, REQUEST_METRICS.format_summary()))
+
+
+def pytest_runtest_setup(item):
+    """
+    Forgets the REST exchanges of earlier tests, so a trace dumped for a
+    failing test holds only its own traffic.
+    """
+    TRACE_RECORDER.clear()
+
+
+def pytest_runtest_logreport(report):
+    """
+    Dumps the recent REST exchanges to TEST_ARTIFACTS/traces when a test
+    fails, so the calls leading up to the failure can be inspected.
+    """
+    if not report.failed or not len(TRACE_RECORDER) or \
+            'TEST_ARTIFACTS' not in os.environ:
+        return
+    trace_dir = os.path.join(os.environ['TEST_ARTIFACTS'], 'traces')
+    if not os.path.isdir(trace_dir):
+        os.makedirs(trace_dir)
+    name = re.sub(r'[^\w.-]+', '_', report.nodeid)
+    path = os.path.join(trace_dir, '%s_%s.har.json' % (name, report.when))
+    TRACE_RECORDER.dump(path, comment='%s failed during %s' %
+                        (report.nodeid, report.when))
+    LOGGER.info("REST trace written to %s" % path)
@@ -13,6 +13,7 @@ from testingframework.collector_package.collector_nightly import NightlyPackage
 from testingframework.collector.osxlocal import LocalCollector
 from testingframework.sumo.aws import AWSSumo
 from testingframework.connector.base import Connector
+from testingframework.connector.retry import RetryPolicy
 from testingframework.collector_factory.collectorfactory import CollectorFactory
 
 LOGGER = logging.getLogger()
@@ -88,6 +89,8 @@ def handle_remotetest(request, remote_sumo):
         username = accessid
     restconn = remote_sumo.connector(Connector.REST, username)
     restconn.config = request.config
+    restconn.cache_ttl(300)
+    restconn.retry_policy(RetryPolicy())
 
     def fin():
         try:
@@ -111,9 +114,12 @@ def servicerest_conn(request, remote_sumo):
 
     remote_sumo.create_logged_in_connector(contype=Connector.SERVICEREST,
                                                    username=username,
-                                                   password=password)
+                                                   password=password,
+                                                   pool_size=8)
     servicerestconn = remote_sumo.connector(Connector.SERVICEREST, username)
     servicerestconn.config = request.config
+    servicerestconn.login_url("%s%s" % (request.config.option.sumo_api_url,
+                                        servicerestconn.LOGIN_PATH))
 
     def fin():
         try:
@@ -192,24 +198,27 @@ def connector_remotesumo(request, remote_sumo):
     if (xstr(username) is not None and xstr(password) is not None):
         remote_sumo.create_logged_in_connector(contype=Connector.REST,
                                                username=username,
-                                               password=password)
+                                               password=password,
+                                               pool_size=4)
     else:
         remote_sumo.create_logged_in_connector(contype=Connector.REST,
                                                username=accessid,
-                                               password=accesskey)
+                                               password=accesskey,
+                                               pool_size=4)
         username = accessid
 
     restconn = remote_sumo.connector(Connector.REST, username)
     restconn.config = request.config
+    restconn.cache_ttl(300)
+    restconn.retry_policy(RetryPolicy())
 
     def fin():
         try:
             LOGGER.info("Teardown: removing remote sumo connectors")
             collector_api = "%s%s" % (request.config.option.sumo_api_url, 'collectors')
             collector_api = collector_api.replace('https://', '')
-            resp, cont = restconn.make_request("GET", collector_api)
-            cont_json = json.loads(cont)
-            for eachCollector in cont_json['collectors']:
+            for eachCollector in restconn.iter_json_array("GET", collector_api,
+                                                          'collectors'):
                 if eachCollector['name'] == socket.gethostname() and \
                    eachCollector['alive']:
                     collector_id = eachCollector['id']
@@ -250,14 +259,11 @@ def connector_remotesumo_graphite_source(request, connector_remotesumo):
             break
 
     source_api = "%s/%s/sources" % (collector_api, collector_id)
-    resp, cont = restconn.make_request("GET", source_api)
-    cont_dic = json.loads(cont)
-    for eachSource in cont_dic['sources']:
-        if eachSource['name'] == content_dict["source"]["name"]:
-            source_id = eachSource["id"]
-            source_uri = "%s/%s" % (source_api, source_id)
-            resp, cont = restconn.make_request("DELETE", source_uri)
-            break
+    deletes = [("DELETE", "%s/%s" % (source_api, eachSource["id"]))
+               for eachSource in restconn.iter_json_array("GET", source_api,
+                                                          'sources')
+               if eachSource['name'] == content_dict["source"]["name"]]
+    restconn.make_requests(deletes)
 
     resp, cont = restconn.make_request("POST", source_api, content)
     return restconn
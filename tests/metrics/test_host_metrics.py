@@ -1,4 +1,6 @@
 from testingframework.connector.base import Connector
+from testingframework.connector.retry import RetryPolicy
+from testingframework.load.dashboard import DashboardLoader, format_dashboard_report
 from testingframework.util import fileutils
 from sumotest.util.VerifierBase import VerifierBase
 import logging
@@ -153,17 +155,16 @@ class TestHostMetrics(object):
         METRICS_URI = "%s%s" % (restconn.config.option.sumo_api_url, 'metrics/results/')
         METRICS_URI = METRICS_URI.replace('https://', '')
 
-        for aTry in range(tries):
+        def query_load_avg():
             resp, cont = restconn.make_request("POST", METRICS_URI, query)
             result_json = json.loads(cont)
-            try:
-                cpu_load_avg_5_sumo = result_json['response'][0]['results'][0]['datapoints']['value'][0]
-                break
-            except (IndexError, KeyError), e:
-                if aTry < tries - 1:
-                    time.sleep(time_to_wait)
-                else:
-                    raise e
+            return result_json['response'][0]['results'][0]['datapoints']['value'][0]
+
+        # Poll with backoff instead of fixed sleeps, within the same time
+        cpu_load_avg_5_sumo = RetryPolicy(
+            tries=None, backoff=1, max_backoff=time_to_wait,
+            deadline=tries * time_to_wait).call(
+            query_load_avg, retry_on=(IndexError, KeyError))
 
         logger = logging.getLogger()
         verifier.verify_true(abs(cpu_load_avg_5_uptime - cpu_load_avg_5_sumo) / cpu_load_avg_5_uptime < 0.15, \
@@ -304,49 +305,21 @@ class TestHostMetrics(object):
         restconn.update_headers('accept', 'application/json, text/plain, */*')
         restconn.update_headers('content-type', 'application/json;charset=UTF-8')
         restconn.update_headers('connection', 'keep-alive')
-        LOGIN_URI = "%s%s" % (restconn.config.option.sumo_api_url, 'authentication/loginwithcredentials')
-        LOGIN_URI = LOGIN_URI.replace('https://', '')
-        params = '{"email":"%s","password":"%s"}'
-        params = params % (restconn.config.option.username, restconn.config.option.password)
-        resp, cont = restconn.make_request('POST', LOGIN_URI, params)
-        cookie = resp['set-cookie']
-        restconn.update_headers('Cookie', cookie)
-        cont_json = json.loads(cont)
-        ApiSession = str(cont_json['apiSessionId'])
-
-        ASID = "ASID=%s" % ApiSession
-        cookie_new = "%s; %s" % (restconn.HEADERS['Cookie'], ASID)
-        restconn.update_headers('Cookie', cookie_new)
-        restconn.update_headers('ApiSession', ApiSession)
+        restconn.service_login()
 
         # Get the folder where all the tabs exist
         MYLABS_URI = "%s%s" % (restconn.config.option.sumo_api_url, 'content/folder/mylabs')
         MYLABS_URI = MYLABS_URI.replace('https://', '')
-        resp, cont = restconn.make_request('GET', MYLABS_URI)
+        resp, cont = restconn.make_request('GET', MYLABS_URI,
+                                           use_sessionkey=True)
         cont_json = json.loads(cont)
         # Grab the first children, and get its ID
         tab_id = cont_json['folder']['children'][0]['interactiveReportReference']['id']
-        # Get the dashboard ID
-        REPORT_URI = "%s%s" % (restconn.config.option.sumo_api_url, 'reports/%s' % tab_id)
-        REPORT_URI = REPORT_URI.replace('https://', '')
-        resp, cont = restconn.make_request('GET', REPORT_URI)
-        cont_json = json.loads(cont)
-        panel_id = cont_json['panels'][0]['id']
-        # Create a session for the panel
-        query_path = os.path.join(os.environ['TEST_DIR'], 'data', 'metrics', 'json', 'metrics_query.json')
-        verifier.verify_true(os.path.exists(query_path))
-        with codecs.open(query_path, encoding='utf-8') as data_file:
-            content = data_file.read()
-            content = content.replace('\n', '')
-
-        content_fill = content % (panel_id, -900000, '_source=weimin_cloud_watch')
-        SESSION_URI = "%s%s" % (restconn.config.option.sumo_api_url, 'reports/%s/sessionids' % tab_id)
-        SESSION_URI = SESSION_URI.replace('https://', '')
-        resp, cont = restconn.make_request('POST', SESSION_URI, str(content_fill))
-        verifier.verify_true(resp.status == 200)
-        cont_json = json.loads(cont)
-        search_id = str(cont_json['results'][str(panel_id)]['searchQueryId'])
-        QUERY_URI = "%s%s" % (restconn.config.option.sumo_api_url, 'reports/%s/sessionidsV2?sid=%s' % (tab_id, search_id))
-        QUERY_URI = QUERY_URI.replace('https://', '')
-        resp, cont = restconn.make_request('GET', QUERY_URI)
-        verifier.verify_true(resp.status == 200)
+        # Load every panel of the dashboard concurrently
+        loader = DashboardLoader(restconn, restconn.config.option.sumo_api_url.replace('https://', ''),
+                                 time_zone='America/Los_Angeles')
+        report = loader.load(tab_id, time_range_ms=-900000, query='_source=weimin_cloud_watch')
+        LOGGER.info("Dashboard %s loaded\n%s" % (tab_id, format_dashboard_report(report)))
+        verifier.verify_true(len(report['panels']) > 0)
+        verifier.verify_true(not report['failed'])
+        verifier.verify_true(not report['pending'])
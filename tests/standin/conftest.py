@@ -0,0 +1,48 @@
+import logging
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.manager.jobs import Jobs
+from testingframework.sumo import AWSSumo, StandInSumo
+
+LOGGER = logging.getLogger()
+
+
+@pytest.fixture(scope="module")
+def standin(request):
+    '''
+    An in-process stand-in for the Sumo API, stopped after the module.
+    '''
+    standin = StandInSumo(job_duration=0.5, message_count=20)
+    standin.start()
+    LOGGER.info("Stand-in serving at %s" % standin.url)
+    request.addfinalizer(standin.stop)
+    return standin
+
+
+@pytest.fixture(scope="module")
+def standin_sumo(request, standin):
+    '''
+    A deployment pointing at the stand-in, its connectors closed after the
+    module.
+    '''
+    sumo = AWSSumo(standin.url)
+    request.addfinalizer(sumo.close_connector_pools)
+    return sumo
+
+
+@pytest.fixture(scope="module")
+def standin_connector(standin_sumo):
+    '''
+    A REST connector of the stand-in.
+    '''
+    return standin_sumo.create_connector(Connector.REST, username='id',
+                                         password='key', pool_size=8)
+
+
+@pytest.fixture(scope="module")
+def standin_jobs(standin_connector):
+    '''
+    The jobs manager of the stand-in connector.
+    '''
+    return Jobs(standin_connector)
@@ -0,0 +1,77 @@
+import logging
+import time
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.paginate import paginate
+from testingframework.util.concurrency import Future
+
+LOGGER = logging.getLogger('TestAsyncREST')
+
+
+@pytest.fixture(scope="module")
+def async_connector(request, standin_sumo):
+    connector = standin_sumo.create_connector(
+        Connector.ASYNCREST, username='async', password='key', pool_size=4)
+    request.addfinalizer(connector.close)
+    return connector
+
+
+class TestAsyncRESTConnector(object):
+    def test_make_request_blocks(self, standin, async_connector):
+        response, content = async_connector.make_request(
+            'GET', standin.url + 'collectors')
+        assert response.status == 200
+        assert 'collectors' in async_connector.parse_content_json(content)
+
+    def test_submit_request(self, standin, async_connector):
+        future = async_connector.submit_request('GET',
+                                                standin.url + 'collectors')
+        assert isinstance(future, Future)
+        response, _ = future.result(5)
+        assert response.status == 200
+
+    def test_gather_keeps_order(self, standin, async_connector):
+        collectors = [standin.add_collector('async-%d' % i)
+                      for i in range(6)]
+        uris = [standin.url + 'collectors/%s' % collector['id']
+                for collector in collectors]
+        requests = [async_connector.submit_request('GET', uri)
+                    for uri in uris[:3]] + \
+            [('GET', uri) for uri in uris[3:]]
+        names = [async_connector.parse_content_json(content)
+                 ['collector']['name']
+                 for _, content in async_connector.gather(requests)]
+        assert names == [collector['name'] for collector in collectors]
+
+    def test_gather_bounds_requests(self, standin, async_connector):
+        uri = standin.url + 'collectors'
+        standin.latency = 0.1
+        try:
+            started = time.time()
+            async_connector.gather([('GET', uri)] * 4, max_in_flight=4)
+            parallel = time.time() - started
+            started = time.time()
+            async_connector.gather([('GET', uri)] * 4, max_in_flight=1)
+            serial = time.time() - started
+        finally:
+            standin.latency = 0.0
+        assert serial >= 0.4 and parallel < serial
+
+    def test_gather_return_exceptions(self, standin, async_connector):
+        requests = [('GET', standin.url + 'collectors'),
+                    ('GET', 'http://127.0.0.1:1/api/v1/collectors')]
+        response, error = async_connector.gather(requests,
+                                                 return_exceptions=True)
+        assert response[0].status == 200
+        assert isinstance(error, Exception)
+        with pytest.raises(Exception):
+            async_connector.gather(requests)
+
+    def test_paginate(self, standin, async_connector):
+        for i in range(5):
+            standin.add_collector('paged-%d' % i)
+        names = [collector['name'] for collector in
+                 paginate(async_connector, standin.url + 'collectors', 2)]
+        assert len(names) == len(set(names))
+        assert set('paged-%d' % i for i in range(5)) <= set(names)
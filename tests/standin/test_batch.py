@@ -0,0 +1,50 @@
+import json
+import logging
+import time
+import pytest
+
+from testingframework.connector.base import Connector
+
+LOGGER = logging.getLogger('TestBatch')
+
+
+@pytest.fixture(scope="module")
+def batch_connector(standin_sumo):
+    return standin_sumo.create_connector(Connector.REST, username='batch',
+                                         password='key', pool_size=4)
+
+
+class TestMakeRequests(object):
+    def test_empty(self, batch_connector):
+        assert batch_connector.make_requests([]) == []
+
+    def test_ordered_results(self, standin, batch_connector):
+        collectors = [standin.add_collector('batch-%d' % i)
+                      for i in range(8)]
+        specs = [('GET', standin.url + 'collectors/%s' % collector['id'])
+                 for collector in collectors]
+        names = [json.loads(content)['collector']['name']
+                 for _, content in batch_connector.make_requests(specs)]
+        assert names == [collector['name'] for collector in collectors]
+
+    def test_failure_does_not_stop_others(self, standin, batch_connector):
+        results = batch_connector.make_requests(
+            [('GET', 'http://127.0.0.1:1/api/v1/collectors'),
+             ('GET', standin.url + 'collectors')])
+        assert results[0][0] is None
+        assert isinstance(results[0][1], Exception)
+        assert results[1][0].status == 200
+
+    def test_max_in_flight(self, standin, batch_connector):
+        specs = [('GET', standin.url + 'collectors')] * 4
+        standin.latency = 0.1
+        try:
+            started = time.time()
+            batch_connector.make_requests(specs, max_in_flight=4)
+            parallel = time.time() - started
+            started = time.time()
+            batch_connector.make_requests(specs, max_in_flight=1)
+            serial = time.time() - started
+        finally:
+            standin.latency = 0.0
+        assert serial >= 0.4 and parallel < serial
@@ -0,0 +1,102 @@
+import json
+import logging
+import time
+import httplib2
+
+from testingframework.connector.cache import ResponseCache
+
+LOGGER = logging.getLogger('TestCache')
+
+
+def _ok(etag='"a"'):
+    return httplib2.Response({'status': '200', 'etag': etag})
+
+
+class TestResponseCache(object):
+    def test_not_modified_refreshes_entry(self):
+        cache = ResponseCache(0.2)
+        cache.resolve('http://x/a', {}, _ok(), 'body', None)
+        entry = cache.lookup('http://x/a', {})
+        assert cache.validators(entry) == {'If-None-Match': '"a"'}
+        time.sleep(0.3)
+        response, content = cache.resolve(
+            'http://x/a', {}, httplib2.Response({'status': '304'}), '', entry)
+        assert response.status == 200 and response.fromcache
+        assert content == 'body'
+        assert cache.lookup('http://x/a', {}) is not None
+
+    def test_expiry(self):
+        cache = ResponseCache(0.1)
+        cache.resolve('http://x/a', {}, _ok(), 'body', None)
+        time.sleep(0.2)
+        assert cache.lookup('http://x/a', {}) is None
+        assert cache.validators(None) == {}
+
+    def test_only_responses_with_validators(self):
+        cache = ResponseCache(60)
+        cache.resolve('http://x/a', {},
+                      httplib2.Response({'status': '200'}), 'body', None)
+        cache.resolve('http://x/b', {},
+                      httplib2.Response({'status': '404', 'etag': '"b"'}),
+                      'body', None)
+        assert cache.lookup('http://x/a', {}) is None
+        assert cache.lookup('http://x/b', {}) is None
+
+    def test_accept_header_is_part_of_key(self):
+        cache = ResponseCache(60)
+        cache.resolve('http://x/a', {'Accept': 'application/json'}, _ok(),
+                      '{}', None)
+        assert cache.lookup('http://x/a', {'accept': 'application/json'})
+        assert cache.lookup('http://x/a', {'accept': 'text/xml'}) is None
+
+    def test_invalidate_related(self):
+        cache = ResponseCache(60)
+        for url in ('http://x/collectors', 'http://x/collectors/1/sources',
+                    'http://x/collectors/1/sources/2?fields=all',
+                    'http://x/collectors/2'):
+            cache.resolve(url, {}, _ok(), 'body', None)
+        cache.invalidate('http://x/collectors/1/sources')
+        assert cache.lookup('http://x/collectors', {}) is None
+        assert cache.lookup('http://x/collectors/1/sources', {}) is None
+        assert cache.lookup('http://x/collectors/1/sources/2?fields=all',
+                            {}) is None
+        assert cache.lookup('http://x/collectors/2', {}) is not None
+
+    def test_max_entries(self):
+        cache = ResponseCache(60, max_entries=2)
+        for name in 'abc':
+            cache.resolve('http://x/' + name, {}, _ok(), name, None)
+        assert cache.lookup('http://x/a', {}) is None
+        assert cache.lookup('http://x/c', {}) is not None
+
+
+class TestConditionalGet(object):
+    def test_not_modified(self, standin, standin_connector):
+        collector = standin.add_collector('cached')
+        url = standin.url + 'collectors/%s' % collector['id']
+        standin_connector.cache_ttl(60)
+        try:
+            first, content = standin_connector.make_request('GET', url)
+            second, cached = standin_connector.make_request('GET', url)
+        finally:
+            standin_connector.cache_ttl(None)
+        assert first.status == 200 and not first.fromcache
+        assert second.status == 200 and second.fromcache
+        assert cached == content
+
+    def test_write_invalidates(self, standin, standin_connector):
+        collector = standin.add_collector('written')
+        url = standin.url + 'collectors/%s' % collector['id']
+        standin_connector.cache_ttl(60)
+        try:
+            standin_connector.make_request('GET', url)
+            body = json.dumps({'collector': dict(collector,
+                                                 description='changed')})
+            standin_connector.make_request(
+                'PUT', url, body, headers={'content-type':
+                                           'application/json'})
+            response, content = standin_connector.make_request('GET', url)
+        finally:
+            standin_connector.cache_ttl(None)
+        assert not response.fromcache
+        assert json.loads(content)['collector']['description'] == 'changed'
@@ -0,0 +1,81 @@
+import logging
+import os
+import httplib2
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.cassette import Cassette, CassetteMiss, \
+    worker_path
+from testingframework.sumo import AWSSumo, StandInSumo
+
+LOGGER = logging.getLogger('TestCassette')
+
+
+def _record(path, exchanges, worker=None):
+    cassette = Cassette(path, Cassette.RECORD, worker)
+    for method, url, body, content in exchanges:
+        cassette.record(method, url, body,
+                        httplib2.Response({'status': '200'}), content)
+    cassette.close()
+
+
+class TestCassette(object):
+    def test_worker_files(self, tmpdir):
+        path = str(tmpdir.join('cassette.jsonl'))
+        for worker in ('gw0', 'gw1'):
+            _record(path, [('GET', 'http://x/' + worker, '', worker)],
+                    worker)
+        assert os.path.exists(worker_path(path, 'gw0'))
+        replay = Cassette(path, Cassette.REPLAY)
+        assert replay.play('GET', 'http://x/gw0', '')[1] == 'gw0'
+        assert replay.play('GET', 'http://x/gw1', '')[1] == 'gw1'
+        Cassette(path, Cassette.RECORD).close()
+        assert not os.path.exists(worker_path(path, 'gw0'))
+
+    def test_replay_needs_a_recording(self, tmpdir):
+        with pytest.raises(IOError):
+            Cassette(str(tmpdir.join('missing.jsonl')), Cassette.REPLAY)
+
+    def test_unknown_mode(self, tmpdir):
+        with pytest.raises(ValueError):
+            Cassette(str(tmpdir.join('cassette.jsonl')), 'rewind')
+
+    def test_replay_order(self, tmpdir):
+        path = str(tmpdir.join('cassette.jsonl'))
+        _record(path, [('GET', 'http://x/job', '', 'gathering'),
+                       ('GET', 'http://x/job', '', 'done'),
+                       ('POST', 'http://x/jobs', '{"a": 1, "b": 2}', 'a'),
+                       ('POST', 'http://x/jobs', '{"a": 3}', 'b')])
+        replay = Cassette(path, Cassette.REPLAY)
+        assert replay.play('GET', 'http://x/job', '')[1] == 'gathering'
+        assert replay.play('GET', 'http://x/job', '')[1] == 'done'
+        assert replay.play('GET', 'http://x/job', '')[1] == 'done'
+        assert replay.play('POST', 'http://x/jobs', '{"a":3}')[1] == 'b'
+        assert replay.play('POST', 'http://x/jobs',
+                           '{"b": 2, "a": 1}')[1] == 'a'
+        with pytest.raises(CassetteMiss):
+            replay.play('DELETE', 'http://x/job', '')
+
+    def test_binary_content(self, tmpdir):
+        path = str(tmpdir.join('cassette.jsonl'))
+        _record(path, [('GET', 'http://x/gz', '', '\x1f\x8b\xff\x00')])
+        replay = Cassette(path, Cassette.REPLAY)
+        assert replay.play('GET', 'http://x/gz', '')[1] == '\x1f\x8b\xff\x00'
+
+
+class TestConnectorCassette(object):
+    def test_record_and_replay(self, tmpdir):
+        path = str(tmpdir.join('cassette.jsonl'))
+        with StandInSumo() as standin:
+            standin.add_collector('recorded')
+            uri = standin.url + 'collectors'
+            connector = AWSSumo(standin.url).create_connector(
+                Connector.REST, username='id', password='key')
+            recording = Cassette(path, Cassette.RECORD)
+            connector.cassette(recording)
+            recorded, content = connector.make_request('GET', uri)
+            recording.close()
+        connector.cassette(Cassette(path, Cassette.REPLAY))
+        replayed, replayed_content = connector.make_request('GET', uri)
+        assert replayed.status == recorded.status == 200
+        assert replayed_content == content
@@ -0,0 +1,74 @@
+import logging
+import pytest
+
+from testingframework.manager.jobs.results import Results, _Column, \
+    _ArrayColumn, _DictionaryColumn, _ObjectColumn, _code_type
+
+LOGGER = logging.getLogger('TestColumns')
+
+
+def _column_of(results, name):
+    return results._columns.column(name)
+
+
+class TestColumns(object):
+    def test_values_keep_their_type(self):
+        results = Results([{'v': 1}, {'v': True}, {'v': 'a'}, {'v': u'a'}])
+        assert [type(value) for value in results.get_field('v')] == \
+            [int, bool, str, unicode]
+
+    def test_wide_columns(self):
+        events = [{'n': i, 'f': i / 2.0, 's': 'v%d' % i} for i in range(300)]
+        results = Results(events)
+        assert results.as_list == events
+        assert results.get_field('s')[299] == 'v299'
+
+    def test_column_is_abstract(self):
+        with pytest.raises(TypeError):
+            _Column(1, [])
+
+    def test_column_kinds(self):
+        results = Results([{'i': 1, 'f': 0.5, 's': 'a', 'l': [1]},
+                           {'i': 2, 'f': 1.5, 's': 'b', 'l': [2]}])
+        assert isinstance(_column_of(results, 'i'), _ArrayColumn)
+        assert isinstance(_column_of(results, 'f'), _ArrayColumn)
+        assert isinstance(_column_of(results, 's'), _DictionaryColumn)
+        assert isinstance(_column_of(results, 'l'), _ObjectColumn)
+        assert results.get_field('l') == [[1], [2]]
+
+    def test_mixed_numbers_are_dictionary_encoded(self):
+        results = Results([{'v': 1}, {'v': 1.5}, {'v': 1L}])
+        assert isinstance(_column_of(results, 'v'), _DictionaryColumn)
+        assert [type(value) for value in results.get_field('v')] == \
+            [int, float, long]
+
+    def test_distinct_values_kept_once(self):
+        results = Results([{'s': 'same'} for _ in range(1000)])
+        column = _column_of(results, 's')
+        assert column._dictionary == ['same']
+        assert column._codes.typecode == 'B'
+        assert results.get_field('s')[999] == 'same'
+
+    def test_code_width(self):
+        assert _code_type(1) == 'B' and _code_type(0x100) == 'B'
+        assert _code_type(0x101) == 'H' and _code_type(0x10000) == 'H'
+        assert _code_type(0x10001) == 'L'
+        results = Results([{'s': 'v%d' % i} for i in range(300)])
+        assert _column_of(results, 's')._codes.typecode == 'H'
+
+    def test_missing_fields(self):
+        events = [{'a': 1}, {}, {'b': 'x'}, {'a': 3, 'b': 'y'}]
+        results = Results(events)
+        assert results.get_field('a') == [1, None, None, 3]
+        assert results.get_field('b') == [None, None, 'x', 'y']
+        assert results.as_list == events
+        assert results[1] == {}
+        # a field set to None is present, unlike a missing one
+        assert Results([{'a': None}, {}]).as_list == [{'a': None}, {}]
+
+    def test_negative_and_slice_rows(self):
+        results = Results([{'n': i} for i in range(10)])
+        column = _column_of(results, 'n')
+        assert column[-1] == 9 and column[2:5] == [2, 3, 4]
+        with pytest.raises(IndexError):
+            column[10]
@@ -0,0 +1,75 @@
+import json
+import logging
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.metrics import RequestMetrics
+
+LOGGER = logging.getLogger('TestCompression')
+JSON_HEADERS = {'content-type': 'application/json'}
+
+
+@pytest.fixture
+def compressed_connector(standin_sumo):
+    connector = standin_sumo.create_connector(
+        Connector.REST, username='compressed', password='key')
+    connector.compression(True, threshold=512)
+    return connector
+
+
+def _source_body(name, description):
+    return json.dumps({'source': {'name': name, 'sourceType': 'LocalFile',
+                                  'description': description}})
+
+
+class TestCompression(object):
+    def test_large_body_gzipped(self, standin, compressed_connector):
+        collector = standin.add_collector('compressed')
+        uri = standin.url + 'collectors/%s/sources' % collector['id']
+        metrics = RequestMetrics()
+        compressed_connector.request_metrics(metrics)
+        body = _source_body('large', 'x' * 4096)
+        response, content = compressed_connector.make_request(
+            'POST', uri, body, headers=JSON_HEADERS)
+        assert response.status == 201
+        assert json.loads(content)['source']['description'] == 'x' * 4096
+        stats = metrics.summary()['POST collectors/{id}/sources']
+        assert stats['request_bytes'] == len(body)
+        assert stats['request_wire_bytes'] < len(body) / 10
+
+    def test_small_body_and_get_as_is(self, standin, compressed_connector):
+        collector = standin.add_collector('uncompressed')
+        uri = standin.url + 'collectors/%s/sources' % collector['id']
+        metrics = RequestMetrics()
+        compressed_connector.request_metrics(metrics)
+        body = _source_body('small', 'short')
+        response, _ = compressed_connector.make_request(
+            'POST', uri, body, headers=JSON_HEADERS)
+        assert response.status == 201
+        compressed_connector.make_request('GET', uri)
+        stats = metrics.summary()['POST collectors/{id}/sources']
+        assert stats['request_wire_bytes'] == stats['request_bytes']
+
+    def test_disabled(self, standin, compressed_connector):
+        compressed_connector.compression(False)
+        collector = standin.add_collector('disabled')
+        uri = standin.url + 'collectors/%s/sources' % collector['id']
+        metrics = RequestMetrics()
+        compressed_connector.request_metrics(metrics)
+        body = _source_body('large', 'x' * 4096)
+        compressed_connector.make_request('POST', uri, body,
+                                          headers=JSON_HEADERS)
+        stats = metrics.summary()['POST collectors/{id}/sources']
+        assert stats['request_wire_bytes'] == len(body)
+
+    def test_compressed_response(self, standin, compressed_connector):
+        for index in range(40):
+            standin.add_collector('many-%d' % index)
+        metrics = RequestMetrics()
+        compressed_connector.request_metrics(metrics)
+        response, content = compressed_connector.make_request(
+            'GET', standin.url + 'collectors')
+        assert response.status == 200
+        assert len(json.loads(content)['collectors']) >= 40
+        assert metrics.summary()['GET collectors']['compressed_responses'] \
+            == 1
@@ -0,0 +1,102 @@
+import logging
+import time
+import pytest
+
+from testingframework.exceptions.wait import WaitTimedOut
+from testingframework.sumo import AWSSumo
+from testingframework.util.convergence import wait_for_convergence
+
+LOGGER = logging.getLogger('TestConvergence')
+
+
+def _values(*values):
+    '''
+    A poll that gives the values in turn, then the last one forever, and
+    records when it was called.
+    '''
+    values = list(values)
+    calls = []
+
+    def poll():
+        calls.append(time.time())
+        return values.pop(0) if len(values) > 1 else values[0]
+    poll.calls = calls
+    return poll
+
+
+class TestWaitForConvergence(object):
+    def test_stable_value(self):
+        poll = _values(7)
+        result = wait_for_convergence(poll, stable_for=0.2, min_interval=0.02,
+                                      max_interval=1)
+        assert result['value'] == 7
+        assert result['converged_after'] < 0.05
+        assert 0.2 <= result['seconds'] < 0.4
+        assert result['polls'] == len(poll.calls)
+
+    def test_interval_grows_while_unchanged(self):
+        poll = _values(7)
+        result = wait_for_convergence(poll, stable_for=0.3, min_interval=0.02,
+                                      max_interval=1, growth=2)
+        # 0.02, 0.04, 0.08 and the rest of the 0.3s instead of 15 polls
+        assert result['polls'] <= 6
+        gaps = [b - a for a, b in zip(poll.calls, poll.calls[1:])]
+        assert gaps[1] > gaps[0]
+
+    def test_interval_capped(self):
+        poll = _values(7)
+        wait_for_convergence(poll, stable_for=0.3, min_interval=0.02,
+                             max_interval=0.05, growth=10)
+        gaps = [b - a for a, b in zip(poll.calls, poll.calls[1:])]
+        assert max(gaps) < 0.09
+
+    def test_changing_value(self):
+        poll = _values(1, 2, 3)
+        result = wait_for_convergence(poll, stable_for=0.2, min_interval=0.05,
+                                      max_interval=1)
+        assert result['value'] == 3
+        assert result['converged_after'] >= 0.1
+        assert result['seconds'] >= result['converged_after'] + 0.2
+
+    def test_interval_resets_on_change(self):
+        poll = _values(1, 1, 1, 2)
+        wait_for_convergence(poll, stable_for=0.2, min_interval=0.02,
+                             max_interval=1, growth=3)
+        gaps = [b - a for a, b in zip(poll.calls, poll.calls[1:])]
+        # the poll after the change is back at the minimum interval
+        assert gaps[3] < gaps[2]
+        assert gaps[3] < 0.05
+
+    def test_timeout(self):
+        counter = iter(range(1000))
+        started = time.time()
+        with pytest.raises(WaitTimedOut):
+            wait_for_convergence(lambda: next(counter), stable_for=1,
+                                 min_interval=0.02, timeout=0.2)
+        assert time.time() - started < 0.4
+
+
+class TestFinalEventCount(object):
+    @pytest.fixture
+    def sumo(self, standin, request):
+        sumo = AWSSumo(standin.url)
+        sumo.username = 'count'
+        sumo.password = 'key'
+        request.addfinalizer(sumo.close_connector_pools)
+        return sumo
+
+    def test_final_event_count(self, sumo):
+        count = sumo.get_final_event_count(secondsToStable=0.2,
+                                           retry_interval=1, min_interval=0.05)
+        assert count == 20
+
+    def test_final_event_counts(self, sumo):
+        started = time.time()
+        counts = sumo.get_final_event_counts(
+            ['*', 'error'], secondsToStable=0.2, retry_interval=1,
+            min_interval=0.05)
+        assert sorted(counts) == ['*', 'error']
+        assert counts['*']['value'] == 20
+        # both searches were polled at the same time
+        assert time.time() - started < \
+            counts['*']['seconds'] + counts['error']['seconds']
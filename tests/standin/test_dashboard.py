@@ -0,0 +1,84 @@
+import logging
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.load.dashboard import DashboardLoader, \
+    DashboardRequestFailed, format_dashboard_report
+
+LOGGER = logging.getLogger('TestDashboard')
+
+
+@pytest.fixture
+def loader(standin, standin_sumo):
+    connector = standin_sumo.create_connector(
+        Connector.SERVICEREST, username='dashboard', password='key',
+        pool_size=4)
+    connector.service_login()
+    return DashboardLoader(connector, standin.url, poll_interval=0.05,
+                           timeout=10)
+
+
+def _panel_state(standin, monkeypatch, state):
+    poll = standin._poll_panel_session
+
+    def poll_panel_session(request):
+        status, headers, body = poll(request)
+        if body.get('state') == 'Done':
+            body = dict(body)
+            if state is None:
+                del body['state']
+            else:
+                body['state'] = state
+        return status, headers, body
+    monkeypatch.setattr(standin, '_poll_panel_session', poll_panel_session)
+
+
+class TestDashboardLoader(object):
+    def test_load(self, standin, loader):
+        report = standin.add_report('All panels', panels=6)
+        standin.panel_duration = 0.1
+        loaded = loader.load(report['id'])
+        assert sorted(loaded['panels']) == sorted(
+            str(panel['id']) for panel in report['panels'])
+        assert loaded['failed'] == {}
+        assert loaded['pending'] == []
+        assert 0 < loaded['time_to_first_panel'] <= \
+            loaded['time_to_all_panels']
+        for panel in loaded['panels'].values():
+            assert panel['result']['state'] == 'Done'
+        assert loaded['summary']['count'] == 6
+        assert '6 done, 0 failed, 0 pending' in \
+            format_dashboard_report(loaded)
+
+    def test_pending_after_timeout(self, standin, loader):
+        report = standin.add_report('Slow panels', panels=2)
+        standin.panel_duration = 5
+        loader._timeout = 0.2
+        try:
+            loaded = loader.load(report['id'])
+        finally:
+            standin.panel_duration = 0.1
+        assert loaded['panels'] == {}
+        assert len(loaded['pending']) == 2
+        assert loaded['time_to_first_panel'] is None
+        assert loaded['time_to_all_panels'] is None
+
+    @pytest.mark.parametrize('state', [None, 'Failed'])
+    def test_unknown_state_fails(self, standin, loader, monkeypatch, state):
+        report = standin.add_report('Broken panels', panels=3)
+        standin.panel_duration = 0.1
+        _panel_state(standin, monkeypatch, state)
+        loaded = loader.load(report['id'])
+        assert loaded['panels'] == {}
+        assert loaded['pending'] == []
+        assert sorted(loaded['failed']) == sorted(
+            str(panel['id']) for panel in report['panels'])
+        for panel in loaded['failed'].values():
+            assert repr(state) in panel['error']
+        assert loaded['time_to_all_panels'] is None
+        assert '0 done, 3 failed' in format_dashboard_report(loaded)
+
+    def test_unknown_report(self, loader):
+        with pytest.raises(DashboardRequestFailed) as err:
+            loader.load(999999)
+        assert err.value.status == 404
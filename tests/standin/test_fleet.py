@@ -0,0 +1,112 @@
+import logging
+import pytest
+
+from testingframework.sumo import StandInSumo
+from testingframework.sumo.fleet import SumoFleet, DEPLOYMENT_API_URL_MAP, \
+    format_comparison
+
+LOGGER = logging.getLogger('TestFleet')
+
+
+def _collector_count(content):
+    return len(content['collectors'])
+
+
+@pytest.fixture(scope="module")
+def other(request):
+    '''
+    A second stand-in, the other deployment of the fleet.
+    '''
+    other = StandInSumo(job_duration=0.2, message_count=20)
+    other.start()
+    request.addfinalizer(other.stop)
+    return other
+
+
+@pytest.fixture
+def fleet(request, standin, other):
+    fleet = SumoFleet({'ONE': standin.url, 'TWO': other.url})
+    fleet.connect('fleet', 'key')
+
+    def close():
+        for name in fleet.names:
+            fleet.sumo(name).close_connector_pools()
+    request.addfinalizer(close)
+    return fleet
+
+
+class TestSumoFleet(object):
+    def test_from_names(self):
+        fleet = SumoFleet.from_names(['nite', 'Prod'])
+        assert fleet.names == ['NITE', 'PROD']
+        assert fleet.sumo('PROD').sumo_url == DEPLOYMENT_API_URL_MAP['PROD']
+        with pytest.raises(KeyError):
+            SumoFleet.from_names(['NOWHERE'])
+
+    def test_request(self, fleet):
+        responses = fleet.request('GET', 'collectors')
+        assert sorted(responses) == ['ONE', 'TWO']
+        for response in responses.values():
+            assert response['status'] == 200
+            assert response['error'] is None
+            assert response['seconds'] >= 0
+            assert 'collectors' in response['content']
+
+    def test_unreachable_deployment(self, standin):
+        fleet = SumoFleet({'ONE': standin.url,
+                           'GONE': 'http://127.0.0.1:1/api/v1/'})
+        fleet.connect('fleet', 'key')
+        responses = fleet.request('GET', 'collectors')
+        assert responses['ONE']['error'] is None
+        assert responses['GONE']['error'] is not None
+        assert responses['GONE']['status'] is None
+        comparison = SumoFleet.compare(responses, _collector_count)
+        assert sorted(comparison['values']) == ['ONE']
+        assert sorted(comparison['errors']) == ['GONE']
+        assert comparison['consistent']
+        assert 'GONE' in format_comparison(comparison)
+
+
+class TestCompare(object):
+    def test_consistent(self, fleet, standin, other):
+        for each in (standin, other):
+            each.add_collector('both')
+        comparison = SumoFleet.compare(fleet.request('GET', 'collectors'),
+                                       _collector_count)
+        assert sorted(comparison['seconds']) == ['ONE', 'TWO']
+        assert comparison['errors'] == {}
+        assert comparison['values']['ONE'] == comparison['values']['TWO']
+        assert comparison['consistent']
+
+    def test_inconsistent(self, fleet, standin):
+        standin.add_collector('only-one')
+        comparison = SumoFleet.compare(fleet.request('GET', 'collectors'),
+                                       _collector_count)
+        assert comparison['values']['ONE'] != comparison['values']['TWO']
+        assert not comparison['consistent']
+        assert 'consistent: False' in format_comparison(comparison)
+
+    def test_whole_content(self):
+        responses = {'A': {'seconds': 0.1, 'error': None, 'content': [1]},
+                     'B': {'seconds': 0.2, 'error': None, 'content': [1]}}
+        comparison = SumoFleet.compare(responses)
+        assert comparison['values'] == {'A': [1], 'B': [1]}
+        assert comparison['seconds'] == {'A': 0.1, 'B': 0.2}
+        assert comparison['consistent']
+
+    def test_extract_error(self):
+        responses = {'A': {'seconds': 0.1, 'error': None,
+                           'content': {'collectors': []}},
+                     'B': {'seconds': 0.2, 'error': None,
+                           'content': 'not json'}}
+        comparison = SumoFleet.compare(responses, _collector_count)
+        assert comparison['values'] == {'A': 0}
+        assert isinstance(comparison['errors']['B'], TypeError)
+        assert comparison['consistent']
+
+    def test_unhashable_values(self):
+        responses = dict((name, {'seconds': 0, 'error': None,
+                                 'content': {'v': [value]}})
+                         for name, value in [('A', 1), ('B', 1), ('C', 2)])
+        comparison = SumoFleet.compare(responses)
+        assert not comparison['consistent']
@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+import pytest
+
+from testingframework.exceptions.wait import WaitTimedOut
+from testingframework.manager.jobs import JobGroup
+
+LOGGER = logging.getLogger('TestGroup')
+
+
+def _wait(job, timeout, outcomes, name):
+    try:
+        job.wait(timeout)
+        outcomes[name] = 'done'
+    except WaitTimedOut:
+        outcomes[name] = 'timed out'
+
+
+class TestJobGroup(object):
+    def test_timeout_keeps_other_waiters(self, standin_jobs):
+        job = standin_jobs.create('_sourceCategory=g')
+        outcomes = {}
+        thread = threading.Thread(target=_wait,
+                                  args=(job, 5, outcomes, 'job'))
+        thread.start()
+        group = JobGroup([job])
+        for _ in range(2):
+            with pytest.raises(WaitTimedOut):
+                group.wait_all(timeout=0.1)
+        thread.join()
+        assert outcomes == {'job': 'done'}
+        assert group.wait_all(timeout=5) == [job]
+
+        assert group.wait_all(timeout=5) == [job]
+
+    def test_as_completed(self, standin_jobs):
+        jobs = [standin_jobs.create('_sourceCategory=k%d' % index)
+                for index in range(3)]
+        group = JobGroup(jobs)
+        completed = list(group.as_completed(timeout=5))
+        assert sorted(completed) == sorted(jobs)
+        assert group.pending == []
+        for cost in group.wait_time_cost().values():
+            assert cost > 0
+        # every job is yielded once when all are already done
+        assert sorted(group.as_completed()) == sorted(jobs)
+
+    def test_wait_any(self, standin_jobs):
+        with pytest.raises(ValueError):
+            JobGroup().wait_any()
+        jobs = [standin_jobs.create('_sourceCategory=l%d' % index)
+                for index in range(2)]
+        group = JobGroup(jobs)
+        assert group.wait_any(timeout=5) in jobs
+        assert group._listeners == []
+        assert group.wait_all(timeout=5) == jobs
+
+    def test_group_deadline(self, standin_jobs):
+        group = JobGroup([standin_jobs.create('_sourceCategory=m')],
+                         timeout=0.1)
+        started = time.time()
+        with pytest.raises(WaitTimedOut):
+            group.wait_all(timeout=5)
+        assert time.time() - started < 0.3
+
+    def test_timeouts_do_not_add_callbacks(self, standin_jobs):
+        job = standin_jobs.create('_sourceCategory=n')
+        group = JobGroup([job])
+        # another watcher keeps the future across the timeouts of the group
+        future = group._poller.watch(job)
+        callbacks = len(future._callbacks)
+        for _ in range(5):
+            with pytest.raises(WaitTimedOut):
+                group.wait_all(timeout=0.01)
+            assert group._listeners == []
+        assert group._futures[job] is future
+        assert len(future._callbacks) == callbacks
+        assert group.wait_all(timeout=5) == [job]
+        group._poller.unwatch(job)
+
+    def test_concurrent_as_completed(self, standin_jobs):
+        jobs = [standin_jobs.create('_sourceCategory=o%d' % index)
+                for index in range(3)]
+        group = JobGroup(jobs)
+        results = {}
+
+        def complete(name):
+            results[name] = list(group.as_completed(timeout=5))
+        threads = [threading.Thread(target=complete, args=(name,))
+                   for name in ('first', 'second')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(results['first']) == sorted(jobs)
+        assert sorted(results['second']) == sorted(jobs)
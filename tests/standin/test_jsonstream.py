@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import StringIO
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.rest import StreamRequestFailed
+from testingframework.util.jsonstream import iter_array, iter_chunks
+
+LOGGER = logging.getLogger('TestJsonStream')
+DOCUMENT = {'total': 4, 'meta': {'next': [1, {'a': ']'}]},
+            'collectors': [12345, -0.5e3, 1.5e300, u'caf\xe9 \\"[]{},',
+                           None, True, {'name': 'a', 'ids': [1, 2, [3]]}, [],
+                           {}],
+            'after': 'ignored'}
+
+
+def _chunks(text, size):
+    return (text[start:start + size] for start in range(0, len(text), size))
+
+
+class TestIterArray(object):
+    def test_every_chunk_boundary(self):
+        text = json.dumps(DOCUMENT, indent=1)
+        for size in range(1, len(text) + 1):
+            assert list(iter_array(_chunks(text, size), 'collectors')) == \
+                DOCUMENT['collectors'], size
+
+    def test_top_level_array(self):
+        text = ' [1 , 22,333 ] '
+        for size in range(1, len(text) + 1):
+            assert list(iter_array(_chunks(text, size))) == [1, 22, 333]
+        assert list(iter_array(['[]'])) == []
+        assert list(iter_array(['{"a": []}'], 'a')) == []
+
+    def test_missing_key(self):
+        with pytest.raises(ValueError):
+            list(iter_array(['{"a": [1]}'], 'b'))
+
+    def test_malformed(self):
+        for text in ('[1, 2', '[1 2]', '{"a" [1]}', '', '[1,]'):
+            with pytest.raises(ValueError):
+                list(iter_array(_chunks(text, 2)))
+
+    def test_max_buffer(self):
+        text = json.dumps(['x' * 100])
+        with pytest.raises(ValueError):
+            list(iter_array(_chunks(text, 10), max_buffer=50))
+        assert list(iter_array(_chunks(text, 10), max_buffer=200)) == \
+            ['x' * 100]
+
+    def test_lazy(self):
+        consumed = []
+
+        def chunks():
+            for chunk in ('[1,', '2,', '3]'):
+                consumed.append(chunk)
+                yield chunk
+
+        elements = iter_array(chunks())
+        assert next(elements) == 1
+        assert consumed == ['[1,']
+
+    def test_iter_chunks(self):
+        stream = StringIO.StringIO('abcdefg')
+        assert list(iter_chunks(stream, 3)) == ['abc', 'def', 'g']
+
+
+class TestIterJsonArray(object):
+    @pytest.fixture
+    def streaming(self, standin_sumo):
+        return standin_sumo.create_connector(
+            Connector.REST, username='streaming', password='key')
+
+    def test_matches_make_request(self, standin, streaming):
+        for index in range(50):
+            standin.add_collector('streamed-%d' % index)
+        uri = standin.url + 'collectors'
+        _, content = streaming.make_request('GET', uri)
+        assert list(streaming.iter_json_array('GET', uri, 'collectors')) == \
+            json.loads(content)['collectors']
+
+    def test_closed_early_returns_connection(self, standin, streaming):
+        standin.add_collector('first')
+        uri = standin.url + 'collectors'
+        for _ in range(streaming.pool_size + 1):
+            elements = streaming.iter_json_array('GET', uri, 'collectors')
+            next(elements)
+            elements.close()
+        response, _ = streaming.make_request('GET', uri)
+        assert response.status == 200
+
+    def test_error_status(self, standin, streaming):
+        with pytest.raises(StreamRequestFailed):
+            list(streaming.iter_json_array(
+                'GET', standin.url + 'collectors/0/sources', 'sources'))
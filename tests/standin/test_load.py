@@ -0,0 +1,100 @@
+import json
+import logging
+import random
+import time
+import pytest
+
+from testingframework.load import LoadRunner, Scenario, ScenarioRequest, \
+    format_report
+from testingframework.util.stats import percentile, summarize
+
+LOGGER = logging.getLogger('TestLoad')
+
+
+class TestScenario(object):
+    def test_load_and_render(self, tmpdir):
+        tmpdir.join('body.json').write('{"query": "%s",\n "from": %s}')
+        tmpdir.join('scenario.json').write(json.dumps({
+            'name': 'search',
+            'requests': [{'name': 'create', 'method': 'POST',
+                          'uri': 'search/jobs', 'body_file': 'body.json',
+                          'body_args': ['_sourceCategory={seq}',
+                                        '{start_ms}'],
+                          'weight': 2},
+                         {'uri': 'collectors'}]}))
+        scenario = Scenario.load(str(tmpdir.join('scenario.json')))
+        assert scenario.name == 'search'
+        create, collectors = scenario.requests
+        assert (collectors.name, collectors.method) == ('collectors', 'GET')
+        before = int(time.time() * 1000) - create.window_ms
+        method, uri, body, urlparam = create.render('http://x/api/v1/')
+        assert (method, uri, urlparam) == \
+            ('POST', 'http://x/api/v1/search/jobs', None)
+        document = json.loads(body)
+        assert document['query'].startswith('_sourceCategory=')
+        assert document['from'] >= before
+        assert json.loads(create.render('http://x/')[2])['query'] != \
+            document['query']
+
+    def test_pick_by_weight(self):
+        heavy = ScenarioRequest('heavy', 'GET', 'a', weight=9)
+        light = ScenarioRequest('light', 'GET', 'b', weight=1)
+        scenario = Scenario('weights', [heavy, light])
+        rand = random.Random(1)
+        picks = [scenario.pick(rand).name for _ in range(1000)]
+        assert 800 < picks.count('heavy') < 980
+
+    def test_needs_a_request(self):
+        with pytest.raises(ValueError):
+            Scenario('empty', [])
+
+
+class TestLoadRunner(object):
+    def _scenario(self):
+        return Scenario('collectors',
+                        [ScenarioRequest('list', 'GET', 'collectors'),
+                         ScenarioRequest('missing', 'GET', 'collectors/0')])
+
+    def test_request_count(self, standin, standin_connector):
+        runner = LoadRunner(standin_connector, self._scenario(), standin.url,
+                            users=4)
+        report = runner.run(requests=40)
+        assert report['total']['count'] == 40
+        assert report['list']['count'] + report['missing']['count'] == 40
+        assert report['list']['errors'] == 0
+        assert report['missing']['errors'] == report['missing']['count']
+        assert report['total']['throughput'] > 0
+        table = format_report(report)
+        assert table.splitlines()[-1].startswith('total')
+
+    def test_arrival_rate(self, standin, standin_connector):
+        runner = LoadRunner(standin_connector, self._scenario(), standin.url,
+                            users=2, rate=50)
+        started = time.time()
+        report = runner.run(requests=10)
+        assert report['total']['count'] == 10
+        assert time.time() - started >= 0.18
+
+    def test_duration(self, standin, standin_connector):
+        runner = LoadRunner(standin_connector, self._scenario(), standin.url,
+                            users=2, think_time=0.05)
+        started = time.time()
+        report = runner.run(duration=0.3)
+        assert 0.3 <= time.time() - started < 1
+        assert report['total']['count'] >= 4
+
+    def test_needs_a_limit(self, standin, standin_connector):
+        runner = LoadRunner(standin_connector, self._scenario(), standin.url)
+        with pytest.raises(ValueError):
+            runner.run()
+
+
+class TestStats(object):
+    def test_summary(self):
+        values = [float(each) for each in range(100, 0, -1)]
+        summary = summarize(values)
+        assert summary['count'] == 100 and summary['max'] == 100
+        assert summary['mean'] == 50.5
+        assert (summary['p50'], summary['p99']) == (50, 99)
+        assert percentile([], 50) is None
+        assert summarize([])['mean'] is None
@@ -0,0 +1,76 @@
+import json
+import logging
+
+from testingframework.connector.metrics import LATENCY_BUCKETS, \
+    REQUEST_METRICS, EndpointStats, RequestMetrics, normalize_uri
+
+LOGGER = logging.getLogger('TestMetrics')
+
+
+class TestNormalizeUri(object):
+    def test_ids_and_prefix(self):
+        assert normalize_uri('https://api.sumologic.com/api/v1/collectors/'
+                             '123/sources/45?limit=10') == \
+            'collectors/{id}/sources/{id}'
+        assert normalize_uri('api.sumologic.com/api/v1/search/jobs/'
+                             '3A5B9F2C1D0E7A64/messages') == \
+            'search/jobs/{id}/messages'
+
+    def test_keeps_names(self):
+        assert normalize_uri('http://x/api/v1/collectors/upgrades/targets') \
+            == 'collectors/upgrades/targets'
+        assert normalize_uri('http://x/api/v1/dashboards/deadbeef') == \
+            'dashboards/deadbeef'
+
+
+class TestEndpointStats(object):
+    def test_counters(self):
+        stats = EndpointStats()
+        stats.add(0.02, 200, 10, 100, 10, False)
+        stats.add(0.2, 503, 10, 0, 4, True)
+        stats.add(3.0, None, 10, 0, 10, False)
+        summary = stats.as_dict()
+        assert (summary['count'], summary['errors']) == (3, 2)
+        assert summary['statuses'] == {'200': 1, '503': 1, 'None': 1}
+        assert summary['request_wire_bytes'] == 24
+        assert summary['compressed_responses'] == 1
+        assert summary['max_seconds'] == 3.0
+        assert sum(stats.buckets) == 3
+        assert stats.buckets[LATENCY_BUCKETS.index(0.025)] == 1
+
+    def test_percentile(self):
+        stats = EndpointStats()
+        assert stats.percentile(50) is None
+        for _ in range(9):
+            stats.add(0.03, 200, 0, 0, 0, False)
+        stats.add(0.7, 200, 0, 0, 0, False)
+        assert stats.percentile(50) == 0.05
+        assert stats.percentile(99) == 0.7
+
+
+class TestRequestMetrics(object):
+    def test_summary_and_write(self, tmpdir):
+        metrics = RequestMetrics()
+        metrics.record('GET', 'http://x/api/v1/collectors/1', 0.1, 200, 0,
+                       50)
+        metrics.record('GET', 'http://x/api/v1/collectors/2', 0.3, 404, 0,
+                       10)
+        summary = metrics.summary()
+        assert summary.keys() == ['GET collectors/{id}']
+        assert summary['GET collectors/{id}']['count'] == 2
+        assert 'GET collectors/{id}' in metrics.format_summary()
+        path = str(tmpdir.join('metrics.json'))
+        metrics.write(path)
+        assert json.load(open(path)) == json.loads(json.dumps(summary))
+        metrics.reset()
+        assert metrics.summary() == {}
+
+    def test_connector_records(self, standin, standin_connector):
+        key = 'GET collectors/{id}/sources'
+        before = REQUEST_METRICS.summary().get(key, {}).get('count', 0)
+        collector = standin.add_collector('measured')
+        standin_connector.make_request(
+            'GET', standin.url + 'collectors/%s/sources' % collector['id'])
+        after = REQUEST_METRICS.summary()[key]
+        assert after['count'] == before + 1
+        assert after['response_bytes'] > 0
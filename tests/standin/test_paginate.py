@@ -0,0 +1,78 @@
+import logging
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.paginate import paginate, PageRequestFailed
+
+LOGGER = logging.getLogger('TestPaginate')
+
+
+@pytest.fixture(scope="module")
+def paging_connector(standin, standin_sumo):
+    connector = standin_sumo.create_connector(
+        Connector.REST, username='paging', password='key', pool_size=1)
+    # the first request to a path is challenged for credentials, don't
+    # count it
+    connector.make_request('GET', standin.url + 'collectors')
+    connector.make_request('POST', standin.url + 'metrics/meta/catalog/query',
+                           '{}', headers={'content-type': 'application/json'})
+    return connector
+
+
+@pytest.fixture(scope="module")
+def collectors(standin):
+    return [standin.add_collector('paged-%02d' % index)['name']
+            for index in range(20)]
+
+
+def _requests(standin, key):
+    return standin.requests.get(key, 0)
+
+
+class TestPaginate(object):
+    def test_all_items(self, standin, paging_connector, collectors):
+        before = _requests(standin, 'GET collectors')
+        names = [each['name'] for each in
+                 paginate(paging_connector, standin.url + 'collectors', 7)]
+        assert names == collectors
+        assert _requests(standin, 'GET collectors') - before == 3
+
+    def test_without_prefetch(self, standin, paging_connector, collectors):
+        names = [each['name'] for each in
+                 paginate(paging_connector, standin.url + 'collectors', 5,
+                          prefetch=False)]
+        assert names == collectors
+
+    def test_limit(self, standin, paging_connector, collectors):
+        before = _requests(standin, 'GET collectors')
+        names = [each['name'] for each in
+                 paginate(paging_connector, standin.url + 'collectors', 7,
+                          limit=10)]
+        assert names == collectors[:10]
+        assert _requests(standin, 'GET collectors') - before == 2
+
+    def test_post_with_total(self, standin, paging_connector, collectors):
+        before = _requests(standin, 'POST metrics/meta/catalog/query')
+        items = list(paginate(paging_connector,
+                              standin.url + 'metrics/meta/catalog/query', 5,
+                              method='POST', body={'query': '*'},
+                              headers={'content-type': 'application/json'}))
+        assert len(items) == 13
+        assert items[0]['name'] == 'CPU_Idle'
+        assert _requests(standin, 'POST metrics/meta/catalog/query') - \
+            before == 3
+
+    def test_page_failure(self, standin, paging_connector, collectors):
+        standin.inject_failures('collectors', 1, status=500)
+        with pytest.raises(PageRequestFailed) as failure:
+            list(paginate(paging_connector, standin.url + 'collectors', 7))
+        assert failure.value.status == 500
+        assert failure.value.offset == 0
+
+    def test_stops_when_closed(self, standin, paging_connector,
+                               collectors):
+        before = _requests(standin, 'GET collectors')
+        items = paginate(paging_connector, standin.url + 'collectors', 5)
+        next(items)
+        items.close()
+        assert _requests(standin, 'GET collectors') - before <= 2
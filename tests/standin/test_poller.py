@@ -0,0 +1,87 @@
+import logging
+import threading
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.exceptions.wait import WaitTimedOut
+from testingframework.manager.jobs import Jobs
+from testingframework.manager.jobs.poller import JobPoller
+
+LOGGER = logging.getLogger('TestPoller')
+
+
+def _wait(job, timeout, outcomes, name):
+    try:
+        job.wait(timeout)
+        outcomes[name] = 'done'
+    except WaitTimedOut:
+        outcomes[name] = 'timed out'
+
+
+@pytest.fixture(scope="module")
+def async_jobs(request, standin_sumo):
+    connector = standin_sumo.create_connector(
+        Connector.ASYNCREST, username='async-jobs', password='key',
+        pool_size=4)
+    request.addfinalizer(connector.close)
+    return Jobs(connector)
+
+
+class TestJobPoller(object):
+    def test_timed_out_wait_keeps_other_waiters(self, standin_jobs):
+        job = standin_jobs.create('_sourceCategory=a')
+        outcomes = {}
+        threads = [threading.Thread(target=_wait,
+                                    args=(job, 5, outcomes, 'long')),
+                   threading.Thread(target=_wait,
+                                    args=(job, 0.1, outcomes, 'short'))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert outcomes == {'long': 'done', 'short': 'timed out'}
+
+    def test_unwatch_releases_one_watch(self, standin_jobs):
+        poller = JobPoller()
+        job = standin_jobs.create('_sourceCategory=b')
+        future = poller.watch(job)
+        assert poller.watch(job) is future
+        poller.unwatch(job)
+        assert future.result(5) is job
+        assert poller.watched == 0
+
+    def test_failing_callback_keeps_polling(self, standin_jobs):
+        poller = JobPoller()
+        first = standin_jobs.create('_sourceCategory=c')
+        future = poller.watch(first)
+        future.add_done_callback(lambda done: 1 / 0)
+        assert future.result(5) is first
+        second = standin_jobs.create('_sourceCategory=d')
+        assert poller.watch(second).result(5) is second
+
+    def test_headers_not_changed(self, standin_connector, standin_jobs):
+        headers = dict(standin_connector.HEADERS)
+        standin_jobs.create('_sourceCategory=e')
+        assert standin_connector.HEADERS == headers
+
+    def test_iso_to_time(self, standin_jobs):
+        job = standin_jobs.create('_sourceCategory=f',
+                                  to_time='2016-07-21T10:00:00')
+        assert job.sid
+        with pytest.raises(ValueError):
+            standin_jobs.create('_sourceCategory=f', to_time='yesterday')
+
+
+class TestAsyncConnectorJobs(object):
+    def test_create_and_wait(self, async_jobs):
+        job = async_jobs.create('_sourceCategory=async')
+        assert job.sid
+        job.wait(5)
+        assert job.is_done()
+        assert job.get_event_count() == 20
+
+    def test_jobs_of_sumo(self, standin_sumo, async_jobs):
+        jobs = standin_sumo.jobs(Connector.ASYNCREST, 'async-jobs')
+        job = jobs.create('_sourceCategory=async')
+        job.wait(5)
+        assert len(job.get_results(page_size=7)) == 20
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.pool import ConnectorPool
+from testingframework.connector.transport import PoolTimeout
+from testingframework.sumo import AWSSumo
+from testingframework.sumo.base import InvalidConnector
+
+LOGGER = logging.getLogger('TestPool')
+
+
+class _Pool(object):
+    '''
+    A pool of numbered connectors that records which ones it closed.
+    '''
+
+    def __init__(self, **kwargs):
+        self.created = 0
+        self.closed = []
+        self.pool = ConnectorPool(self._create, close=self.closed.append,
+                                  **kwargs)
+
+    def _create(self):
+        self.created += 1
+        return self.created
+
+
+class TestConnectorPool(object):
+    def test_size_must_be_positive(self):
+        with pytest.raises(ValueError):
+            ConnectorPool(lambda: None, size=0)
+
+    def test_reuses_connectors(self):
+        pool = _Pool(size=2)
+        with pool.pool.borrow() as first:
+            assert pool.pool.in_use == 1
+        with pool.pool.borrow() as second:
+            assert second == first
+        assert pool.created == 1
+        assert pool.pool.idle == 1 and pool.pool.in_use == 0
+
+    def test_borrow_blocks_when_all_in_use(self):
+        pool = _Pool(size=1)
+        borrowed = []
+
+        def borrow():
+            with pool.pool.borrow() as connector:
+                borrowed.append((connector, time.time()))
+        with pool.pool.borrow():
+            thread = threading.Thread(target=borrow)
+            thread.start()
+            time.sleep(0.1)
+            assert borrowed == []
+            returned = time.time()
+        thread.join(1)
+        assert borrowed[0][0] == 1 and borrowed[0][1] >= returned
+        assert pool.created == 1
+
+    def test_borrow_timeout(self):
+        pool = _Pool(size=1)
+        with pool.pool.borrow():
+            started = time.time()
+            with pytest.raises(PoolTimeout):
+                with pool.pool.borrow(timeout=0.1):
+                    pass
+            assert time.time() - started < 0.5
+        assert pool.pool.in_use == 0
+
+    def test_failed_create_frees_place(self):
+        def create():
+            raise IOError('no connection')
+        pool = ConnectorPool(create, size=1)
+        for _ in range(2):
+            with pytest.raises(IOError):
+                with pool.borrow(timeout=0.1):
+                    pass
+        assert pool.in_use == 0
+
+    def test_evicts_idle_connectors(self):
+        pool = _Pool(size=2, idle_timeout=0.1)
+        with pool.pool.borrow():
+            with pool.pool.borrow():
+                pass
+        assert pool.pool.idle == 2
+        time.sleep(0.15)
+        assert pool.pool.evict_idle() == 2
+        assert sorted(pool.closed) == [1, 2]
+        with pool.pool.borrow() as connector:
+            assert connector == 3
+
+    def test_health_check(self):
+        healthy = set([2])
+        pool = _Pool(size=2, health_check=lambda c: c in healthy,
+                     check_after=0)
+        with pool.pool.borrow():
+            with pool.pool.borrow():
+                pass
+        # 1 was returned last, so it is tried first and dropped
+        with pool.pool.borrow() as connector:
+            assert connector == 2
+        assert pool.closed == [1]
+
+    def test_health_check_skipped_when_recent(self):
+        pool = _Pool(size=1, health_check=lambda c: False, check_after=10)
+        with pool.pool.borrow():
+            pass
+        with pool.pool.borrow() as connector:
+            assert connector == 1
+        assert pool.closed == []
+
+    def test_close(self):
+        pool = _Pool(size=2)
+        pool.pool.register('registered')
+        with pool.pool.borrow():
+            with pool.pool.borrow():
+                pass
+            pool.pool.close()
+            assert sorted(pool.closed) == [2, 'registered']
+            assert pool.pool.registered is None
+        # the borrowed one is dropped when returned
+        assert sorted(pool.closed) == [1, 2, 'registered']
+        assert pool.pool.idle == 0
+
+    def test_register_replaces(self):
+        pool = _Pool()
+        pool.pool.register('first')
+        pool.pool.register('second')
+        assert pool.pool.registered == 'second'
+        pool.pool.close()
+        assert pool.closed == ['second']
+
+
+class TestConnectorRegistry(object):
+    def test_registered_connector_is_not_lent(self, standin, standin_sumo):
+        first = standin_sumo.create_connector(
+            Connector.REST, username='registry', password='key')
+        second = standin_sumo.create_connector(
+            Connector.REST, username='registry', password='key')
+        assert standin_sumo.connector(Connector.REST, 'registry') is second
+        with standin_sumo.borrow_connector(Connector.REST,
+                                           'registry') as borrowed:
+            assert borrowed is not first and borrowed is not second
+            response, _ = borrowed.make_request('GET',
+                                                standin.url + 'collectors')
+            assert response.status == 200
+        pool = standin_sumo.connector_pool(Connector.REST, 'registry')
+        assert pool.registered is second
+        assert pool.idle == 1 and pool.in_use == 0
+        standin_sumo.remove_connector(Connector.REST, 'registry')
+        assert pool.registered is None
+        with pytest.raises(InvalidConnector):
+            standin_sumo.connector(Connector.REST, 'registry')
+
+    def test_close_connector_pools_closes_registered(self, standin,
+                                                     monkeypatch):
+        sumo = AWSSumo(standin.url)
+        connector = sumo.create_connector(Connector.REST, username='closing',
+                                          password='key')
+        closed = []
+        monkeypatch.setattr(connector, 'close',
+                            lambda: closed.append(connector), raising=False)
+        pool = sumo.connector_pool(Connector.REST, 'closing')
+        sumo.close_connector_pools()
+        assert closed == [connector]
+        assert pool.registered is None
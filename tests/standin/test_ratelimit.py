@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.ratelimit import RateLimiter
+
+LOGGER = logging.getLogger('TestRateLimit')
+
+
+class TestRateLimiter(object):
+    def test_burst_then_rate(self):
+        limiter = RateLimiter(20, burst=5)
+        started = time.time()
+        waits = [limiter.acquire('key') for _ in range(10)]
+        assert waits[:5] == [0.0] * 5
+        assert all(wait > 0 for wait in waits[5:])
+        assert 0.2 <= time.time() - started < 0.4
+        assert abs(limiter.waited - sum(waits)) < 1e-6
+
+    def test_buckets_are_separate(self):
+        limiter = RateLimiter(1, burst=1)
+        assert limiter.acquire(RateLimiter.key('us1', 'a')) == 0.0
+        assert limiter.acquire(RateLimiter.key('us1', 'b')) == 0.0
+        assert limiter.acquire(RateLimiter.key('us2', 'a')) == 0.0
+
+    def test_threads_spaced_out(self):
+        limiter = RateLimiter(50, burst=1)
+        started = time.time()
+        threads = [threading.Thread(target=limiter.acquire, args=('key',))
+                   for _ in range(11)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.time() - started >= 0.18
+
+    def test_penalize(self):
+        limiter = RateLimiter(100, burst=100)
+        limiter.penalize('key', 0.2)
+        started = time.time()
+        limiter.acquire('key')
+        assert time.time() - started >= 0.18
+        limiter.penalize('other')
+        assert 0 < limiter.acquire('other') <= 0.02
+
+    def test_shared_file(self, tmpdir):
+        path = str(tmpdir.join('ratelimit.json'))
+        first = RateLimiter(10, burst=2, path=path)
+        second = RateLimiter(10, burst=2, path=path)
+        assert first.acquire('key') == 0.0
+        assert second.acquire('key') == 0.0
+        assert first.acquire('key') > 0
+
+    def test_positive_rate(self):
+        with pytest.raises(ValueError):
+            RateLimiter(0)
+
+
+class TestConnectorRateLimit(object):
+    def test_held_back(self, standin, standin_sumo):
+        connector = standin_sumo.create_connector(
+            Connector.REST, username='limited', password='key')
+        limiter = RateLimiter(20, burst=1)
+        connector.rate_limiter(limiter)
+        for _ in range(5):
+            connector.make_request('GET', standin.url + 'collectors')
+        assert limiter.waited >= 0.15
+
+    def test_429_penalizes(self, standin, standin_sumo):
+        connector = standin_sumo.create_connector(
+            Connector.REST, username='penalized', password='key')
+        limiter = RateLimiter(100, burst=100)
+        connector.rate_limiter(limiter)
+        collector = standin.add_collector('quota')
+        uri = standin.url + 'collectors/%s' % collector['id']
+        standin.inject_failures('collectors/%s' % collector['id'], 1,
+                                status=429, retry_after=1)
+        response, _ = connector.make_request('GET', uri)
+        assert response.status == 429
+        started = time.time()
+        response, _ = connector.make_request('GET', uri)
+        assert response.status == 200
+        assert time.time() - started >= 0.9
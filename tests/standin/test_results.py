@@ -0,0 +1,78 @@
+import copy
+import json
+import logging
+import pickle
+import pytest
+
+from testingframework.manager.jobs.results import Results, ReadOnlyDict, \
+    ReadOnlyList
+
+LOGGER = logging.getLogger('TestResults')
+EVENTS = [{'count': 1, 'ratio': 0.5, '_raw': 'a', 'tags': ['x', {'y': 1}]},
+          {'count': 2, '_raw': 'b', 'host': u'h1'},
+          {'_raw': 'a', 'flag': True}]
+
+
+class TestResults(object):
+    def test_formats(self):
+        results = Results(EVENTS)
+        assert len(results) == 3
+        assert results.as_list == EVENTS
+        assert results.as_dict['count'] == [1, 2, None]
+        assert results.get_field('flag') == [None, None, True]
+        assert results.get_field('missing') is None
+        assert 'host' in results and 'missing' not in results
+        assert results[-1] == EVENTS[-1] and results[1:] == EVENTS[1:]
+        assert list(results) == EVENTS
+        assert sorted(results.fields) == ['_raw', 'count', 'flag', 'host',
+                                          'ratio', 'tags']
+        with pytest.raises(IndexError):
+            results[3]
+
+    def test_json_and_isinstance(self):
+        results = Results(EVENTS)
+        assert isinstance(results[0], dict)
+        assert isinstance(results.as_list, list)
+        assert isinstance(results.as_dict, dict)
+        assert json.loads(json.dumps(results.as_list)) == \
+            json.loads(json.dumps(EVENTS))
+        assert json.dumps(results[1], sort_keys=True) == \
+            json.dumps(EVENTS[1], sort_keys=True)
+
+    def test_read_only(self):
+        results = Results(EVENTS)
+        event = results[0]
+        changes = [lambda: event.__setitem__('count', 3),
+                   lambda: event.update(count=3),
+                   lambda: event.pop('count'),
+                   lambda: event['tags'].append('z'),
+                   lambda: event['tags'][1].setdefault('z', 1),
+                   lambda: results.as_list.sort(),
+                   lambda: results.get_field('count').__setitem__(0, 3)]
+        for change in changes:
+            with pytest.raises(TypeError):
+                change()
+        assert isinstance(event['tags'], ReadOnlyList)
+        assert isinstance(event['tags'][1], ReadOnlyDict)
+        assert results.as_list == EVENTS
+
+    def test_copies_can_be_changed(self):
+        results = Results(EVENTS)
+        event = results[0].copy()
+        event['tags'].append('z')
+        event['tags'][1]['y'] = 2
+        assert type(event) is dict and type(event['tags'][1]) is dict
+        assert results[0] == EVENTS[0]
+        assert type(copy.deepcopy(results.as_list)) is list
+        assert pickle.loads(pickle.dumps(results[0], 2)) == EVENTS[0]
+        copied = results.copy()
+        assert copied.as_list == results.as_list
+
+    def test_events_not_kept(self):
+        events = [dict(event) for event in EVENTS]
+        results = Results(events)
+        events[0]['count'] = 3
+        del events[1:]
+        assert len(results) == 3
+        assert results[0]['count'] == 1
+        assert results.as_dict['count'] == [1, 2, None]
@@ -0,0 +1,138 @@
+import errno
+import email.utils
+import httplib
+import json
+import logging
+import random
+import socket
+import time
+import httplib2
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.retry import RetryPolicy, retry_after
+
+LOGGER = logging.getLogger('TestRetry')
+
+
+def _response(status, **headers):
+    headers['status'] = str(status)
+    return httplib2.Response(headers)
+
+
+class TestRetryPolicy(object):
+    def test_full_jitter(self):
+        random.seed(7)
+        policy = RetryPolicy(backoff=0.5, max_backoff=4.0)
+        waits = [policy.wait(3) for _ in range(200)]
+        assert 0 <= min(waits) and max(waits) <= 4.0
+        assert len(set(waits)) == 200
+        assert RetryPolicy(backoff=0.5, jitter=False).wait(2) == 2.0
+        assert RetryPolicy(backoff=0.5, max_backoff=1.0,
+                           jitter=False).wait(5) == 1.0
+
+    def test_tries(self):
+        policy = RetryPolicy(tries=3, jitter=False)
+        assert policy.delay(0, 'GET', 0, _response(503)) is not None
+        assert policy.delay(1, 'GET', 0, _response(503)) is not None
+        assert policy.delay(2, 'GET', 0, _response(503)) is None
+
+    def test_deadline(self):
+        policy = RetryPolicy(backoff=1.0, deadline=10, jitter=False)
+        assert policy.delay(0, 'GET', 8.5, _response(503)) == 1.0
+        assert policy.delay(0, 'GET', 9.5, _response(503)) is None
+        assert policy.delay(0, 'GET', 5, _response(429, **{
+            'retry-after': '6'})) is None
+
+    def test_statuses(self):
+        policy = RetryPolicy(jitter=False)
+        assert policy.delay(0, 'GET', 0, _response(404)) is None
+        assert policy.delay(0, 'GET', 0, _response(200)) is None
+        assert policy.delay(0, 'DELETE', 0, _response(502)) is not None
+
+    def test_retry_after(self):
+        policy = RetryPolicy(backoff=0.1, jitter=False)
+        assert policy.delay(0, 'GET', 0, _response(503, **{
+            'retry-after': '7'})) == 7.0
+        date = email.utils.formatdate(time.time() + 30, usegmt=True)
+        assert 28 <= retry_after(_response(503, **{'retry-after': date})) \
+            <= 30
+        assert retry_after(_response(503, **{'retry-after': '-3'})) == 0.0
+        assert retry_after(_response(503, **{'retry-after': 'soon'})) is None
+        assert retry_after(_response(503)) is None
+
+    def test_non_idempotent(self):
+        policy = RetryPolicy(jitter=False)
+        assert policy.delay(0, 'POST', 0, _response(503)) is None
+        assert policy.delay(0, 'POST', 0, _response(429)) is not None
+        refused = socket.error(errno.ECONNREFUSED, 'refused')
+        reset = socket.error(errno.ECONNRESET, 'reset')
+        assert policy.delay(0, 'POST', 0, error=refused) is not None
+        assert policy.delay(0, 'POST', 0, error=reset) is None
+        assert policy.delay(0, 'GET', 0, error=reset) is not None
+        assert policy.delay(0, 'GET', 0,
+                            error=httplib.BadStatusLine('')) is not None
+        assert policy.delay(0, 'GET', 0, error=ValueError()) is None
+        assert RetryPolicy(methods=['POST'], jitter=False).delay(
+            0, 'POST', 0, _response(503)) is not None
+
+    def test_call(self):
+        def eventually(calls):
+            def poll():
+                calls.append(1)
+                assert len(calls) >= 3
+                return 'found'
+            return poll
+
+        assert RetryPolicy(backoff=0.01).call(eventually([])) == 'found'
+        with pytest.raises(AssertionError):
+            RetryPolicy(tries=2, backoff=0.01).call(eventually([]))
+        missing = []
+        with pytest.raises(KeyError):
+            RetryPolicy(backoff=0.01).call(
+                lambda: missing.append(1) or {}['missing'])
+        assert len(missing) == 1
+
+
+class TestConnectorRetry(object):
+    @pytest.fixture
+    def retrying(self, standin_sumo):
+        connector = standin_sumo.create_connector(
+            Connector.REST, username='retrying', password='key')
+        connector.retry_policy(RetryPolicy(backoff=0.01, max_backoff=0.05))
+        return connector
+
+    def test_retries_until_success(self, standin, retrying):
+        collector = standin.add_collector('flaky')
+        uri = standin.url + 'collectors/%s' % collector['id']
+        standin.inject_failures('collectors/%s' % collector['id'], 2)
+        response, content = retrying.make_request('GET', uri)
+        assert response.status == 200
+        assert json.loads(content)['collector']['name'] == 'flaky'
+
+    def test_gives_up(self, standin, retrying):
+        collector = standin.add_collector('down')
+        standin.inject_failures('collectors/%s' % collector['id'], 10)
+        retrying.retry_policy(RetryPolicy(tries=3, backoff=0.01))
+        response, _ = retrying.make_request(
+            'GET', standin.url + 'collectors/%s' % collector['id'])
+        assert response.status == 503
+
+    def test_post_not_retried(self, standin, retrying):
+        collector = standin.add_collector('posted')
+        uri = standin.url + 'collectors/%s/sources' % collector['id']
+        standin.inject_failures('collectors/%s/sources' % collector['id'], 1)
+        body = json.dumps({'source': {'name': 'once'}})
+        response, _ = retrying.make_request(
+            'POST', uri, body, headers={'content-type': 'application/json'})
+        assert response.status == 503
+
+    def test_honors_retry_after(self, standin, retrying):
+        collector = standin.add_collector('throttled')
+        standin.inject_failures('collectors/%s' % collector['id'], 1,
+                                status=429, retry_after=1)
+        started = time.time()
+        response, _ = retrying.make_request(
+            'GET', standin.url + 'collectors/%s' % collector['id'])
+        assert response.status == 200
+        assert time.time() - started >= 1
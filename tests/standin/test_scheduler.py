@@ -0,0 +1,77 @@
+import logging
+import time
+import pytest
+
+from testingframework.exceptions.wait import WaitTimedOut
+from testingframework.manager.jobs import JobGroup, JobScheduler
+from testingframework.manager.jobs.poller import JobPoller
+
+LOGGER = logging.getLogger('TestScheduler')
+
+
+class TestJobScheduler(object):
+    def test_group_timeout_keeps_slot(self, standin_jobs):
+        poller = JobPoller()
+        scheduler = JobScheduler(max_running=1, poller=poller)
+        future = scheduler.submit(standin_jobs, '_sourceCategory=h')
+        deadline = time.time() + 5
+        while not poller.watched and time.time() < deadline:
+            time.sleep(0.01)
+        job = list(poller._watched)[0]
+        with pytest.raises(WaitTimedOut):
+            JobGroup([job], poller=poller).wait_all(timeout=0.1)
+        assert future.result(5) is job
+        assert scheduler.running() == 0
+        scheduler.shutdown()
+
+    def test_deadline_expires_on_time(self, standin_jobs):
+        scheduler = JobScheduler(max_running=1)
+        running = scheduler.submit(standin_jobs, '_sourceCategory=i')
+        started = time.time()
+        late = scheduler.submit(standin_jobs, '_sourceCategory=j',
+                                deadline=0.2)
+        with pytest.raises(WaitTimedOut):
+            late.result(5)
+        assert time.time() - started < 0.45
+        assert running.result(5).sid
+        assert scheduler.running() == 0 and scheduler.queued() == 0
+        scheduler.shutdown()
+
+    def test_max_running_must_be_positive(self):
+        with pytest.raises(ValueError):
+            JobScheduler(max_running=0)
+
+    def test_limits_running_jobs(self, standin_jobs):
+        scheduler = JobScheduler(max_running=2)
+        futures = [scheduler.submit(standin_jobs, '_sourceCategory=p%d' % i)
+                   for i in range(5)]
+        assert scheduler.running(standin_jobs) <= 2
+        jobs = [future.result(10) for future in futures]
+        assert len(set(job.sid for job in jobs)) == 5
+        # no two started before the first two finished
+        finished = sorted(job.finish_wait_time for job in jobs)
+        started = sorted(job.start_time for job in jobs)
+        assert started[2] >= finished[0]
+        assert scheduler.running() == 0 and scheduler.queued() == 0
+        scheduler.shutdown()
+
+    def test_priority_first(self, standin_jobs):
+        scheduler = JobScheduler(max_running=1)
+        running = scheduler.submit(standin_jobs, '_sourceCategory=q')
+        low = scheduler.submit(standin_jobs, '_sourceCategory=r')
+        high = scheduler.submit(standin_jobs, '_sourceCategory=s',
+                                priority=1)
+        assert scheduler.queued(standin_jobs) == 2
+        assert high.result(10).start_time < low.result(10).start_time
+        assert running.result(10).sid
+        scheduler.shutdown()
+
+    def test_failed_create_frees_slot(self, standin_jobs):
+        scheduler = JobScheduler(max_running=1)
+        failed = scheduler.submit(standin_jobs, '_sourceCategory=t',
+                                  to_time='yesterday')
+        with pytest.raises(ValueError):
+            failed.result(5)
+        assert scheduler.submit(standin_jobs,
+                                '_sourceCategory=t').result(5).sid
+        scheduler.shutdown()
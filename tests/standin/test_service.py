@@ -0,0 +1,74 @@
+import json
+import logging
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.session import SessionStore
+from testingframework.connector.trace import TraceRecorder
+from testingframework.sumo.standin import LOGIN_ENDPOINT
+
+LOGGER = logging.getLogger('TestService')
+LOGIN = 'POST ' + LOGIN_ENDPOINT
+
+
+def _header_names(recorder, tmpdir):
+    path = str(tmpdir.join('trace.har.json'))
+    recorder.dump(path)
+    entry = json.load(open(path))['log']['entries'][-1]
+    return set(header['name'] for header in entry['request']['headers'])
+
+
+@pytest.fixture
+def service(standin_sumo):
+    connector = standin_sumo.create_connector(
+        Connector.SERVICEREST, username='service', password='key')
+    connector.session_store(SessionStore())
+    return connector
+
+
+class TestServiceConnector(object):
+    def test_json_headers(self, service):
+        headers = service.headers
+        assert headers['Content-Type'] == 'application/json'
+        assert headers['Accept'].startswith('application/json')
+
+    def test_no_session_by_default(self, standin, service, tmpdir):
+        recorder = TraceRecorder()
+        service.trace_recorder(recorder)
+        before = standin.requests.get(LOGIN, 0)
+        response, _ = service.make_request('GET', standin.url + 'collectors')
+        assert response.status == 200
+        assert standin.requests.get(LOGIN, 0) == before
+        assert 'ApiSession' not in _header_names(recorder, tmpdir)
+
+    def test_service_login(self, standin, service, tmpdir):
+        recorder = TraceRecorder()
+        service.trace_recorder(recorder)
+        session_id = service.service_login()
+        assert session_id == service.sessionkey
+        response, _ = service.make_request('GET', standin.url + 'collectors',
+                                           use_sessionkey=True)
+        assert response.status == 200
+        names = _header_names(recorder, tmpdir)
+        assert 'ApiSession' in names and 'Cookie' in names
+
+    def test_session_shared(self, standin, standin_sumo):
+        store = SessionStore()
+        before = standin.requests.get(LOGIN, 0)
+        session_ids = []
+        for _ in range(2):
+            connector = standin_sumo.create_connector(
+                Connector.SERVICEREST, username='shared-service',
+                password='key')
+            connector.session_store(store)
+            session_ids.append(connector.service_login())
+        assert session_ids[0] == session_ids[1]
+        assert standin.requests.get(LOGIN, 0) == before + 1
+
+    def test_session_renewed(self, standin, service):
+        first = service.service_login()
+        standin.expire_sessions()
+        response, _ = service.make_request('GET', standin.url + 'collectors',
+                                           use_sessionkey=True)
+        assert response.status == 200
+        assert service.sessionkey != first
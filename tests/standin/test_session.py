@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import threading
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.session import SessionStore
+from testingframework.sumo.standin import LOGIN_ENDPOINT
+from testingframework.util.filelock import FileLock
+
+LOGGER = logging.getLogger('TestSession')
+
+
+class _Login(object):
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.count += 1
+            return {'id': 'session-%d' % self.count, 'cookie': 'c'}
+
+
+@pytest.fixture(params=['memory', 'file'])
+def store(request, tmpdir):
+    if request.param == 'memory':
+        return SessionStore()
+    return SessionStore(str(tmpdir.join('sessions.json')))
+
+
+class TestSessionStore(object):
+    def test_logs_in_once(self, store):
+        login = _Login()
+        key = SessionStore.key('http://x/api/v1/', 'user')
+        first = store.session(key, login)
+        assert store.session(key, login) == first
+        assert login.count == 1
+
+    def test_stale_session_replaced_once(self, store):
+        login = _Login()
+        stale = store.session('key', login)
+        fresh = store.session('key', login, stale=stale)
+        assert fresh != stale
+        assert store.session('key', login, stale=stale) == fresh
+        assert login.count == 2
+
+    def test_discard(self, store):
+        login = _Login()
+        store.session('key', login)
+        store.discard('key')
+        store.discard('missing')
+        store.session('key', login)
+        assert login.count == 2
+
+    def test_threads_share_login(self, store):
+        login = _Login()
+        threads = [threading.Thread(target=store.session,
+                                    args=('key', login))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert login.count == 1
+
+
+class TestSessionFile(object):
+    def test_shared_between_stores(self, tmpdir):
+        path = str(tmpdir.join('sessions.json'))
+        login = _Login()
+        session = SessionStore(path).session('key', login)
+        assert SessionStore(path).session('key', login) == session
+        assert login.count == 1
+        assert json.load(open(path)) == {'key': session}
+        assert oct(os.stat(path).st_mode & 0777) == '0600'
+
+    def test_rewrites_existing_file(self, tmpdir):
+        path = str(tmpdir.join('sessions.json'))
+        store = SessionStore(path)
+        login = _Login()
+        for key in ('a', 'b', 'c'):
+            store.session(key, login)
+        assert sorted(json.load(open(path))) == ['a', 'b', 'c']
+        assert not os.path.exists(path + '.tmp')
+
+    def test_rewrites_existing_file_on_windows(self, tmpdir, monkeypatch):
+        rename = os.rename
+
+        def windows_rename(source, target):
+            if os.path.exists(target):
+                raise OSError(17, 'File exists', target)
+            rename(source, target)
+
+        monkeypatch.setattr(os, 'name', 'nt')
+        monkeypatch.setattr(os, 'rename', windows_rename)
+        path = str(tmpdir.join('sessions.json'))
+        store = SessionStore(path)
+        login = _Login()
+        for key in ('a', 'b'):
+            store.session(key, login)
+        assert sorted(json.load(open(path))) == ['a', 'b']
+
+    def test_corrupt_file(self, tmpdir):
+        path = tmpdir.join('sessions.json')
+        path.write('{not json')
+        login = _Login()
+        SessionStore(str(path)).session('key', login)
+        assert login.count == 1
+
+    def test_file_lock(self, tmpdir):
+        lock = FileLock(str(tmpdir.join('file.lock')))
+        order = []
+
+        def hold():
+            with lock:
+                order.append('second')
+
+        with lock:
+            thread = threading.Thread(target=hold)
+            thread.start()
+            thread.join(0.1)
+            order.append('first')
+        thread.join()
+        assert order == ['first', 'second']
+
+
+class TestConnectorSession(object):
+    def test_connectors_share_session(self, standin, standin_sumo, tmpdir):
+        store = SessionStore(str(tmpdir.join('sessions.json')))
+        login = 'POST ' + LOGIN_ENDPOINT
+        before = standin.requests.get(login, 0)
+        for _ in range(2):
+            connector = standin_sumo.create_connector(
+                Connector.REST, username='shared', password='key')
+            connector.session_store(store)
+            response, _ = connector.make_request(
+                'GET', standin.url + 'collectors', use_sessionkey=True)
+            assert response.status == 200
+        assert standin.requests.get(login, 0) == before + 1
+        assert len(json.load(open(store.path))) == 1
+
+    def test_expired_session(self, standin, standin_connector):
+        uri = standin.url + 'collectors'
+        response, _ = standin_connector.make_request('GET', uri,
+                                                     use_sessionkey=True)
+        assert response.status == 200
+        login = 'POST ' + LOGIN_ENDPOINT
+        before = standin.requests.get(login, 0)
+        standin.expire_sessions()
+        response, _ = standin_connector.make_request('GET', uri,
+                                                     use_sessionkey=True)
+        assert response.status == 200
+        assert standin.requests.get(login, 0) == before + 1
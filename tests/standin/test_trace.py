@@ -0,0 +1,74 @@
+import hashlib
+import json
+import logging
+import httplib2
+
+from testingframework.connector.base import Connector
+from testingframework.connector.trace import TraceRecorder
+
+LOGGER = logging.getLogger('TestTrace')
+
+
+def _dump(recorder, tmpdir, comment=None):
+    path = str(tmpdir.join('trace.har.json'))
+    recorder.dump(path, comment)
+    return json.load(open(path))['log']
+
+
+class TestTraceRecorder(object):
+    def test_har_and_redaction(self, tmpdir):
+        recorder = TraceRecorder()
+        response = httplib2.Response({'status': '200',
+                                      'set-cookie': 'JSESSIONID=1',
+                                      'content-type': 'application/json'})
+        recorder.record('POST', 'http://x/api/v1/search/jobs',
+                        {'Authorization': 'Basic c2VjcmV0',
+                         'Content-Type': 'application/json'},
+                        '{"query": "*"}', response, '{"id": "1"}', 0.25)
+        log = _dump(recorder, tmpdir, 'test_search failed')
+        assert log['comment'] == 'test_search failed'
+        entry, = log['entries']
+        assert entry['time'] == 250
+        assert entry['request']['method'] == 'POST'
+        assert entry['request']['postData']['text'] == '{"query": "*"}'
+        assert entry['response']['status'] == 200
+        headers = dict((header['name'], header['value'])
+                       for header in entry['request']['headers'] +
+                       entry['response']['headers'])
+        assert headers['Authorization'] == '<redacted>'
+        assert headers['set-cookie'] == '<redacted>'
+        assert headers['Content-Type'] == 'application/json'
+        assert 'c2VjcmV0' not in json.dumps(log)
+
+    def test_bounded(self, tmpdir):
+        recorder = TraceRecorder(capacity=3, max_body=4)
+        for index in range(5):
+            recorder.record('GET', 'http://x/%d' % index, {}, None, None,
+                            'abcdefgh', 0.0)
+        assert len(recorder) == 3
+        log = _dump(recorder, tmpdir)
+        assert [entry['request']['url'] for entry in log['entries']] == \
+            ['http://x/2', 'http://x/3', 'http://x/4']
+        content = log['entries'][0]['response']['content']
+        assert content == {'text': 'abcd', 'size': 8, 'truncated': True,
+                           'sha1': hashlib.sha1('abcdefgh').hexdigest()}
+        assert log['entries'][0]['response']['status'] is None
+        recorder.clear()
+        assert len(recorder) == 0
+
+
+class TestConnectorTrace(object):
+    def test_connector_records(self, standin, standin_sumo, tmpdir):
+        connector = standin_sumo.create_connector(
+            Connector.REST, username='traced', password='key')
+        recorder = TraceRecorder()
+        connector.trace_recorder(recorder)
+        connector.make_request('GET', standin.url + 'collectors')
+        entries = _dump(recorder, tmpdir)['entries']
+        assert [entry['request']['url'] for entry in entries][-1] == \
+            standin.url + 'collectors'
+        assert entries[-1]['response']['status'] == 200
+        assert all(header['value'] == '<redacted>'
+                   for entry in entries
+                   for header in entry['request']['headers']
+                   if header['name'].lower() == 'authorization')
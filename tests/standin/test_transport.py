@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+import pytest
+
+from testingframework.connector.base import Connector
+from testingframework.connector.transport import HTTPConnectionPool, \
+    PoolTimeout
+
+LOGGER = logging.getLogger('TestTransport')
+
+
+class _Http(object):
+    def __init__(self):
+        self.connections = {}
+
+
+class TestHTTPConnectionPool(object):
+    def test_reuses_returned(self):
+        pool = HTTPConnectionPool(_Http, size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            assert second is first
+
+    def test_drops_on_error(self):
+        pool = HTTPConnectionPool(_Http, size=1)
+        with pytest.raises(ValueError):
+            with pool.connection() as first:
+                raise ValueError('broken connection')
+        with pool.connection(timeout=0.1) as second:
+            assert second is not first
+
+    def test_clear_wakes_waiters(self):
+        pool = HTTPConnectionPool(_Http, size=1)
+        borrowed = pool.connection()
+        borrowed.__enter__()
+        got = []
+
+        def borrow():
+            with pool.connection(timeout=5) as http:
+                got.append(http)
+
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        time.sleep(0.1)
+        pool.clear()
+        thread.join(2)
+        assert not thread.is_alive() and len(got) == 1
+        borrowed.__exit__(None, None, None)
+
+    def test_timeout(self):
+        pool = HTTPConnectionPool(_Http, size=1)
+        with pool.connection():
+            with pytest.raises(PoolTimeout):
+                with pool.connection(timeout=0.1):
+                    pass
+
+
+class TestSharedConnector(object):
+    def test_requests_from_threads(self, standin, standin_sumo):
+        connector = standin_sumo.create_connector(
+            Connector.REST, username='threads', password='key', pool_size=4)
+        uri = standin.url + 'collectors'
+        statuses = []
+
+        def request():
+            for _ in range(5):
+                statuses.append(connector.make_request('GET', uri)[0].status)
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert statuses == [200] * 40